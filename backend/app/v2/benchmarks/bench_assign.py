@@ -0,0 +1,161 @@
+# timetable_scheduler/benchmarks/bench_assign.py
+"""
+Microbenchmark of assign/unassign throughput for one search placement: a
+lecture on a room, a faculty and a batch, plus its timetable entry.
+
+Replays the depth-first pattern the search produces (place, go deeper, undo
+in reverse order) on a synthetic institute with:
+  - a reference copy of the old path: every model slot list and the
+    timetable cell hold value.copy(), and undo finds them again with
+    list.remove (dict equality; timetable cells are shared by all batches of
+    a semester), and
+  - the current path: models store integer handles and undo() pops their
+    assignment trail, the solver pushes/pops session indexes and only writes
+    the timetable once an attempt succeeds.
+Usage:
+
+    python benchmarks/bench_assign.py [--batches 50 --rooms 80 --faculty 150 --ops 20000 --depth 40]
+"""
+
+import os, sys, time, random, argparse, importlib.util
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the package's modules import loader.py from its root
+sys.path.insert(0, BASE)
+
+
+def import_file(relpath, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def legacy_assign(obj, day, start, value):
+    # the pre-handle model assign: one dict copy per slot
+    duration = int(value.get('duration', 1))
+    if not obj.occupancy.is_free(day, start, duration):
+        return False
+    for s in [str(int(start) + i) for i in range(duration)]:
+        obj.schedule[day][s].append(value.copy())
+    obj.occupancy.occupy(day, start, duration)
+    if hasattr(obj, 'assigned_hours'):
+        obj.assigned_hours += duration
+        obj.assigned_lecture_hours += duration
+    return True
+
+
+def legacy_unassign(obj, day, start, value):
+    duration = int(value.get('duration', 1))
+    for s in [str(int(start) + i) for i in range(duration)]:
+        try:
+            obj.schedule[day][s].remove(value)
+        except ValueError:
+            pass
+        obj.occupancy.mark(day, s, bool(obj.schedule[day][s]))
+    if hasattr(obj, 'assigned_hours'):
+        obj.assigned_hours -= duration
+        obj.assigned_lecture_hours -= duration
+
+
+def build(args):
+    synthetic = import_file("benchmarks/synthetic.py", "synthetic")
+    data = synthetic.generate_institute(n_batches=args.batches, n_rooms=args.rooms, n_faculty=args.faculty, seed=args.seed)
+    classroom = import_file("models/classroom.py", "classroom")
+    faculty = import_file("models/faculty.py", "faculty")
+    batch = import_file("models/batch.py", "batch")
+    timetable = import_file("scheduler/timetable.py", "timetable")
+    for f in data["faculty.json"]:
+        # the benchmark is about storage, not hour caps
+        f["max_hours_per_week"] = f["max_lecture_hours"] = 10 ** 6
+    rooms = [classroom.Classroom(**r) for r in data["classrooms.json"]]
+    facs = [faculty.Faculty(**f) for f in data["faculty.json"]]
+    batches = [batch.Batch(**b) for b in data["batches.json"]]
+    gs = data["timetable_constraints.json"]["general_settings"]
+    slots = [str(i) for i in range(1, gs["slots_per_day"] + 1)]
+    tt = timetable.Timetable(semesters=sorted({b.semester for b in batches}), working_days=gs["working_days"], slots=slots)
+    return rooms, facs, batches, tt
+
+
+def workload(args, rooms, facs, batches, tt):
+    """
+    (room, faculty, batch, day, start, value) steps, each on cells that are
+    free at that point; the open steps are undone every `depth` steps.
+    """
+    rng = random.Random(args.seed)
+    steps, busy = [], set()
+    while len(steps) < args.ops:
+        room, fac, b = rng.choice(rooms), rng.choice(facs), rng.choice(batches)
+        day, start = rng.choice(tt.working_days), rng.choice(tt.slots)
+        cells = [(obj.id, day, start) for obj in (room, fac, b)]
+        if any(start not in obj.schedule.get(day, {}) for obj in (room, fac, b)) or busy.intersection(cells):
+            continue
+        busy.update(cells)
+        value = {"batch": b.id, "subject": f"S{len(steps)}", "faculty": fac.id, "room": room.id,
+                 "batch_size": 0, "duration": 1, "is_lab": False}
+        steps.append((room, fac, b, day, start, value))
+        if len(steps) % args.depth == 0:
+            busy.clear()
+    return steps
+
+
+def run_legacy(steps, depth, tt):
+    stack = []
+    t0 = time.perf_counter()
+    for room, fac, b, day, start, value in steps:
+        legacy_assign(room, day, start, value)
+        legacy_assign(fac, day, start, value)
+        legacy_assign(b, day, start, value)
+        tt.assign(b.semester, day, start, value)
+        stack.append((room, fac, b, day, start, value))
+        if len(stack) >= depth:
+            while stack:
+                room, fac, b, day, start, value = stack.pop()
+                tt.schedule[b.semester][day][start].remove(value)
+                legacy_unassign(b, day, start, value)
+                legacy_unassign(fac, day, start, value)
+                legacy_unassign(room, day, start, value)
+    return time.perf_counter() - t0
+
+
+def run_handles(steps, depth, tt):
+    stack, trail = [], []
+    t0 = time.perf_counter()
+    for i, (room, fac, b, day, start, value) in enumerate(steps):
+        rh = room.assign(day, start, value)[1]
+        fh = fac.assign(day, start, value)[1]
+        bh = b.assign(day, start, value)[1]
+        trail.append(i)
+        stack.append((room, fac, b, rh, fh, bh))
+        if len(stack) >= depth:
+            while stack:
+                room, fac, b, rh, fh, bh = stack.pop()
+                trail.pop()
+                b.undo(bh)
+                fac.undo(fh)
+                room.undo(rh)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--batches", type=int, default=50)
+    ap.add_argument("--rooms", type=int, default=80)
+    ap.add_argument("--faculty", type=int, default=150)
+    ap.add_argument("--ops", type=int, default=20000)
+    ap.add_argument("--depth", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    results = {}
+    for name, fn in (("value copies + list.remove", run_legacy), ("handles + undo trail", run_handles)):
+        rooms, facs, batches, tt = build(args)
+        steps = workload(args, rooms, facs, batches, tt)
+        results[name] = fn(steps, args.depth, tt)
+        print(f"{name:<28} {results[name] * 1000:9.1f} ms  {args.ops / results[name]:10.0f} placements+undos/s")
+    old, new = results.values()
+    print(f"speedup: {old / new if new else float('inf'):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# timetable_scheduler/benchmarks/bench_decompose.py
+"""
+Compare whole-institute solving with TimetableSolver(decompose=True) on
+synthetic institutes split into independent departments (the fourth scale
+field), sequentially and with one worker per CPU.
+
+    python benchmarks/bench_decompose.py [--time-limit 60 --max-solutions 4]
+
+Accepts the same options as bench_solve.py.
+"""
+
+import os, importlib.util
+
+spec = importlib.util.spec_from_file_location("bench_solve", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_solve.py"))
+bench_solve = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_solve)
+
+CONFIGS = [{"domain_mode": "incremental"}, {"domain_mode": "incremental", "decompose": True},
+           {"domain_mode": "incremental", "decompose": True, "workers": 0}]
+
+if __name__ == "__main__":
+    bench_solve.main(default_configs=CONFIGS, default_scales=["24x40x80x2", "48x80x160x4", "56x96x192x8"])
@@ -0,0 +1,139 @@
+# timetable_scheduler/benchmarks/bench_domain.py
+"""
+Benchmark TimetableSolver._generate_domain on a synthetic institute
+(50 batches / 80 rooms / 150 faculty by default).
+
+Compares the bitmask occupancy engine against a reference copy of the old
+list-scan availability checks, over resources that are partially booked so
+both paths do real work. Usage:
+
+    python benchmarks/bench_domain.py [--batches 50 --rooms 80 --faculty 150 --fill 0.3 --reps 3]
+"""
+
+import os, sys, time, random, argparse, importlib.util
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the package's modules import loader.py from its root
+sys.path.insert(0, BASE)
+
+
+def import_file(relpath, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def legacy_is_available(obj, days, slots, day, start_slot, duration):
+    # the pre-bitmask check: rebuild string ids and scan lists/dicts
+    if day not in days:
+        return False
+    try:
+        start = int(start_slot)
+    except Exception:
+        return False
+    for s in [str(start + i) for i in range(duration)]:
+        if s not in slots:
+            return False
+        if obj.schedule.get(day, {}).get(s):
+            return False
+    return True
+
+
+def legacy_generate_domain(solver, session, rooms, facs, batches):
+    candidates = []
+    dur = int(session['duration'])
+    batch_obj = batches[session['batch']]
+    needed_type = "lab" if session['is_lab'] else "lecture"
+    possible_rooms = [r for r in rooms.values() if r.type == needed_type and r.capacity >= session['batch_size']]
+    possible_facs = [f for f in facs.values() if session['subject'] in getattr(f, 'subjects', [])]
+    if not possible_rooms or not possible_facs:
+        return []
+    days = [d for d in batch_obj.available_days if d in solver.working_days]
+    for day in days:
+        for start in solver.slots:
+            if not solver._slot_seq(start, dur):
+                continue
+            for room in possible_rooms:
+                if not legacy_is_available(room, room.available_days, room.available_slots, day, start, dur):
+                    continue
+                for fac in possible_facs:
+                    if not legacy_is_available(fac, fac.preferred_days, fac.preferred_slots, day, start, dur):
+                        continue
+                    if not legacy_is_available(batch_obj, batch_obj.available_days, batch_obj.available_slots, day, start, dur):
+                        continue
+                    candidates.append((room.id, fac.id, day, start))
+    random.shuffle(candidates)
+    return candidates
+
+
+def build(args):
+    synthetic = import_file("benchmarks/synthetic.py", "synthetic")
+    data = synthetic.generate_institute(n_batches=args.batches, n_rooms=args.rooms, n_faculty=args.faculty, seed=args.seed)
+    classroom = import_file("models/classroom.py", "classroom")
+    faculty = import_file("models/faculty.py", "faculty")
+    subject = import_file("models/subject.py", "subject")
+    batch = import_file("models/batch.py", "batch")
+    solver_mod = import_file("scheduler/timetable_solver.py", "timetable_solver_pkg")
+
+    rooms = {r['id']: classroom.Classroom(**r) for r in data["classrooms.json"]}
+    facs = {f['id']: faculty.Faculty(**f) for f in data["faculty.json"]}
+    subjects = {s['id']: subject.Subject(**s) for s in data["subjects.json"]}
+    batches = {b['id']: batch.Batch(**b) for b in data["batches.json"]}
+    gs = data["timetable_constraints.json"]["general_settings"]
+    solver = solver_mod.TimetableSolver(slots=[str(i) for i in range(1, gs["slots_per_day"] + 1)],
+                                        working_days=gs["working_days"], classrooms_map=rooms, faculty_map=facs,
+                                        batches_map=batches, subjects_map=subjects, random_seed=args.seed)
+
+    # book a fraction of every resource's cells so the checks are not trivially true
+    rng = random.Random(args.seed)
+    for pool in (rooms, facs, batches):
+        for obj in pool.values():
+            for day, cells in obj.schedule.items():
+                for s in list(cells):
+                    if rng.random() < args.fill:
+                        cells[s].append({"duration": 1})
+                        obj.occupancy.occupy(day, s, 1)
+    return solver, rooms, facs, batches
+
+
+def run(fn, solver, sessions, rooms, facs, batches, reps):
+    best = None
+    total = 0
+    for _ in range(reps):
+        random.seed(0)
+        t0 = time.perf_counter()
+        total = sum(len(fn(sess, rooms, facs, batches)) for sess in sessions)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, total
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--batches", type=int, default=50)
+    ap.add_argument("--rooms", type=int, default=80)
+    ap.add_argument("--faculty", type=int, default=150)
+    ap.add_argument("--fill", type=float, default=0.3)
+    ap.add_argument("--reps", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    solver, rooms, facs, batches = build(args)
+    sessions = solver._generate_sessions(batches)
+    print(f"{len(batches)} batches, {len(rooms)} rooms, {len(facs)} faculty, {len(sessions)} sessions")
+
+    legacy = lambda sess, r, f, b: legacy_generate_domain(solver, sess, r, f, b)
+    t_old, n_old = run(legacy, solver, sessions, rooms, facs, batches, args.reps)
+    state = solver._solver_state()    # snapshot of the partially booked models
+    bitmask = lambda sess, r, f, b: solver._generate_domain(sess, state)
+    t_new, n_new = run(bitmask, solver, sessions, rooms, facs, batches, args.reps)
+    if n_old != n_new:
+        print(f"WARNING: candidate counts differ (list-scan {n_old}, bitmask {n_new})")
+    print(f"list-scan _generate_domain: {t_old * 1000:9.1f} ms  ({n_old} candidates)")
+    print(f"bitmask   _generate_domain: {t_new * 1000:9.1f} ms  ({n_new} candidates)")
+    print(f"speedup: {t_old / t_new if t_new else float('inf'):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# timetable_scheduler/benchmarks/bench_feasibility.py
+"""
+Benchmark the NumPy feasibility tensor (domain_backend="numpy") against the
+pure-Python bitmask _generate_domain, at multiples of the demo data size
+(4 batches / 13 rooms / 10 faculty).
+
+Every scale is a synthetic institute split into one department per 10x of the
+demo (so a session's eligible pools grow like a real institute's rather than
+with the whole campus), with a fraction of every resource's cells booked.
+Both backends list the domains of the same sample of sessions against the same
+state, and size them as the MRV orderings do (the numpy backend counts without
+listing); candidates and sizes must be identical. Usage:
+
+    python benchmarks/bench_feasibility.py [--scales 10 50 200 --sample 200 --fill 0.3 --reps 3]
+"""
+
+import os, sys, time, random, argparse, importlib.util
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the package's modules import loader.py from its root
+sys.path.insert(0, BASE)
+DEMO = (4, 13, 10)
+
+
+def import_file(relpath, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def build(scale, fill, seed, backend):
+    synthetic = import_file("benchmarks/synthetic.py", "synthetic")
+    pipeline = import_file("pipeline.py", "timetable_pipeline")
+    data = synthetic.generate_institute(n_batches=DEMO[0] * scale, n_rooms=DEMO[1] * scale, n_faculty=DEMO[2] * scale,
+                                        n_departments=max(1, scale // 10), seed=seed)
+    data["timetable_constraints.json"].update(domain_backend=backend, ordering="mrv")
+    solver, sessions, _ = pipeline.build_solver(data)
+    # book a fraction of every resource's cells so the checks are not trivially true
+    rng = random.Random(seed)
+    for pool in (solver.classrooms, solver.faculty, solver.batches):
+        for obj in pool.values():
+            for day, cells in obj.schedule.items():
+                for s in list(cells):
+                    if rng.random() < fill:
+                        cells[s].append({"duration": 1})
+                        obj.occupancy.occupy(day, s, 1)
+    return solver, sessions
+
+
+def run(fn, sessions, reps):
+    best, out = None, None
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = [fn(sess) for sess in sessions]
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def timings(solver, sessions, reps):
+    """(listing seconds, domains, MRV sizing seconds, sizes) over `sessions`."""
+    state = solver._solver_state()
+    if solver._tensor is not None:
+        listing = lambda sess: solver._tensor.domain(sess, state)
+        size = lambda sess: solver._tensor.count(sess, state)
+    else:
+        listing = lambda sess: solver._generate_domain(sess, state, shuffle=False)
+        size = lambda sess: len(listing(sess))
+    t_list, domains = run(listing, sessions, reps)
+    t_size, sizes = run(size, sessions, reps)
+    return t_list, domains, t_size, sizes
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scales", type=int, nargs="+", default=[10, 50, 200])
+    ap.add_argument("--sample", type=int, default=200, help="sessions timed per scale")
+    ap.add_argument("--fill", type=float, default=0.3)
+    ap.add_argument("--reps", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    for scale in args.scales:
+        solver, sessions = build(scale, args.fill, args.seed, "python")
+        sample = sorted(random.Random(args.seed).sample(range(len(sessions)), min(args.sample, len(sessions))))
+        t_py, d_py, ts_py, s_py = timings(solver, [sessions[i] for i in sample], args.reps)
+        n = sum(len(d) for d in d_py)
+        print(f"{scale}x demo: {len(solver.batches)} batches, {len(solver.classrooms)} rooms, {len(solver.faculty)} faculty, "
+              f"{len(sessions)} sessions ({len(sample)} timed, {n} candidates)")
+        print(f"  python listing: {t_py * 1000:9.1f} ms   domain sizes (MRV): {ts_py * 1000:9.1f} ms")
+        try:
+            solver, sessions = build(scale, args.fill, args.seed, "numpy")
+        except ImportError as e:
+            print(f"  numpy  _generate_domain: skipped ({e})")
+            continue
+        t_np, d_np, ts_np, s_np = timings(solver, [sessions[i] for i in sample], args.reps)
+        if d_np != d_py or s_np != s_py:
+            print("  WARNING: the backends list different candidates")
+        print(f"  numpy  listing: {t_np * 1000:9.1f} ms   domain sizes (MRV): {ts_np * 1000:9.1f} ms")
+        print(f"  speedup: {t_py / t_np if t_np else float('inf'):.1f}x listing, "
+              f"{ts_py / ts_np if ts_np else float('inf'):.1f}x sizing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# timetable_scheduler/benchmarks/bench_output.py
+"""
+Benchmark the output formats of pipeline.write_outputs on a large institute:
+timetable_top_N.json (nested, indented) against the flat row writers of
+io/output_writer.py (JSONL and columnar, plain and compact) and the Excel
+workbook of io/excel_writer.py, by write time and bytes on disk.
+
+Only serialization is measured, so the timetables are synthetic: every session of
+a synthetic institute is dealt round-robin over days, start slots, and its
+eligible rooms and faculty, shaped like the solver's output (an assignment
+repeated in every slot it covers). Usage:
+
+    python benchmarks/bench_output.py [--batches 400 --rooms 600 --faculty 1200 --solutions 4]
+"""
+
+import os, sys, time, shutil, tempfile, argparse, importlib.util
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the package's modules import loader.py from its root
+sys.path.insert(0, BASE)
+
+
+def import_file(relpath, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def synthetic_solutions(args):
+    synthetic = import_file("benchmarks/synthetic.py", "synthetic")
+    pipeline = import_file("pipeline.py", "timetable_pipeline")
+    data = synthetic.generate_institute(n_batches=args.batches, n_rooms=args.rooms, n_faculty=args.faculty,
+                                        n_departments=args.departments, seed=args.seed)
+    solver, sessions, _ = pipeline.build_solver(data)
+    solutions = []
+    for k in range(args.solutions):
+        schedule = {}
+        for i, sess in enumerate(sessions):
+            rooms, facs = solver._eligible(sess)
+            dur = int(sess['duration'])
+            day = solver.working_days[(i + k) % len(solver.working_days)]
+            start = (i // len(solver.working_days) + k) % (len(solver.slots) - dur + 1) + 1
+            cells = schedule.setdefault(sess['semester'], {}).setdefault(day, {})
+            for s in range(start, start + dur):
+                cells.setdefault(str(s), []).append({
+                    "batch": sess['batch'], "subject": sess['subject'], "faculty": facs[(i + k) % len(facs)].id,
+                    "room": rooms[(i + k) % len(rooms)].id, "batch_size": sess['batch_size'], "duration": dur,
+                    "is_lab": sess['is_lab']})
+        solutions.append({"score": 100 - k, "score_norm": 100, "signature": f"s{k}", "soft_score": None,
+                          "metadata": {}, "schedule": schedule})
+    return pipeline, {"solutions": solutions}, len(sessions)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--batches", type=int, default=400)
+    ap.add_argument("--rooms", type=int, default=600)
+    ap.add_argument("--faculty", type=int, default=1200)
+    ap.add_argument("--departments", type=int, default=8)
+    ap.add_argument("--solutions", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    pipeline, result, n_sessions = synthetic_solutions(args)
+    print(f"{args.batches} batches, {n_sessions} sessions, {args.solutions} solutions")
+    base = None
+    for formats, compact in [(["json"], False), (["jsonl"], False), (["columnar"], False),
+                             (["jsonl"], True), (["columnar"], True), (["xlsx"], False)]:
+        out = tempfile.mkdtemp()
+        try:
+            t0 = time.perf_counter()
+            paths = pipeline.write_outputs(result, out, log=lambda *a: None, formats=formats, compact=compact)
+            dt = time.perf_counter() - t0
+            size = sum(os.path.getsize(os.path.join(out, f)) for f in os.listdir(out))
+            names = ", ".join(sorted({os.path.basename(p).replace("_1.", "_N.") for p in paths if "_top_" not in p or "_1." in p}))
+        finally:
+            shutil.rmtree(out)
+        if not paths:
+            print(f"{formats[0]:17s} skipped (openpyxl not installed)")
+            continue
+        base = base or (dt, size)
+        print(f"{formats[0] + (' compact' if compact else ''):17s} {dt * 1000:8.1f} ms {size / 1e6:8.2f} MB"
+              f"   ({base[0] / dt:4.1f}x faster, {base[1] / size:4.1f}x smaller)  {names}")
+
+
+if __name__ == "__main__":
+    main()
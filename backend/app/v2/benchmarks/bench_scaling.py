@@ -0,0 +1,224 @@
+# timetable_scheduler/benchmarks/bench_scaling.py
+"""
+Scaling benchmark: every engine on synthetic institutes from the 4-batch demo
+size up to 200 batches, with a JSON and CSV report to compare across commits.
+
+Each (dataset, engine) run is a fresh interpreter (this file with --run) on a
+data folder written by synthetic.write_institute, so its peak RSS is its own.
+A run records wall time (model building and solving, not imports), peak RSS,
+nodes explored, solutions found, the best score, and how much of the institute
+the best solution placed. Engines are ENGINES entries: v1's greedy solver, or
+v2 TimetableSolver with timetable_constraints.json overrides, so a new v2
+engine or search option is one more entry (or an --engine NAME=JSON). Scores
+are each engine's own (v1: minus its conflict count; v2: TimetableSolver.score),
+and v1 places one block per subject where v2 places hours_per_week slots, so
+compare engines by `placed`/`required` and one engine across commits by score.
+Engines whose optional solver is not installed are reported as skipped.
+
+    python benchmarks/bench_scaling.py [--batches-per-semester 1 5 10 25 50 --time-limit 30]
+    python benchmarks/bench_scaling.py --compare scaling-1a2b3c4.json scaling-5d6e7f8.json
+"""
+
+import os, sys, csv, json, math, time, shutil, platform, argparse, tempfile, subprocess, importlib.util
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the package's modules import loader.py from its root
+sys.path.insert(0, BASE)
+V1_SOLVER = os.path.join(BASE, "..", "v1", "src", "scheduler", "timetable_solver.py")
+FILES = ["subjects.json", "classrooms.json", "faculty.json", "batches.json", "timetable_constraints.json"]
+
+# name -> (solver, timetable_constraints.json overrides for v2)
+ENGINES = {
+    "v1-greedy": ("v1", {}),
+    "v2-backtracking": ("v2", {}),
+    "v2-mrv-cbj": ("v2", {"domain_mode": "incremental", "ordering": "mrv", "backjumping": True}),
+    "v2-cpsat": ("v2", {"engine": "cpsat"}),
+    "v2-milp": ("v2", {"engine": "milp"}),
+}
+FIELDS = ["dataset", "engine", "batches", "rooms", "faculty", "status", "seconds", "peak_rss_mb", "nodes",
+          "solutions", "best_score", "placed", "required"]
+
+
+def import_file(path, name):
+    spec = importlib.util.spec_from_file_location(name, path if os.path.isabs(path) else os.path.join(BASE, path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def load_dir(path):
+    data = {}
+    for f in FILES:
+        with open(os.path.join(path, f)) as fp:
+            data[f] = json.load(fp)
+    return data
+
+
+def peak_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_v1(data, time_limit, max_solutions):
+    """v1's greedy TimetableSolver on v2 data: labs become type "lab" subjects of lab_block_size slots."""
+    solver_mod = import_file(V1_SOLVER, "v1_timetable_solver")
+    subjects = [dict(s, type="lab" if s.get("lab") else "theory",
+                     duration_slots=s.get("lab_block_size", 2) if s.get("lab") else s.get("duration_slots", 1))
+                for s in data["subjects.json"]]
+    solver = solver_mod.TimetableSolver(data["batches.json"], subjects, data["faculty.json"], data["classrooms.json"],
+                                        data["timetable_constraints.json"])
+    results = solver.solve(max_solutions=max_solutions)
+    return {"nodes": None, "solutions": len(results), "best_score": results[0]["score"] if results else None,
+            "placed": len(results[0]["assignment"]) if results else 0,
+            "required": sum(len(b.get("subjects", [])) for b in data["batches.json"])}
+
+
+def run_v2(data, time_limit, max_solutions, **overrides):
+    pipeline = import_file("pipeline.py", "timetable_pipeline")
+    data = dict(data, **{"timetable_constraints.json": dict(data["timetable_constraints.json"], time_limit=time_limit,
+                                                            max_solutions=max_solutions, **overrides)})
+    solver, sessions, _ = pipeline.build_solver(data)
+    results = solver.solve(sessions, max_solutions=max_solutions)
+    best = results[0] if results else None
+    placed = best["timetable"].metadata.get("placed", len(sessions)) if best and best.get("partial") else (len(sessions) if best else 0)
+    return {"nodes": solver.stats.get("nodes"), "solutions": sum(1 for r in results if not r.get("partial")),
+            "best_score": best["score"] if best else None, "placed": placed, "required": len(sessions)}
+
+
+def run_child(engine, data_dir, time_limit, max_solutions):
+    """One run in this process (the --run entry point): the FIELDS it measures."""
+    solver, overrides = engine
+    data = load_dir(data_dir)
+    t0 = time.perf_counter()
+    try:
+        if solver == "v1":
+            row = run_v1(data, time_limit, max_solutions)
+        else:
+            row = run_v2(data, time_limit, max_solutions, **overrides)
+        row["status"] = "ok"
+    except ImportError as e:
+        return {"status": f"skipped: {e}"}
+    row.update(seconds=round(time.perf_counter() - t0, 3), peak_rss_mb=peak_rss_mb())
+    return row
+
+
+def run_isolated(engine, data_dir, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--run", json.dumps(engine), data_dir,
+           "--time-limit", str(args.time_limit), "--max-solutions", str(args.max_solutions)]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=args.time_limit * 3 + 60)
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout"}
+    if out.returncode:
+        return {"status": "error: " + (out.stderr.strip().splitlines() or ["exit %d" % out.returncode])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def datasets(args):
+    """(name, data) of the --dirs folders, then one synthetic institute per --batches-per-semester."""
+    for d in args.dirs:
+        yield d, load_dir(os.path.join(BASE, d))
+    synthetic = import_file("benchmarks/synthetic.py", "synthetic")
+    for bps in args.batches_per_semester:
+        n_batches = bps * 4 * args.departments
+        data = synthetic.generate_institute(batches_per_semester=bps, n_departments=args.departments,
+                                            n_faculty=math.ceil(args.faculty_per_batch * n_batches),
+                                            lab_ratio=args.lab_ratio, room_scarcity=args.room_scarcity,
+                                            faculty_overlap=args.faculty_overlap, seed=args.seed)
+        yield f"synthetic {n_batches}b/{args.departments}d", data
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(stem, report):
+    with open(stem + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+    with open(stem + ".csv", "w", newline="") as f:
+        out = csv.DictWriter(f, ["commit"] + FIELDS, extrasaction="ignore")
+        out.writeheader()
+        for row in report["runs"]:
+            out.writerow(dict(row, commit=report["commit"]))
+    return stem + ".json", stem + ".csv"
+
+
+def compare(old_path, new_path):
+    """Print the runs of two JSON reports side by side, matched by (dataset, engine)."""
+    old, new = (json.load(open(p)) for p in (old_path, new_path))
+    before = {(r["dataset"], r["engine"]): r for r in old["runs"]}
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    print(f"{'dataset':<22} {'engine':<18} {'seconds':>17} {'peak MB':>15} {'best':>13} {'placed':>13}")
+    for r in new["runs"]:
+        o = before.get((r["dataset"], r["engine"]))
+        if o is None:
+            continue
+        pair = lambda k, w: f"{str(o.get(k, '-')):>{w}}>{str(r.get(k, '-')):<{w}}"
+        print(f"{r['dataset']:<22} {r['engine']:<18} {pair('seconds', 8)} {pair('peak_rss_mb', 7)} "
+              f"{pair('best_score', 6)} {pair('placed', 6)}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--run", nargs=2, metavar=("ENGINE_JSON", "DATA_DIR"), help=argparse.SUPPRESS)
+    ap.add_argument("--engines", nargs="*", default=list(ENGINES), help=f"ENGINES names ({', '.join(ENGINES)})")
+    ap.add_argument("--engine", action="append", default=[], metavar="NAME=JSON",
+                    help="extra v2 engine: a name and a JSON dict of timetable_constraints.json overrides (repeatable)")
+    ap.add_argument("--dirs", nargs="*", default=["Data"], help="dataset folders under the package root")
+    ap.add_argument("--batches-per-semester", type=int, nargs="*", default=[1, 5, 10, 25, 50])
+    ap.add_argument("--departments", type=int, default=1)
+    ap.add_argument("--lab-ratio", type=float, default=0.25)
+    ap.add_argument("--room-scarcity", type=float, default=0.5)
+    ap.add_argument("--faculty-overlap", type=int, default=3)
+    ap.add_argument("--faculty-per-batch", type=float, default=2.5)
+    ap.add_argument("--max-solutions", type=int, default=4)
+    ap.add_argument("--time-limit", type=float, default=30)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="report path without extension (default: scaling-<commit>)")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD_JSON", "NEW_JSON"), help="print two reports side by side and exit")
+    args = ap.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(run_child(json.loads(args.run[0]), args.run[1], args.time_limit, args.max_solutions)))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+    commit = git_commit()
+    stem = args.out or f"scaling-{commit or 'local'}"
+
+    engines = {name: ENGINES[name] for name in args.engines}
+    for spec in args.engine:
+        name, _, config = spec.partition("=")
+        engines[name] = ("v2", json.loads(config or "{}"))
+    report = {"commit": commit, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+              "platform": platform.platform(), "settings": {k: v for k, v in vars(args).items() if k not in ("run", "compare")},
+              "engines": {name: {"solver": s, "config": c} for name, (s, c) in engines.items()}, "runs": []}
+    print(f"{'dataset':<22} {'engine':<18} {'status':<8} {'seconds':>8} {'peak MB':>8} {'nodes':>9} {'solutions':>9}"
+          f" {'best':>6} {'placed':>13}")
+    for name, data in datasets(args):
+        data_dir = tempfile.mkdtemp()
+        try:
+            import_file("benchmarks/synthetic.py", "synthetic").write_institute(data_dir, data)
+            for engine, spec in engines.items():
+                row = dict(dataset=name, engine=engine, batches=len(data["batches.json"]), rooms=len(data["classrooms.json"]),
+                           faculty=len(data["faculty.json"]), **run_isolated(spec, data_dir, args))
+                report["runs"].append(row)
+                get = lambda k: "-" if row.get(k) is None else row[k]
+                print(f"{name:<22} {engine:<18} {row['status'][:8]:<8} {get('seconds'):>8} {get('peak_rss_mb'):>8}"
+                      f" {get('nodes'):>9} {get('solutions'):>9} {get('best_score'):>6}"
+                      f" {str(get('placed')) + '/' + str(get('required')):>13}")
+                sys.stdout.flush()
+        finally:
+            shutil.rmtree(data_dir)
+    for path in write_report(stem, report):
+        print("wrote", path)
+
+
+if __name__ == "__main__":
+    main()
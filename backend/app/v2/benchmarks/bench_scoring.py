@@ -0,0 +1,86 @@
+# timetable_scheduler/benchmarks/bench_scoring.py
+"""
+Benchmark pricing local-search moves with the full soft objective
+(SoftObjective.evaluate over every session) against ScoreState.delta.
+
+For each synthetic scale it solves once, draws feasible moves the way
+LocalSearch does, checks both paths agree on every move and reports the mean
+cost per move. Usage:
+
+    python benchmarks/bench_scoring.py [--scales 10x20x40 25x40x80 50x80x150 --moves 500]
+"""
+
+import os, sys, time, random, argparse, importlib.util
+
+spec = importlib.util.spec_from_file_location("bench_solve", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_solve.py"))
+bench_solve = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_solve)
+
+
+def sample_moves(opt, items, state, n, rng):
+    """`n` feasible moves as (changes, ScoreState moves), each applied to `items` and reverted again."""
+    options = [opt._options(it) for it in items]
+    by_batch = {}
+    for i, it in enumerate(items):
+        by_batch.setdefault(it['batch'], []).append(i)
+    moves = []
+    for _ in range(n * 50):
+        if len(moves) >= n:
+            break
+        changes = opt._random_move(items, options, by_batch, rng)
+        undo = opt._apply(items, state, changes) if changes else None
+        if undo is None:
+            continue
+        moves.append((changes, undo, opt._moves(items, undo, changes)))
+        opt._revert(items, state, undo)
+    return moves
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scales", nargs="*", default=["10x20x40", "25x40x80", "50x80x150"], help="batches x rooms x faculty")
+    ap.add_argument("--moves", type=int, default=500)
+    ap.add_argument("--time-limit", type=float, default=60)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    synthetic = bench_solve.import_file("benchmarks/synthetic.py", "synthetic")
+    ls_mod = bench_solve.import_file("scheduler/local_search.py", "local_search")
+
+    print(f"{'scale':<12} {'sessions':>8} {'moves':>6} {'full us/move':>12} {'delta us/move':>13} {'speedup':>8}")
+    for scale in args.scales:
+        nb, nr, nf = (int(x) for x in scale.split("x"))
+        data = synthetic.generate_institute(n_batches=nb, n_rooms=nr, n_faculty=nf, seed=args.seed)
+        solver, sessions = bench_solve.build_solver(data, args.time_limit, domain_mode="incremental", ordering="mrv")
+        results = solver.solve(sessions, max_solutions=1)
+        if not results:
+            print(f"{scale:<12} {len(sessions):>8}  no solution within the time limit")
+            continue
+        opt = ls_mod.LocalSearch(solver)
+        sc = solver.soft_module
+        items = sc.timetable_items(results[0]['timetable'])
+        state = solver.state_module.SolverState(solver.classrooms, solver.faculty, solver.batches, solver.working_days)
+        for it in items:
+            opt._place(it, state, sc.position(it))
+        moves = sample_moves(opt, items, state, args.moves, random.Random(args.seed))
+        score = sc.ScoreState(opt.objective, items)
+
+        t_full, t_delta = 0.0, 0.0
+        for changes, undo, smoves in moves:
+            opt._apply(items, state, changes)
+            t0 = time.perf_counter()
+            full = opt.objective.evaluate(items) - score.value
+            t_full += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            delta = score.delta(smoves)
+            t_delta += time.perf_counter() - t0
+            opt._revert(items, state, undo)
+            if full != delta:
+                print(f"WARNING: delta {delta} != full {full} for {changes}")
+        n = max(len(moves), 1)
+        print(f"{scale:<12} {len(sessions):>8} {len(moves):>6} {t_full / n * 1e6:>12.1f} {t_delta / n * 1e6:>13.1f}"
+              f" {t_full / t_delta if t_delta else float('inf'):>7.0f}x")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# timetable_scheduler/benchmarks/bench_solve.py
+"""
+Compare TimetableSolver configurations end to end on the bundled dataset and
+on synthetic institutes.
+
+Each configuration is a JSON object of extra TimetableSolver keyword arguments.
+Usage:
+
+    python benchmarks/bench_solve.py --max-solutions 20 --time-limit 30 \\
+        --config '{"domain_mode": "regenerate"}' --config '{"domain_mode": "incremental"}'
+"""
+
+import os, sys, json, time, argparse, importlib.util
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the package's modules import loader.py from its root
+sys.path.insert(0, BASE)
+FILES = ["subjects.json", "classrooms.json", "faculty.json", "batches.json", "timetable_constraints.json"]
+
+
+def import_file(relpath, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def load_dir(path):
+    data = {}
+    for f in FILES:
+        with open(os.path.join(path, f)) as fp:
+            data[f] = json.load(fp)
+    return data
+
+
+def build_solver(data, time_limit, **kwargs):
+    classroom = import_file("models/classroom.py", "classroom")
+    faculty = import_file("models/faculty.py", "faculty")
+    subject = import_file("models/subject.py", "subject")
+    batch = import_file("models/batch.py", "batch")
+    solver_mod = import_file("scheduler/timetable_solver.py", "timetable_solver_pkg")
+    gs = data["timetable_constraints.json"].get("general_settings", {})
+    slots = [str(i) for i in range(1, gs.get("slots_per_day", 6) + 1)]
+    batches = {b['id']: batch.Batch(**b) for b in data["batches.json"]}
+    solver = solver_mod.TimetableSolver(slots=slots, working_days=gs.get("working_days", ["Mon", "Tue", "Wed", "Thu", "Fri"]),
+                                        classrooms_map={r['id']: classroom.Classroom(**r) for r in data["classrooms.json"]},
+                                        faculty_map={f['id']: faculty.Faculty(**f) for f in data["faculty.json"]},
+                                        batches_map=batches,
+                                        subjects_map={s['id']: subject.Subject(**s) for s in data["subjects.json"]},
+                                        random_seed=data["timetable_constraints.json"].get("random_seed", 42),
+                                        time_limit=time_limit, **kwargs)
+    return solver, solver._generate_sessions(batches)
+
+
+def datasets(args):
+    for d in args.dirs:
+        yield d, load_dir(os.path.join(BASE, d))
+    synthetic = import_file("benchmarks/synthetic.py", "synthetic")
+    for scale in args.scales:
+        # batches x rooms x faculty, optionally x departments
+        nb, nr, nf, nd = ([int(x) for x in scale.split("x")] + [1])[:4]
+        yield f"synthetic {scale}", synthetic.generate_institute(n_batches=nb, n_rooms=nr, n_faculty=nf, seed=args.seed,
+                                                                 n_departments=nd)
+
+
+def main(argv=None, default_configs=None, default_dirs=None, default_scales=None, default_seed=0):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--config", action="append", default=None, help="JSON dict of TimetableSolver kwargs (repeatable)")
+    ap.add_argument("--dirs", nargs="*", default=default_dirs or ["Data"], help="dataset folders under the package root")
+    ap.add_argument("--scales", nargs="*", default=default_scales or ["10x20x40", "25x40x80"], help="batches x rooms x faculty[x departments]")
+    ap.add_argument("--max-solutions", type=int, default=8)
+    ap.add_argument("--time-limit", type=float, default=30)
+    ap.add_argument("--seed", type=int, default=default_seed)
+    args = ap.parse_args(argv)
+    default_configs = default_configs or [{"domain_mode": "regenerate"}, {"domain_mode": "incremental"}]
+    configs = [json.loads(c) for c in args.config] if args.config else default_configs
+
+    print(f"{'dataset':<22} {'config':<56} {'sessions':>8} {'solutions':>9} {'best':>6} {'seconds':>8} {'nodes':>9} {'backjumps':>9}")
+    for name, data in datasets(args):
+        for cfg in configs:
+            solver, sessions = build_solver(data, args.time_limit, **cfg)
+            t0 = time.perf_counter()
+            results = solver.solve(sessions, max_solutions=args.max_solutions)
+            dt = time.perf_counter() - t0
+            best = results[0]['score'] if results else "-"
+            stats = getattr(solver, 'stats', {})
+            print(f"{name:<22} {json.dumps(cfg):<56} {len(sessions):>8} {len(results):>9} {best:>6} {dt:>8.2f}"
+                  f" {stats.get('nodes', '-'):>9} {stats.get('backjumps', '-'):>9}")
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# timetable_scheduler/benchmarks/bench_state.py
+"""
+Benchmark per-attempt setup: deep copies of every model (the old
+_solve_single_attempt prologue) against SolverState.reset().
+
+For each synthetic scale it reports the mean setup time per attempt and the
+tracemalloc peak of one setup, then the peak of a short solve() with the
+arena. Usage:
+
+    python benchmarks/bench_state.py [--scales 25x40x80 50x80x150 100x160x300 --reps 50 --config '{}']
+"""
+
+import os, sys, copy, json, time, argparse, tracemalloc, importlib.util
+
+spec = importlib.util.spec_from_file_location("bench_solve", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_solve.py"))
+bench_solve = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_solve)
+
+
+def legacy_setup(solver):
+    rooms = {rid: copy.deepcopy(r) for rid, r in solver.classrooms.items()}
+    facs = {fid: copy.deepcopy(f) for fid, f in solver.faculty.items()}
+    batches = {bid: copy.deepcopy(b) for bid, b in solver.batches.items()}
+    return rooms, facs, batches
+
+
+def timed(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps
+
+
+def peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scales", nargs="*", default=["25x40x80", "50x80x150", "100x160x300"], help="batches x rooms x faculty")
+    ap.add_argument("--reps", type=int, default=50)
+    ap.add_argument("--max-solutions", type=int, default=2)
+    ap.add_argument("--time-limit", type=float, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--config", default="{}", help="JSON dict of TimetableSolver kwargs for the solve column")
+    args = ap.parse_args(argv)
+    synthetic = bench_solve.import_file("benchmarks/synthetic.py", "synthetic")
+
+    print(f"{'scale':<12} {'resources':>9} {'deepcopy ms':>11} {'reset ms':>9} {'speedup':>8}"
+          f" {'deepcopy KiB':>12} {'reset KiB':>9} {'solve peak KiB':>14}")
+    for scale in args.scales:
+        nb, nr, nf = (int(x) for x in scale.split("x"))
+        data = synthetic.generate_institute(n_batches=nb, n_rooms=nr, n_faculty=nf, seed=args.seed)
+        solver, sessions = bench_solve.build_solver(data, args.time_limit, **json.loads(args.config))
+        state = solver._solver_state()
+        t_old = timed(lambda: legacy_setup(solver), args.reps)
+        t_new = timed(state.reset, args.reps)
+        m_old = peak(lambda: legacy_setup(solver))
+        m_new = peak(state.reset)
+        m_solve = peak(lambda: solver.solve(sessions, max_solutions=args.max_solutions))
+        n = len(solver.classrooms) + len(solver.faculty) + len(solver.batches)
+        print(f"{scale:<12} {n:>9} {t_old * 1000:>11.3f} {t_new * 1000:>9.4f} {t_old / t_new if t_new else float('inf'):>7.0f}x"
+              f" {m_old / 1024:>12.1f} {m_new / 1024:>9.1f} {m_solve / 1024:>14.1f}")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
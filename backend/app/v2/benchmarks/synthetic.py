@@ -0,0 +1,165 @@
+# timetable_scheduler/benchmarks/synthetic.py
+"""
+Seeded synthetic institute generator.
+
+Produces the same five payloads `main.py` reads from data/ (subjects, classrooms,
+faculty, batches, timetable_constraints) so benchmarks can scale the demo
+dataset up without hand-written fixtures.
+
+With n_departments > 1 the batches, rooms and faculty are split into
+departments with their own subjects, and each batch, room and faculty carries
+its `department`, so departments share nothing (what
+TimetableSolver(decompose=True) exploits). Ids then carry the department
+letter (batch "AB001", subject "AS101", ...).
+
+The institute can also be sized by shape instead of by counts:
+batches_per_semester fixes the batches of every semester of every department,
+room_scarcity sizes each department's lecture rooms and labs so that its
+weekly sessions fill that fraction of their slots (1.0 leaves no free room
+slot), and faculty_overlap is the number of subjects each faculty member can
+teach, so more overlap means more teachers to choose from per subject.
+write_institute() saves a generated institute as a data folder:
+
+    python benchmarks/synthetic.py OUT_DIR [--batches-per-semester 10 --departments 2 --room-scarcity 0.6]
+"""
+
+import os, json, math, random, argparse
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+def _split(n, parts):
+    """n items dealt over `parts` departments: their counts, the first ones taking the remainder."""
+    return [n // parts + (1 if d < n % parts else 0) for d in range(parts)]
+
+
+def generate_institute(n_batches=50, n_rooms=80, n_faculty=150, subjects_per_batch=5, lab_ratio=0.25,
+                       slots_per_day=6, working_days=None, seed=0, n_departments=1, batches_per_semester=None,
+                       room_scarcity=None, faculty_overlap=3):
+    """
+    The five data files as {filename: payload}. batches_per_semester (per department)
+    overrides n_batches and room_scarcity (0..1] overrides n_rooms; see the module docstring.
+    """
+    rng = random.Random(seed)
+    days = list(working_days or DAYS)
+    slots = [str(i) for i in range(1, slots_per_day + 1)]
+    n_departments = max(1, int(n_departments))
+    prefixes = [chr(ord("A") + d) if n_departments > 1 else "" for d in range(n_departments)]
+    semesters = [1, 3, 5, 7]
+    if batches_per_semester is not None:
+        n_batches = int(batches_per_semester) * len(semesters) * n_departments
+    if room_scarcity is not None and not 0 < room_scarcity <= 1:
+        raise ValueError("room_scarcity must be in (0, 1]")
+
+    # subjects: one pool per semester and department, shared by every batch of that semester
+    subjects = []
+    sem_subjects = {}
+    for dept in prefixes:
+        for sem in semesters:
+            ids = []
+            for k in range(subjects_per_batch):
+                sid = f"{dept}S{sem}{k + 1:02d}"
+                is_lab = rng.random() < lab_ratio
+                subj = {"id": sid, "name": f"Subject {sid}", "lab": is_lab, "hours_per_week": 2 if is_lab else 3, "semester": sem}
+                if is_lab:
+                    subj["lab_block_size"] = 2
+                else:
+                    subj["duration_slots"] = 1
+                subjects.append(subj)
+                ids.append(sid)
+            sem_subjects[dept, sem] = ids
+
+    batches = []
+    for dept, count in zip(prefixes, _split(n_batches, n_departments)):
+        for i in range(count):
+            sem = semesters[i % len(semesters)]
+            batches.append({"id": f"{dept}B{i + 1:03d}", "name": f"Batch {dept}{i + 1}", "semester": sem,
+                            "strength": rng.randint(30, 60), "subjects": list(sem_subjects[dept, sem]),
+                            "available_days": list(days), "available_slots": list(slots)})
+            if dept:
+                batches[-1]["department"] = dept
+
+    classrooms = []
+    subject_by_id = {s["id"]: s for s in subjects}
+    for dept, count in zip(prefixes, _split(n_rooms, n_departments)):
+        n_labs = max(1, int(round(count * lab_ratio)))
+        if room_scarcity is not None:
+            # weekly slots the department's batches need in each room type, over what one room offers
+            need = {True: 0, False: 0}
+            for b in batches:
+                if b["id"].startswith(f"{dept}B"):
+                    for sid in b["subjects"]:
+                        need[subject_by_id[sid]["lab"]] += subject_by_id[sid]["hours_per_week"]
+            per_room = len(days) * slots_per_day * room_scarcity
+            n_labs = max(1, math.ceil(need[True] / per_room))
+            count = n_labs + max(1, math.ceil(need[False] / per_room))
+        for i in range(count):
+            is_lab = i < n_labs
+            rid = f"{dept}L{i + 1:03d}" if is_lab else f"{dept}R{i + 1:03d}"
+            room = {"id": rid, "name": f"Room {rid}", "type": "lab" if is_lab else "lecture",
+                    "capacity": rng.choice([60, 70, 80, 100, 120]),
+                    "available_days": list(days), "available_slots": list(slots)}
+            if dept:
+                room["department"] = dept
+            classrooms.append(room)
+
+    faculty = []
+    for dept, count in zip(prefixes, _split(n_faculty, n_departments)):
+        dept_subject_ids = [s["id"] for s in subjects if s["id"].startswith(f"{dept}S")]
+        for i in range(count):
+            taught = rng.sample(dept_subject_ids, k=min(faculty_overlap, len(dept_subject_ids)))
+            faculty.append({"id": f"{dept}F{i + 1:03d}", "name": f"Faculty {dept}{i + 1}", "subjects": taught,
+                            "max_hours_per_week": 18, "max_lab_hours": 8, "max_lecture_hours": 14,
+                            "preferred_days": list(days), "preferred_slots": list(slots)})
+            if dept:
+                faculty[-1]["department"] = dept
+        # every subject needs a teacher: untaught ones go round-robin to the department's faculty
+        taught_ids = {sid for f in faculty[len(faculty) - count:] for sid in f["subjects"]}
+        for k, sid in enumerate(sid for sid in dept_subject_ids if sid not in taught_ids):
+            if count:
+                faculty[len(faculty) - count + k % count]["subjects"].append(sid)
+
+    constraints = {"general_settings": {"slots_per_day": slots_per_day, "working_days": days},
+                   "random_seed": seed, "time_limit": 60, "max_solutions": 4, "top_k": 4}
+
+    return {"subjects.json": subjects, "classrooms.json": classrooms, "faculty.json": faculty,
+            "batches.json": batches, "timetable_constraints.json": constraints}
+
+
+def write_institute(out_dir, data):
+    """Write generate_institute() output to `out_dir` as the five files main.py reads; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, payload in data.items():
+        paths.append(os.path.join(out_dir, name))
+        with open(paths[-1], "w") as f:
+            json.dump(payload, f, indent=2)
+    return paths
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write a seeded synthetic institute as a data folder.")
+    ap.add_argument("out_dir")
+    ap.add_argument("--batches-per-semester", type=int, default=None)
+    ap.add_argument("--batches", type=int, default=50, help="total batches, without --batches-per-semester")
+    ap.add_argument("--rooms", type=int, default=80, help="total rooms, without --room-scarcity")
+    ap.add_argument("--faculty", type=int, default=150)
+    ap.add_argument("--departments", type=int, default=1)
+    ap.add_argument("--subjects-per-batch", type=int, default=5)
+    ap.add_argument("--lab-ratio", type=float, default=0.25)
+    ap.add_argument("--room-scarcity", type=float, default=None)
+    ap.add_argument("--faculty-overlap", type=int, default=3)
+    ap.add_argument("--slots-per-day", type=int, default=6)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    data = generate_institute(n_batches=args.batches, n_rooms=args.rooms, n_faculty=args.faculty,
+                              subjects_per_batch=args.subjects_per_batch, lab_ratio=args.lab_ratio,
+                              slots_per_day=args.slots_per_day, seed=args.seed, n_departments=args.departments,
+                              batches_per_semester=args.batches_per_semester, room_scarcity=args.room_scarcity,
+                              faculty_overlap=args.faculty_overlap)
+    for path in write_institute(args.out_dir, data):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
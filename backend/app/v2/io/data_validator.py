@@ -1,3 +1,45 @@
+"""
+Input data validation.
+
+DataValidator indexes every dataset by id once and then checks each entity in
+one pass over its own dataset, with dict lookups into the others. Every
+problem is collected instead of raising on the first one, as an issue:
+
+    {"code", "severity": "error" | "warning", "entity": dataset, "id": record id,
+     "field", "ref": the id it points at (or None), "message"}
+
+report() returns {"errors": [...], "warnings": [...], "summary": {...}}.
+update(dataset, records) re-indexes one changed dataset and re-runs only the
+passes that read it (PASSES). The validate_* rule methods of the old validator
+still raise on their rule's first error, for callers that want an exception.
+"""
+
+import os
+import json
+import time
+
+DATASETS = ("batches", "subjects", "faculty", "classrooms")
+# pass (the dataset it walks) -> datasets its checks read
+PASSES = {"subjects": ("subjects", "faculty", "batches"),
+          "faculty": ("faculty", "subjects"),
+          "classrooms": ("classrooms",),
+          "batches": ("batches", "subjects", "classrooms")}
+# fields every record of a dataset must have
+REQUIRED = {"batches": ("semester", "strength", "subjects"), "subjects": ("hours_per_week",),
+            "faculty": (), "classrooms": ("type", "capacity")}
+LABELS = {"batches": "Batch", "subjects": "Subject", "faculty": "Faculty", "classrooms": "Classroom"}
+
+
+def issue(code, entity, rid, message, field=None, ref=None, severity="error"):
+    return {"code": code, "severity": severity, "entity": entity, "id": rid, "field": field, "ref": ref,
+            "message": message}
+
+
+def subject_type(subj):
+    # v1 subjects carry type "lab"/"theory", v2 ones a `lab` flag
+    return subj.get('type') or ('lab' if subj.get('lab') else 'theory')
+
+
 class DataValidator:
     def __init__(self, batches, subjects, faculty, classrooms, constraints):
         self.batches = batches
@@ -5,74 +47,246 @@ class DataValidator:
         self.faculty = faculty
         self.classrooms = classrooms
         self.constraints = constraints
+        # dataset -> {"by_id": {id: record}, "duplicates": [ids], ...lookups of that dataset}
+        self.index = {}
+        # pass -> its issues
+        self._issues = {}
+        for name in DATASETS:
+            self.index[name] = self._build_index(name, getattr(self, name))
+        for name in PASSES:
+            self._issues[name] = self._run_pass(name)
+
+    # ----------------------------
+    # Indexes (one per dataset)
+    # ----------------------------
+    def _build_index(self, name, records):
+        by_id, duplicates, missing = {}, [], 0
+        for r in records:
+            rid = r.get('id') if isinstance(r, dict) else None
+            if rid is None:
+                missing += 1
+            elif rid in by_id:
+                duplicates.append(rid)
+            else:
+                by_id[rid] = r
+        index = {"by_id": by_id, "duplicates": duplicates, "missing_id": missing}
+        if name == "faculty":
+            # subject -> faculty teaching it
+            teaches = {}
+            for f in by_id.values():
+                for subj in f.get('subjects') or []:
+                    teaches[subj] = teaches.get(subj, 0) + 1
+            index["teaches"] = teaches
+        elif name == "batches":
+            # subject -> batches taking it
+            takes = {}
+            for b in by_id.values():
+                for subj in b.get('subjects') or []:
+                    takes[subj] = takes.get(subj, 0) + 1
+            index["takes"] = takes
+        elif name == "classrooms":
+            # room type -> largest capacity
+            largest = {}
+            for r in by_id.values():
+                cap = r.get('capacity')
+                if isinstance(cap, (int, float)) and cap > largest.get(r.get('type'), float("-inf")):
+                    largest[r.get('type')] = cap
+            index["largest"] = largest
+        return index
+
+    # ----------------------------
+    # Passes (one per dataset)
+    # ----------------------------
+    def _run_pass(self, name):
+        entity = self.index[name]
+        out = [issue("missing_id", name, None, f"{entity['missing_id']} {name} record(s) without an id", field="id")
+               ] if entity["missing_id"] else []
+        out += [issue("duplicate_id", name, rid, f"Duplicate {name} id {rid}", field="id") for rid in entity["duplicates"]]
+        check = getattr(self, "_check_" + name)
+        required = REQUIRED[name]
+        for rid, rec in entity["by_id"].items():
+            for k in required:
+                if rec.get(k) is None:
+                    out.append(issue("missing_field", name, rid, f"{LABELS[name]} {rid} has no {k}", field=k))
+            check(rid, rec, out)
+        return out
+
+    def _check_batches(self, bid, batch, out):
+        subjects = self.index["subjects"]["by_id"]
+        largest = self.index["classrooms"]["largest"]
+        strength = batch.get('strength')
+        # room type -> the subject its capacity error was reported on (once per batch)
+        flagged = {}
+        for subj_id in batch.get('subjects') or []:
+            subj = subjects.get(subj_id)
+            if subj is None:
+                out.append(issue("unknown_subject", "batches", bid, f"Batch {bid} references unknown subject {subj_id}",
+                                 field="subjects", ref=subj_id))
+                continue
+            kind = subject_type(subj)
+            if strength is None or kind in flagged:
+                continue
+            if kind == 'lab':
+                if 'lab' not in largest:
+                    flagged[kind] = subj_id
+                    out.append(issue("no_rooms", "batches", bid, f"No lab rooms for lab subject {subj_id} of batch {bid}",
+                                     field="subjects", ref=subj_id))
+                elif strength > largest['lab']:
+                    # Labs may have sub-batches: a sub-batch has to fit, a whole batch can still be split
+                    if 'parent_batch' in batch:
+                        flagged[kind] = subj_id
+                        out.append(issue("lab_capacity", "batches", bid, f"Lab batch {bid} exceeds available lab capacity",
+                                         field="strength", ref=subj_id))
+                    else:
+                        out.append(issue("lab_capacity_split", "batches", bid,
+                                         f"No lab room with capacity >= {strength} for batch {bid} subject {subj_id}",
+                                         field="strength", ref=subj_id, severity="warning"))
+            elif kind == 'theory':
+                if 'lecture' not in largest or strength > largest['lecture']:
+                    flagged[kind] = subj_id
+                if 'lecture' not in largest:
+                    out.append(issue("no_rooms", "batches", bid, f"No lecture rooms for subject {subj_id} of batch {bid}",
+                                     field="subjects", ref=subj_id))
+                elif strength > largest['lecture']:
+                    out.append(issue("lecture_capacity", "batches", bid,
+                                     f"Lecture batch {bid} exceeds available classroom capacity", field="strength",
+                                     ref=subj_id))
+        if 'parent_batch' in batch:
+            parent = self.index["batches"]["by_id"].get(batch['parent_batch'])
+            if parent is None:
+                out.append(issue("invalid_parent", "batches", bid,
+                                 f"Lab batch {bid} has invalid parent batch {batch['parent_batch']}",
+                                 field="parent_batch", ref=batch['parent_batch']))
+            elif batch.get('semester') != parent.get('semester'):
+                out.append(issue("parent_semester_mismatch", "batches", bid,
+                                 f"Lab batch {bid} semester mismatch with parent batch {parent['id']}",
+                                 field="semester", ref=parent['id']))
+
+    def _check_faculty(self, fid, fac, out):
+        subjects = self.index["subjects"]["by_id"]
+        if not fac.get('subjects'):
+            out.append(issue("no_subjects", "faculty", fid, f"Faculty {fid} teaches no subject", field="subjects",
+                             severity="warning"))
+        for subj_id in fac.get('subjects') or []:
+            if subj_id not in subjects:
+                out.append(issue("unknown_subject", "faculty", fid, f"Faculty {fid} references unknown subject {subj_id}",
+                                 field="subjects", ref=subj_id))
+
+    def _check_subjects(self, sid, subj, out):
+        hours = subj.get('hours_per_week')
+        if hours is not None and hours <= 0:
+            out.append(issue("invalid_hours", "subjects", sid, f"Subject {sid} has invalid hours per week: {hours}",
+                             field="hours_per_week"))
+        taken = self.index["batches"]["takes"].get(sid, 0)
+        if taken and not self.index["faculty"]["teaches"].get(sid):
+            out.append(issue("untaught_subject", "subjects", sid,
+                             f"Subject {sid} is taken by {taken} batch(es) but no faculty teaches it", field="id",
+                             severity="warning"))
+
+    def _check_classrooms(self, rid, room, out):
+        cap = room.get('capacity')
+        if cap is not None and (not isinstance(cap, (int, float)) or cap <= 0):
+            out.append(issue("invalid_capacity", "classrooms", rid, f"Classroom {rid} has invalid capacity: {cap}",
+                             field="capacity"))
+        if room.get('type') not in (None, 'lab', 'lecture'):
+            out.append(issue("unknown_room_type", "classrooms", rid, f"Classroom {rid} has unknown type {room['type']!r}",
+                             field="type", severity="warning"))
+
+    # ----------------------------
+    # Report and incremental updates
+    # ----------------------------
+    def issues(self):
+        return [i for name in PASSES for i in self._issues[name]]
+
+    def report(self):
+        found = self.issues()
+        errors = [i for i in found if i["severity"] == "error"]
+        warnings = [i for i in found if i["severity"] == "warning"]
+        return {"errors": errors, "warnings": warnings,
+                "summary": {"errors": len(errors), "warnings": len(warnings),
+                            "entities": {name: len(getattr(self, name)) for name in DATASETS}}}
+
+    def update(self, dataset, records):
+        """
+        Replace one dataset ("batches", "subjects", "faculty", "classrooms"; a ".json"
+        suffix is accepted) and re-run the passes that read it. Indexes and issue
+        lists are replaced, not edited, so a copy.copy() of this validator can be
+        updated without touching the original. Returns report().
+        """
+        dataset = dataset[:-len(".json")] if dataset.endswith(".json") else dataset
+        if dataset not in DATASETS:
+            raise ValueError(f"unknown dataset {dataset!r}; expected one of {DATASETS}")
+        setattr(self, dataset, records)
+        self.index = dict(self.index, **{dataset: self._build_index(dataset, records)})
+        self._issues = dict(self._issues, **{name: self._run_pass(name) for name, reads in PASSES.items()
+                                             if dataset in reads})
+        return self.report()
 
     # ----------------------------
     # Validate all advanced rules
     # ----------------------------
     def validate_all(self):
-        self.validate_batch_subjects()
-        self.validate_faculty_subjects()
-        self.validate_classroom_capacity()
-        self.validate_lab_batches()
-        self.validate_subject_hours()
+        errors = self.report()["errors"]
+        if errors:
+            raise Exception(errors[0]["message"])
         print("Advanced data validation passed successfully.")
 
+    def _raise_first(self, entity, codes):
+        for i in self._issues[entity]:
+            if i["severity"] == "error" and i["code"] in codes:
+                raise Exception(i["message"])
+
     # ----------------------------
     # Check batch subjects exist
     # ----------------------------
     def validate_batch_subjects(self):
-        subject_ids = {s['id'] for s in self.subjects}
-        for batch in self.batches:
-            for subj in batch['subjects']:
-                if subj not in subject_ids:
-                    raise Exception(f"Batch {batch['id']} references unknown subject {subj}")
+        self._raise_first("batches", ("unknown_subject",))
 
     # ----------------------------
     # Check faculty subjects exist
     # ----------------------------
     def validate_faculty_subjects(self):
-        subject_ids = {s['id'] for s in self.subjects}
-        for fac in self.faculty:
-            for subj in fac.get('subjects', []):
-                if subj not in subject_ids:
-                    raise Exception(f"Faculty {fac['id']} references unknown subject {subj}")
+        self._raise_first("faculty", ("unknown_subject",))
 
     # ----------------------------
     # Check classroom/lab capacities
     # ----------------------------
     def validate_classroom_capacity(self):
-        # Map classroom by id
-        room_dict = {r['id']: r for r in self.classrooms}
-        for batch in self.batches:
-            for subj_id in batch['subjects']:
-                subj = next((s for s in self.subjects if s['id'] == subj_id), None)
-                if not subj:
-                    continue
-                if subj['type'] == 'lab':
-                    # Labs may have sub-batches
-                    if 'parent_batch' in batch:
-                        if batch['strength'] > max([r['capacity'] for r in self.classrooms if r['type'] == 'lab']):
-                            raise Exception(f"Lab batch {batch['id']} exceeds available lab capacity")
-                elif subj['type'] == 'theory':
-                    if batch['strength'] > max([r['capacity'] for r in self.classrooms if r['type'] == 'lecture']):
-                        raise Exception(f"Lecture batch {batch['id']} exceeds available classroom capacity")
+        self._raise_first("batches", ("lab_capacity", "lecture_capacity", "no_rooms"))
 
     # ----------------------------
     # Check lab sub-batches properly split
     # ----------------------------
     def validate_lab_batches(self):
-        for batch in self.batches:
-            if 'parent_batch' in batch:
-                parent = next((b for b in self.batches if b['id'] == batch['parent_batch']), None)
-                if not parent:
-                    raise Exception(f"Lab batch {batch['id']} has invalid parent batch {batch['parent_batch']}")
-                if batch['semester'] != parent['semester']:
-                    raise Exception(f"Lab batch {batch['id']} semester mismatch with parent batch {parent['id']}")
+        self._raise_first("batches", ("invalid_parent", "parent_semester_mismatch"))
 
     # ----------------------------
     # Check subject hours consistency
     # ----------------------------
     def validate_subject_hours(self):
-        for subj in self.subjects:
-            if subj['hours_per_week'] <= 0:
-                raise Exception(f"Subject {subj['id']} has invalid hours per week: {subj['hours_per_week']}")
+        self._raise_first("subjects", ("invalid_hours", "missing_field"))
+
+
+def _default_data_dir():
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for name in ("data", "Data"):
+        if os.path.isdir(os.path.join(base, name)):
+            return os.path.join(base, name)
+    return os.path.join(base, "data")
+
+
+def run_validator(data_dir=None):
+    """Validate the JSON datasets of `data_dir` (default ./data or ./Data) and return the report."""
+    data_dir = data_dir or _default_data_dir()
+    data = {}
+    for name in DATASETS + ("timetable_constraints",):
+        path = os.path.join(data_dir, name + ".json")
+        if os.path.exists(path):
+            with open(path) as f:
+                data[name] = json.load(f)
+    t0 = time.perf_counter()
+    validator = DataValidator(data.get("batches", []), data.get("subjects", []), data.get("faculty", []),
+                              data.get("classrooms", []), data.get("timetable_constraints", {}))
+    report = validator.report()
+    report["summary"]["seconds"] = round(time.perf_counter() - t0, 6)
+    return report
@@ -0,0 +1,81 @@
+import loader
+
+output_writer = loader.load("io/output_writer.py", "output_writer")
+
+# (view, sheet title, what a cell of that view shows of a placement)
+VIEWS = [
+    ("batch", "Batches", lambda sem, batch, subject, fac, room, lab: f"{subject}{' lab' if lab else ''} @{room} ({fac})"),
+    ("faculty", "Faculty", lambda sem, batch, subject, fac, room, lab: f"{subject}{' lab' if lab else ''} {batch} @{room}"),
+    ("room", "Rooms", lambda sem, batch, subject, fac, room, lab: f"{subject}{' lab' if lab else ''} {batch} ({fac})"),
+    ("semester", "Semesters", lambda sem, batch, subject, fac, room, lab: f"{batch}@{room}:{subject}"),
+]
+
+
+def _natural(value):
+    s = str(value)
+    return (0, int(s), s) if s.isdigit() else (1, 0, s)
+
+
+def grid_shape(schedule):
+    """(days, slots) of a nested schedule, days in schedule order and slots in numeric order."""
+    days, slots = [], set()
+    for cells_by_day in schedule.values():
+        for day, cells in cells_by_day.items():
+            if day not in days:
+                days.append(day)
+            slots.update(str(s) for s in cells)
+    return days, sorted(slots, key=_natural)
+
+
+def build_views(schedule, days, slots):
+    """
+    {view: {id: grid}} of one schedule for every VIEWS entry, from a single pass over its
+    placements (output_writer.schedule_rows). A grid is a preallocated [day][slot] table
+    of cell texts (None when free); a placement fills every slot it covers.
+    """
+    day_at = {d: i for i, d in enumerate(days)}
+    slot_at = {s: i for i, s in enumerate(slots)}
+    views = {view: {} for view, _, _ in VIEWS}
+    for _, sem, day, start, dur, batch, subject, fac, room, _, lab in output_writer.schedule_rows(schedule):
+        di, si = day_at[day], slot_at[start]
+        for (view, _, text), key in zip(VIEWS, (batch, fac, room, sem)):
+            grid = views[view].get(key)
+            if grid is None:
+                grid = views[view][key] = [[None] * len(slots) for _ in days]
+            value = text(sem, batch, subject, fac, room, lab)
+            row = grid[di]
+            for s in range(si, min(si + dur, len(slots))):
+                row[s] = value if row[s] is None else row[s] + "; " + value
+    return views
+
+
+def write_workbook(path, solutions):
+    """
+    One .xlsx of ranked solutions (timetable_top_N.json documents): a "Summary"
+    sheet, then per solution one sheet per view ("1 Batches", "1 Faculty", "1 Rooms",
+    "1 Semesters", "2 Batches", ...) with a row per (id, day) and a column per slot.
+    Written with openpyxl's write-only workbook, which streams rows to disk, so
+    memory stays at one solution's views. Returns `path`.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("Excel export needs openpyxl: pip install openpyxl")
+    wb = Workbook(write_only=True)
+    summary = wb.create_sheet("Summary")
+    summary.append(["Solution", "Score", "Score (1-100)", "Soft score", "Signature", "Placed", "Total"])
+    for rank, sol in enumerate(solutions, 1):
+        meta = sol.get("metadata") or {}
+        summary.append([rank, sol.get("score"), sol.get("score_norm"), sol.get("soft_score"), sol.get("signature"),
+                        meta.get("placed"), meta.get("total")])
+    for rank, sol in enumerate(solutions, 1):
+        days, slots = grid_shape(sol["schedule"])
+        views = build_views(sol["schedule"], days, slots)
+        for view, title, _ in VIEWS:
+            ws = wb.create_sheet(f"{rank} {title}")
+            ws.append([view.capitalize(), "Day"] + [f"Slot {s}" for s in slots])
+            for key in sorted(views[view], key=_natural):
+                for day, row in zip(days, views[view][key]):
+                    ws.append([key, day] + row)
+    wb.save(path)
+    return path
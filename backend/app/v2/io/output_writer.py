@@ -1,6 +1,164 @@
+import csv
 import json
 import os
 
+# one row per session placement (not per slot it covers); `solution` is the rank
+ROW_FIELDS = ["solution", "semester", "day", "start", "duration", "batch", "subject", "faculty", "room", "batch_size", "is_lab"]
+# fields compact mode replaces by their index in a dictionary table
+INTERNED = ["semester", "day", "batch", "subject", "faculty", "room"]
+_INTERNED_AT = [ROW_FIELDS.index(f) for f in INTERNED]
+
+
+def _slot_key(slot):
+    return int(slot) if str(slot).isdigit() else slot
+
+
+def schedule_rows(schedule, solution=1):
+    """
+    Flat rows (tuples in ROW_FIELDS order) of a nested semester -> day -> slot -> [assignment]
+    schedule, yielded as they are found. An assignment repeated over the consecutive
+    slots of its duration is one row, with the first slot as `start`.
+    """
+    for sem, days in schedule.items():
+        for day, cells in days.items():
+            open_runs = []   # [assignment, slots still to see]
+            for slot in sorted(cells, key=_slot_key):
+                assigns = list(cells[slot])
+                still_open = []
+                for run in open_runs:
+                    if run[0] in assigns:
+                        assigns.remove(run[0])
+                        run[1] -= 1
+                        if run[1] > 0:
+                            still_open.append(run)
+                for a in assigns:
+                    duration = int(a.get("duration", 1))
+                    yield (solution, sem, day, str(slot), duration, a.get("batch"), a.get("subject"), a.get("faculty"),
+                           a.get("room"), a.get("batch_size"), bool(a.get("is_lab")))
+                    if duration > 1:
+                        still_open.append([a, duration - 1])
+                open_runs = still_open
+
+
+class RowWriter:
+    """
+    Streams flat rows (ROW_FIELDS tuples) to a file. Rows are written as they come, so
+    nothing but the current chunk is held in memory. With compact=True the INTERNED
+    fields are written as integer codes and their values go, at close(), to a
+    dictionary table `<path>.dict.json` ({field: [value of code 0, value of code 1, ...]}).
+    """
+    def __init__(self, path, compact=False):
+        self.path = path
+        self.compact = compact
+        self.tables = {f: {} for f in INTERNED}
+        self._codes = [(i, self.tables[f]) for i, f in zip(_INTERNED_AT, INTERNED)]
+        self.rows = 0
+
+    def _encode(self, row):
+        if not self.compact:
+            return row
+        row = list(row)
+        for i, codes in self._codes:
+            row[i] = codes.setdefault(row[i], len(codes))
+        return row
+
+    def write(self, row):
+        self._write(self._encode(row))
+        self.rows += 1
+
+    def write_rows(self, rows):
+        write, encode = self._write, self._encode
+        for row in rows:
+            write(encode(row))
+            self.rows += 1
+        return self
+
+    def close(self):
+        self._close()
+        if self.compact:
+            with open(self.path + ".dict.json", "w") as f:
+                json.dump({field: list(codes) for field, codes in self.tables.items()}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlRowWriter(RowWriter):
+    """One JSON object per line; compact rows are arrays in ROW_FIELDS order after a {"fields": ...} header."""
+    def __init__(self, path, compact=False):
+        super().__init__(path, compact)
+        self.f = open(path, "w")
+        self.encode = json.JSONEncoder(separators=(",", ":")).encode
+        if compact:
+            self.f.write(json.dumps({"fields": ROW_FIELDS}) + "\n")
+
+    def _write(self, row):
+        value = row if self.compact else dict(zip(ROW_FIELDS, row))
+        self.f.write(self.encode(value) + "\n")
+
+    def _close(self):
+        self.f.close()
+
+
+class CsvRowWriter(RowWriter):
+    """CSV with a ROW_FIELDS header; the columnar format when pyarrow is not installed."""
+    def __init__(self, path, compact=False):
+        super().__init__(path, compact)
+        self.f = open(path, "w", newline="")
+        self.out = csv.writer(self.f)
+        self.out.writerow(ROW_FIELDS)
+
+    def _write(self, row):
+        self.out.writerow(row)
+
+    def _close(self):
+        self.f.close()
+
+
+class ParquetRowWriter(RowWriter):
+    """Parquet through pyarrow, one row group per `chunk_rows` rows."""
+    def __init__(self, path, compact=False, chunk_rows=65536):
+        import pyarrow
+        import pyarrow.parquet
+        super().__init__(path, compact)
+        self.pa = pyarrow
+        code = pyarrow.int32() if compact else pyarrow.string()
+        types = {"solution": pyarrow.int32(), "start": pyarrow.string(), "duration": pyarrow.int32(),
+                 "batch_size": pyarrow.int32(), "is_lab": pyarrow.bool_()}
+        self.schema = pyarrow.schema([(k, types.get(k, code)) for k in ROW_FIELDS])
+        self.out = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.chunk_rows = chunk_rows
+        self.chunk = []
+
+    def _flush(self):
+        if self.chunk:
+            columns = [list(c) for c in zip(*self.chunk)]
+            if not self.compact:
+                columns[1] = [str(v) for v in columns[1]]   # semester ids may be int or str
+            self.out.write_table(self.pa.table(dict(zip(ROW_FIELDS, columns)), schema=self.schema))
+            self.chunk = []
+
+    def _write(self, row):
+        self.chunk.append(row)
+        if len(self.chunk) >= self.chunk_rows:
+            self._flush()
+
+    def _close(self):
+        self._flush()
+        self.out.close()
+
+
+def columnar_writer(stem, compact=False):
+    """`stem`.parquet when pyarrow is installed, else `stem`.csv."""
+    try:
+        return ParquetRowWriter(stem + ".parquet", compact)
+    except ImportError:
+        return CsvRowWriter(stem + ".csv", compact)
+
+
 class OutputWriter:
     def __init__(self, output_path="data/output"):
         self.output_path = output_path
@@ -30,3 +188,24 @@ class OutputWriter:
             print(f"Timetables successfully saved to {file_path}")
         except Exception as e:
             raise Exception(f"Error saving timetables: {str(e)}")
+
+    # ----------------------------
+    # Stream timetables as flat rows
+    # ----------------------------
+    def save_rows(self, solutions, name="timetables", fmt="jsonl", compact=False):
+        """
+        solutions: ranked dicts with a nested "schedule" (timetable_top_N.json documents)
+        fmt: "jsonl" (name.jsonl) or "columnar" (name.parquet, or name.csv without pyarrow)
+        Each solution's rows are streamed with `solution` = its rank (1-based). Returns the path.
+        """
+        stem = os.path.join(self.output_path, name)
+        if fmt == "jsonl":
+            writer = JsonlRowWriter(stem + ".jsonl", compact)
+        elif fmt == "columnar":
+            writer = columnar_writer(stem, compact)
+        else:
+            raise ValueError(f"unknown row format {fmt!r}; expected 'jsonl' or 'columnar'")
+        with writer:
+            for rank, sol in enumerate(solutions, 1):
+                writer.write_rows(schedule_rows(sol["schedule"], solution=rank))
+        return writer.path
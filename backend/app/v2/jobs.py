@@ -0,0 +1,309 @@
+"""
+Asynchronous timetable jobs for service.py.
+
+JobQueue.submit(body) queues a request and returns its id at once. Up to
+`concurrency` jobs run at a time, each in a forked process running
+pipeline.run with the solver's progress hook wired back to the queue:
+  status(id)        status (queued, running, done, cancelled, failed), timestamps and
+                    progress: attempts, nodes, sessions placed in the current attempt
+                    (and the most so far), sessions, solutions found, best score
+  events(id, since, timeout)
+                    the job's events from index `since`, waiting up to `timeout`
+                    seconds for new ones: "solution" (each new unique timetable as
+                    it is found), "progress", then one of "done", "cancelled", "failed"
+  result(id)        pipeline.run's result once the job has finished
+  cancel(id)        drops a queued job; a running solve stops at its next search node
+                    and finishes with the solutions found so far
+Jobs and events are kept in memory or, with backend="sqlite", in a SQLite file:
+after a restart finished jobs are still answered, queued ones run again and
+ones that were running are marked failed.
+"""
+
+import os, json, time, uuid, queue, sqlite3, threading, multiprocessing
+from collections import deque
+
+import loader
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+pipeline = loader.load("pipeline.py", "timetable_pipeline", register=True)
+
+FINISHED = ("done", "cancelled", "failed")
+# seconds between "progress" messages from a running job
+PROGRESS_INTERVAL = 0.5
+
+
+def _new_progress():
+    return {"sessions": None, "attempts": 0, "nodes": 0, "placed": 0, "max_placed": 0, "solutions": 0, "best_score": None}
+
+
+class MemoryJobStore:
+    def __init__(self):
+        self.jobs, self.log = {}, {}
+
+    def create(self, job):
+        self.jobs[job["id"]] = dict(job)
+        self.log[job["id"]] = []
+
+    def update(self, job_id, **fields):
+        self.jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def add_event(self, job_id, event):
+        self.log[job_id].append(event)
+        return len(self.log[job_id])
+
+    def events(self, job_id, since=0):
+        return list(self.log.get(job_id, [])[since:])
+
+    def count_events(self, job_id):
+        return len(self.log.get(job_id, []))
+
+    def with_status(self, status):
+        return [j["id"] for j in sorted(self.jobs.values(), key=lambda j: j["created"]) if j["status"] == status]
+
+
+class SQLiteJobStore:
+    JSON_FIELDS = ("body", "progress", "result")
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, created REAL, started REAL,"
+                            " finished REAL, body TEXT, progress TEXT, result TEXT, error TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS events (job_id TEXT, seq INTEGER, event TEXT, PRIMARY KEY (job_id, seq))")
+
+    def create(self, job):
+        self.update(job["id"], **job)
+
+    def update(self, job_id, **fields):
+        cols = {k: json.dumps(v) if k in self.JSON_FIELDS else v for k, v in fields.items() if k != "id"}
+        with self.lock, self.db:
+            self.db.execute("INSERT OR IGNORE INTO jobs (id) VALUES (?)", (job_id,))
+            if cols:
+                self.db.execute(f"UPDATE jobs SET {', '.join(k + ' = ?' for k in cols)} WHERE id = ?", list(cols.values()) + [job_id])
+
+    def get(self, job_id):
+        with self.lock:
+            cur = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cur.fetchone()
+            names = [d[0] for d in cur.description]
+        if row is None:
+            return None
+        job = dict(zip(names, row))
+        for k in self.JSON_FIELDS:
+            job[k] = json.loads(job[k]) if job[k] is not None else None
+        return job
+
+    def add_event(self, job_id, event):
+        with self.lock, self.db:
+            n = self.db.execute("SELECT COUNT(*) FROM events WHERE job_id = ?", (job_id,)).fetchone()[0]
+            self.db.execute("INSERT INTO events VALUES (?, ?, ?)", (job_id, n, json.dumps(event)))
+        return n + 1
+
+    def events(self, job_id, since=0):
+        with self.lock:
+            rows = self.db.execute("SELECT event FROM events WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, since)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count_events(self, job_id):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM events WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+    def with_status(self, status):
+        with self.lock:
+            return [r[0] for r in self.db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created", (status,))]
+
+
+def _run_job(body, out, cancel):
+    """Forked job process: pipeline.run with progress messages on `out`, stopped by `cancel` (an Event)."""
+    def setup(solver):
+        last = [0.0]
+
+        def progress(kind, payload):
+            if kind in ("progress", "attempt"):
+                # coalesced: easy instances finish thousands of attempts a second
+                now = time.time()
+                if now - last[0] < PROGRESS_INTERVAL:
+                    return
+                last[0] = now
+            out.put((kind, payload))
+
+        solver.progress = progress
+
+        def watch():
+            cancel.wait()
+            solver.cancel()
+        threading.Thread(target=watch, daemon=True).start()
+
+    try:
+        out.put(("done", pipeline.run(pipeline.request_data(body), log=lambda *a: None, setup=setup,
+                                      previous=body.get("previous"))))
+    except Exception as e:
+        out.put(("failed", {"error": f"{type(e).__name__}: {e}"}))
+
+
+class JobQueue:
+    def __init__(self, concurrency=2, backend="memory", path=None, cancel_grace=5.0):
+        """
+        Args:
+            concurrency (int): jobs solved at the same time; the rest wait in order.
+            backend (str): "memory" or "sqlite" (stored at `path`).
+            cancel_grace (float): seconds a cancelled job gets to stop before its process is killed.
+        """
+        if backend == "sqlite":
+            self.store = SQLiteJobStore(path or os.path.join(BASE, "jobs.sqlite3"))
+        elif backend == "memory":
+            self.store = MemoryJobStore()
+        else:
+            raise ValueError(f"unknown job backend {backend!r}; expected 'memory' or 'sqlite'")
+        self.concurrency = max(1, int(concurrency))
+        self.cancel_grace = float(cancel_grace)
+        methods = multiprocessing.get_all_start_methods()
+        self.ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.cond = threading.Condition()
+        self.running = {}    # job id -> (process, cancel event)
+        self.closed = False
+        for job_id in self.store.with_status("running"):
+            self._finish(job_id, "failed", {"error": "service restarted while the job was running"})
+        self.pending = deque(self.store.with_status("queued"))
+        pipeline.warm()
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+
+    # ----------------------------
+    # Client API
+    # ----------------------------
+    def submit(self, body):
+        """Queue a request body (as for POST /solve); returns the job id. ValueError for missing datasets."""
+        pipeline.request_data(body)
+        job_id = uuid.uuid4().hex
+        with self.cond:
+            self.store.create({"id": job_id, "status": "queued", "created": time.time(), "started": None, "finished": None,
+                               "body": body, "progress": _new_progress(), "result": None, "error": None})
+            self.pending.append(job_id)
+            self.cond.notify_all()
+        return job_id
+
+    def status(self, job_id):
+        """The job without its body and result, or None for an unknown id."""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        job.pop("body", None)
+        job.pop("result", None)
+        job["events"] = self.store.count_events(job_id)
+        return job
+
+    def result(self, job_id):
+        job = self.store.get(job_id)
+        return job["result"] if job is not None else None
+
+    def events(self, job_id, since=0, timeout=0):
+        """Events from index `since`; with a timeout, waits until there are some or the job has finished."""
+        deadline = time.time() + float(timeout or 0)
+        with self.cond:
+            while True:
+                found = self.store.events(job_id, since)
+                job = self.store.get(job_id)
+                left = deadline - time.time()
+                if found or job is None or job["status"] in FINISHED or left <= 0:
+                    return found
+                self.cond.wait(left)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns its status afterwards (None for an unknown id)."""
+        with self.cond:
+            job = self.store.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued":
+                self.pending.remove(job_id)
+                self._finish(job_id, "cancelled", None)
+            elif job_id in self.running:
+                proc, cancel = self.running[job_id]
+                cancel.set()
+                threading.Timer(self.cancel_grace, lambda: proc.is_alive() and proc.terminate()).start()
+        return self.status(job_id)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            for proc, cancel in self.running.values():
+                proc.terminate()
+            self.cond.notify_all()
+
+    # ----------------------------
+    # Running jobs
+    # ----------------------------
+    def _event(self, job_id, kind, data):
+        with self.cond:
+            self.store.add_event(job_id, {"kind": kind, "time": round(time.time(), 3), "data": data})
+            self.cond.notify_all()
+
+    def _finish(self, job_id, status, result, error=None):
+        self.store.update(job_id, status=status, finished=time.time(), result=result,
+                          error=error or (result or {}).get("error"))
+        self._event(job_id, status, {"error": error} if error else None)
+
+    def _dispatch(self):
+        with self.cond:
+            while not self.closed:
+                while self.pending and len(self.running) < self.concurrency:
+                    self._start(self.pending.popleft())
+                self.cond.wait()
+
+    def _start(self, job_id):
+        body = self.store.get(job_id)["body"]
+        out, cancel = self.ctx.Queue(), self.ctx.Event()
+        proc = self.ctx.Process(target=_run_job, args=(body, out, cancel), daemon=True)
+        proc.start()
+        self.running[job_id] = (proc, cancel)
+        self.store.update(job_id, status="running", started=time.time())
+        threading.Thread(target=self._read, args=(job_id, proc, out, cancel), daemon=True).start()
+
+    def _read(self, job_id, proc, out, cancel):
+        """Relay one job's messages into its progress and event log until it finishes."""
+        progress = self.store.get(job_id)["progress"]
+        while True:
+            try:
+                kind, payload = out.get(timeout=0.5)
+            except queue.Empty:
+                if proc.is_alive():
+                    continue
+                if cancel.is_set():
+                    self._finish(job_id, "cancelled", None)
+                else:
+                    self._finish(job_id, "failed", None, error=f"job process exited with code {proc.exitcode}")
+                break
+            if kind == "done":
+                progress.update(attempts=payload["stats"].get("attempts", progress["attempts"]),
+                                nodes=payload["stats"].get("nodes", progress["nodes"]))
+                self.store.update(job_id, progress=progress)
+                self._finish(job_id, "cancelled" if payload.get("cancelled") else "done", payload)
+                break
+            if kind == "failed":
+                self._finish(job_id, "failed", None, error=payload["error"])
+                break
+            if kind == "start":
+                progress["sessions"] = payload["sessions"]
+            progress["attempts"], progress["nodes"] = payload["attempts"], payload["nodes"]
+            if kind == "progress":
+                progress["placed"] = payload["placed"]
+                progress["max_placed"] = max(progress["max_placed"], payload["placed"])
+            elif kind == "solution":
+                progress["solutions"] += 1
+                progress["max_placed"] = progress["sessions"] or progress["max_placed"]
+                if progress["best_score"] is None or payload["score"] > progress["best_score"]:
+                    progress["best_score"] = payload["score"]
+            self.store.update(job_id, progress=progress)
+            if kind in ("solution", "progress"):
+                self._event(job_id, kind, payload)
+        proc.join()
+        out.close()
+        with self.cond:
+            self.running.pop(job_id, None)
+            self.cond.notify_all()
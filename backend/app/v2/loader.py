@@ -0,0 +1,43 @@
+"""
+Imports the package's own files by path, once per process.
+
+The package is a tree of flat modules loaded with importlib rather than an
+installed package. load() is the one place that does it: a file is executed
+on its first load() and the same module object is returned on every later
+one, whichever module asks. Modules reach this file itself with a plain
+`import loader`: the entry scripts run from the package root, which puts it
+on sys.path, and the benchmarks and tests/conftest.py add it. Scheduler
+modules handed a TimetableSolver use the modules it has loaded instead.
+"""
+
+import os, sys, importlib.util
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+# relpath -> module
+_MODULES = {}
+
+
+def load(relpath, name, register=False):
+    """
+    BASE/relpath as module `name`, executed once per process. With `register` it is
+    also kept in sys.modules under `name` (needed for objects pickled by module name,
+    like pool jobs), and a module already registered there is taken as is.
+    """
+    relpath = os.path.normpath(relpath)
+    mod = _MODULES.get(relpath)
+    if mod is None and register:
+        mod = sys.modules.get(name)
+    if mod is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(BASE, relpath))
+        mod = importlib.util.module_from_spec(spec)
+        if register:
+            sys.modules[name] = mod
+        try:
+            spec.loader.exec_module(mod)
+        except BaseException:
+            if register:
+                del sys.modules[name]
+            raise
+    _MODULES[relpath] = mod
+    return mod
+
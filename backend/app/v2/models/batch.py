@@ -1,6 +1,12 @@
 
+import loader
+
+occupancy = loader.load("models/occupancy.py", "timetable_occupancy")
+Occupancy = occupancy.Occupancy
+AssignmentLog = occupancy.AssignmentLog
+
 class Batch:
-    def __init__(self, id, name=None, semester=None, strength=0, subjects=None, parent_batch=None, is_subgroup=False, available_days=None, available_slots=None, **kwargs):
+    def __init__(self, id, name=None, semester=None, strength=0, subjects=None, parent_batch=None, is_subgroup=False, available_days=None, available_slots=None, department=None, **kwargs):
         self.id = id
         self.name = name or id
         self.semester = semester
@@ -10,23 +16,15 @@ class Batch:
         self.is_subgroup = bool(is_subgroup)
         self.available_days = list(available_days) if available_days is not None else []
         self.available_slots = list(available_slots) if available_slots is not None else []
-        # schedule: day -> slot -> list of assignments
+        self.department = department
+        # schedule: day -> slot -> list of assignment handles; values live in `assignments`
         self.schedule = {d: {s: [] for s in self.available_slots} for d in self.available_days}
+        self.assignments = AssignmentLog()
+        # per-day bitmasks mirroring `schedule`; availability checks read only these
+        self.occupancy = Occupancy(self.available_days, self.available_slots)
 
     def is_available(self, day, start_slot, duration=1):
-        if day not in self.available_days:
-            return False
-        try:
-            start = int(start_slot)
-        except Exception:
-            return False
-        seq = [str(start + i) for i in range(duration)]
-        for s in seq:
-            if s not in self.available_slots:
-                return False
-            if self.schedule.get(day, {}).get(s):
-                return False
-        return True
+        return self.occupancy.is_free(day, start_slot, duration)
 
     def assign(self, day, start_slot, value):
         duration = int(value.get('duration',1))
@@ -34,19 +32,39 @@ class Batch:
             return False, "batch not available for all slots"
         start = int(start_slot)
         seq = [str(start + i) for i in range(duration)]
+        handle = self.assignments.add(day, seq, value)
         for s in seq:
-            self.schedule[day][s].append(value.copy())
-        return True, None
+            self.schedule[day][s].append(handle)
+        self.occupancy.occupy(day, start_slot, duration)
+        return True, handle
 
-    def unassign(self, day, start_slot, value=None):
-        duration = int(value.get('duration',1)) if value else 1
-        start = int(start_slot)
-        seq = [str(start + i) for i in range(duration)]
+    def cell(self, day, slot):
+        """Values assigned at (day, slot); `schedule` cells hold their handles in `assignments`."""
+        return self.assignments.view(self.schedule.get(day, {}).get(str(slot), []))
+
+    def undo(self, handle=None):
+        """Release the assignment `handle` (default: the most recent one)."""
+        handle, day, seq, value = self.assignments.pop(handle)
         for s in seq:
-            if value is None:
-                self.schedule[day][s] = []
-            else:
-                try:
-                    self.schedule[day][s].remove(value)
-                except ValueError:
-                    pass
+            cell = self.schedule[day][s]
+            if handle in cell:
+                cell.remove(handle)
+            self.occupancy.mark(day, s, bool(cell))
+        return value
+
+    def unassign(self, day, start_slot, value=None):
+        if isinstance(value, int):
+            self.undo(value)
+            return
+        if value is not None:
+            # release the assignment holding an equal value
+            handle = self.assignments.find(self.schedule.get(day, {}).get(str(start_slot), []), value)
+            if handle is not None:
+                self.undo(handle)
+            return
+        # clear one cell: every assignment in it gives up that slot
+        s = str(int(start_slot))
+        for h in self.schedule[day][s]:
+            self.assignments.drop(h, s)
+        self.schedule[day][s] = []
+        self.occupancy.mark(day, s, False)
@@ -1,6 +1,12 @@
 
+import loader
+
+occupancy = loader.load("models/occupancy.py", "timetable_occupancy")
+Occupancy = occupancy.Occupancy
+AssignmentLog = occupancy.AssignmentLog
+
 class Classroom:
-    def __init__(self, id, type="lecture", capacity=0, name=None, available_days=None, available_slots=None, lab_slots=None, **kwargs):
+    def __init__(self, id, type="lecture", capacity=0, name=None, available_days=None, available_slots=None, lab_slots=None, department=None, **kwargs):
         self.id = id
         self.name = name or id
         self.type = type or "lecture"
@@ -8,8 +14,14 @@ class Classroom:
         self.available_days = list(available_days) if available_days is not None else []
         self.available_slots = list(available_slots) if available_slots is not None else []
         self.lab_slots = lab_slots or {}
-        # schedule: day -> slot -> list of assignments (allow checking conflicts)
+        # owning department: only its batches (and batches without one) use the room
+        self.department = department
+        # schedule: day -> slot -> list of assignment handles (allow checking conflicts);
+        # the assigned values live once in `assignments`
         self.schedule = {d: {s: [] for s in self.available_slots} for d in self.available_days}
+        self.assignments = AssignmentLog()
+        # per-day bitmasks mirroring `schedule`; availability checks read only these
+        self.occupancy = Occupancy(self.available_days, self.available_slots)
 
     def is_lab(self):
         return self.type == "lab"
@@ -26,20 +38,12 @@ class Classroom:
         return seq
 
     def is_available(self, day, start_slot, duration=1):
-        if day not in self.available_days:
-            return False
-        try:
-            seq = self._slot_sequence(start_slot, duration)
-        except Exception:
-            return False
-        # availability: no other assignments in any of the seq slots
-        for s in seq:
-            if self.schedule.get(day, {}).get(s):
-                return False
-        return True
+        # availability: every slot of the window exists and holds no other assignment
+        return self.occupancy.is_free(day, start_slot, duration)
 
     def assign(self, day, start_slot, value):
-        # value expected to be dict with 'duration' and optional 'batch_size'
+        # value expected to be dict with 'duration' and optional 'batch_size';
+        # on success returns (True, handle) where handle identifies this assignment
         duration = int(value.get('duration', 1))
         if not self.is_available(day, start_slot, duration):
             return False, "room not available for all slots"
@@ -47,23 +51,47 @@ class Classroom:
         if batch_size and self.capacity < batch_size:
             return False, f"room capacity {self.capacity} < batch size {batch_size}"
         seq = self._slot_sequence(start_slot, duration)
+        handle = self.assignments.add(day, seq, value)
         for s in seq:
-            self.schedule[day][s].append(value.copy())
-        return True, None
+            self.schedule[day][s].append(handle)
+        self.occupancy.occupy(day, start_slot, duration)
+        return True, handle
+
+    def cell(self, day, slot):
+        """Values assigned at (day, slot); `schedule` cells hold their handles in `assignments`."""
+        return self.assignments.view(self.schedule.get(day, {}).get(str(slot), []))
+
+    def undo(self, handle=None):
+        """Release the assignment `handle` (default: the most recent one)."""
+        handle, day, seq, value = self.assignments.pop(handle)
+        for s in seq:
+            cell = self.schedule[day][s]
+            if handle in cell:
+                cell.remove(handle)
+            self.occupancy.mark(day, s, bool(cell))
+        return value
 
     def unassign(self, day, start_slot=None, value=None):
         if start_slot is None:
             # clear all slots for day
             for s in self.schedule.get(day, {}):
+                for h in self.schedule[day][s]:
+                    self.assignments.drop(h, s)
                 self.schedule[day][s] = []
+            self.occupancy.clear_day(day)
             return
-        duration = int(value.get('duration',1)) if value else 1
-        seq = self._slot_sequence(start_slot, duration)
-        for s in seq:
-            if value is None:
-                self.schedule[day][s] = []
-            else:
-                try:
-                    self.schedule[day][s].remove(value)
-                except ValueError:
-                    pass
+        if isinstance(value, int):
+            self.undo(value)
+            return
+        if value is not None:
+            # release the assignment holding an equal value
+            handle = self.assignments.find(self.schedule.get(day, {}).get(str(start_slot), []), value)
+            if handle is not None:
+                self.undo(handle)
+            return
+        # clear one cell: every assignment in it gives up that slot
+        for s in self._slot_sequence(start_slot, 1):
+            for h in self.schedule[day][s]:
+                self.assignments.drop(h, s)
+            self.schedule[day][s] = []
+            self.occupancy.mark(day, s, False)
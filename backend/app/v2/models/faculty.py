@@ -1,6 +1,12 @@
 
+import loader
+
+occupancy = loader.load("models/occupancy.py", "timetable_occupancy")
+Occupancy = occupancy.Occupancy
+AssignmentLog = occupancy.AssignmentLog
+
 class Faculty:
-    def __init__(self, id, name=None, category=None, subjects=None, max_hours_per_week=0, max_lab_hours=0, max_lecture_hours=0, preferred_days=None, preferred_slots=None, lab_slots=None, **kwargs):
+    def __init__(self, id, name=None, category=None, subjects=None, max_hours_per_week=0, max_lab_hours=0, max_lecture_hours=0, preferred_days=None, preferred_slots=None, lab_slots=None, department=None, **kwargs):
         self.id = id
         self.name = name or id
         self.category = category
@@ -11,11 +17,17 @@ class Faculty:
         self.preferred_days = list(preferred_days) if preferred_days is not None else []
         self.preferred_slots = list(preferred_slots) if preferred_slots is not None else []
         self.lab_slots = lab_slots or {}
-        # tracking assigned hours and schedule: day -> slot -> list of assignments
+        # department: only its batches (and batches without one) are taught by this faculty
+        self.department = department
+        # tracking assigned hours and schedule
         self.assigned_hours = 0
         self.assigned_lab_hours = 0
         self.assigned_lecture_hours = 0
+        # schedule: day -> slot -> list of assignment handles; values live in `assignments`
         self.schedule = {d: {s: [] for s in self.preferred_slots} for d in self.preferred_days}
+        self.assignments = AssignmentLog()
+        # per-day bitmasks mirroring `schedule`; availability checks read only these
+        self.occupancy = Occupancy(self.preferred_days, self.preferred_slots)
 
     def can_teach(self, subject_id):
         return subject_id in self.subjects
@@ -32,16 +44,7 @@ class Faculty:
         return seq
 
     def is_available(self, day, start_slot, duration=1):
-        if day not in self.preferred_days:
-            return False
-        try:
-            seq = self._slot_sequence(start_slot, duration)
-        except Exception:
-            return False
-        for s in seq:
-            if self.schedule.get(day, {}).get(s):
-                return False
-        return True
+        return self.occupancy.is_free(day, start_slot, duration)
 
     def assign(self, day, start_slot, value):
         duration = int(value.get('duration', 1))
@@ -55,33 +58,52 @@ class Faculty:
         if not is_lab and (self.assigned_lecture_hours + duration > self.max_lecture_hours):
             return False, f"assigning lecture {duration} exceeds faculty max lecture hours ({self.assigned_lecture_hours}/{self.max_lecture_hours})"
         seq = self._slot_sequence(start_slot, duration)
+        handle = self.assignments.add(day, seq, value)
         for s in seq:
-            self.schedule[day][s].append(value.copy())
+            self.schedule[day][s].append(handle)
+        self.occupancy.occupy(day, start_slot, duration)
         self.assigned_hours += duration
         if is_lab:
             self.assigned_lab_hours += duration
         else:
             self.assigned_lecture_hours += duration
-        return True, None
+        return True, handle
 
-    def unassign(self, day, start_slot, value=None):
-        duration = int(value.get('duration',1)) if value else 1
-        is_lab = bool(value.get('is_lab', False)) if value else False
-        seq = [str(int(start_slot) + i) for i in range(duration)]
+    def cell(self, day, slot):
+        """Values assigned at (day, slot); `schedule` cells hold their handles in `assignments`."""
+        return self.assignments.view(self.schedule.get(day, {}).get(str(slot), []))
+
+    def undo(self, handle=None):
+        """Release the assignment `handle` (default: the most recent one) and its hours."""
+        handle, day, seq, value = self.assignments.pop(handle)
         for s in seq:
-            if value is None:
-                vals = self.schedule[day][s]
-                for v in vals:
-                    dur = int(v.get('duration',1)) if isinstance(v, dict) else 1
-                    self.assigned_hours -= dur
-                self.schedule[day][s] = []
-            else:
-                try:
-                    self.schedule[day][s].remove(value)
-                    self.assigned_hours -= duration
-                    if is_lab:
-                        self.assigned_lab_hours -= duration
-                    else:
-                        self.assigned_lecture_hours -= duration
-                except ValueError:
-                    pass
+            cell = self.schedule[day][s]
+            if handle in cell:
+                cell.remove(handle)
+            self.occupancy.mark(day, s, bool(cell))
+        self._release_hours(value, len(seq))
+        return value
+
+    def _release_hours(self, value, hours):
+        self.assigned_hours -= hours
+        if bool(value.get('is_lab', False)):
+            self.assigned_lab_hours -= hours
+        else:
+            self.assigned_lecture_hours -= hours
+
+    def unassign(self, day, start_slot, value=None):
+        if isinstance(value, int):
+            self.undo(value)
+            return
+        if value is not None:
+            # release the assignment holding an equal value
+            handle = self.assignments.find(self.schedule.get(day, {}).get(str(start_slot), []), value)
+            if handle is not None:
+                self.undo(handle)
+            return
+        # clear one cell: every assignment in it gives up that slot and its hour
+        s = str(int(start_slot))
+        for h in self.schedule[day][s]:
+            self._release_hours(self.assignments.drop(h, s), 1)
+        self.schedule[day][s] = []
+        self.occupancy.mark(day, s, False)
@@ -0,0 +1,165 @@
+
+"""
+Bitmask occupancy engine shared by the Classroom, Faculty and Batch models.
+
+Every resource keeps one integer per day where bit ``n`` stands for slot id
+``str(n)``. ``available`` is fixed when the resource is built, ``occupied``
+follows assign/unassign, and ``free`` is kept equal to ``available & ~occupied``
+so "is this window of `duration` free" is one AND plus one compare.
+"""
+
+_WINDOWS = {}
+
+
+def window_mask(start_slot, duration=1):
+    """
+    Mask covering `duration` consecutive slots from `start_slot`.
+    Returns None when the start slot is not a non-negative integer id.
+    """
+    key = (start_slot, duration)
+    mask = _WINDOWS.get(key)
+    if mask is None and key not in _WINDOWS:
+        try:
+            start = int(start_slot)
+        except Exception:
+            start = -1
+        if start < 0:
+            mask = None
+        else:
+            mask = ((1 << max(int(duration), 0)) - 1) << start
+        _WINDOWS[key] = mask
+    return mask
+
+
+def slots_mask(slots):
+    """Mask of the given slot ids; ids that are not canonical integers are ignored."""
+    mask = 0
+    for s in slots:
+        try:
+            n = int(s)
+        except Exception:
+            continue
+        if n >= 0 and str(n) == str(s):
+            mask |= 1 << n
+    return mask
+
+
+class Occupancy:
+    window = staticmethod(window_mask)
+
+    def __init__(self, days, slots):
+        base = slots_mask(slots)
+        self.available = {d: base for d in days}
+        self.occupied = {d: 0 for d in days}
+        self.free = dict(self.available)
+
+    def is_free(self, day, start_slot, duration=1):
+        w = window_mask(start_slot, duration)
+        if w is None:
+            return False
+        f = self.free.get(day)
+        if f is None:
+            return False
+        return f & w == w
+
+    def occupy(self, day, start_slot, duration=1):
+        w = window_mask(start_slot, duration)
+        if not w or day not in self.occupied:
+            return
+        self.occupied[day] |= w
+        self.free[day] = self.available[day] & ~self.occupied[day]
+
+    def release(self, day, start_slot, duration=1):
+        w = window_mask(start_slot, duration)
+        if not w or day not in self.occupied:
+            return
+        self.occupied[day] &= ~w
+        self.free[day] = self.available[day] & ~self.occupied[day]
+
+    def mark(self, day, slot, busy):
+        """Set a single cell, used when a slot list may still hold other entries."""
+        if busy:
+            self.occupy(day, slot, 1)
+        else:
+            self.release(day, slot, 1)
+
+    def clear_day(self, day):
+        if day in self.occupied:
+            self.occupied[day] = 0
+            self.free[day] = self.available[day]
+
+    def reset(self):
+        for d in self.occupied:
+            self.occupied[d] = 0
+        self.free = dict(self.available)
+
+
+class AssignmentLog:
+    """
+    Assignments held by one resource, addressed by integer handles.
+
+    `schedule` cells of the models hold handles; the value itself is stored
+    once here and view(cell) (the models' cell(day, slot)) maps a cell back to
+    its values. `trail` lists handles in assignment order, so the most recent
+    assignment is undone with a pop instead of a search; a handle popped out of
+    order is only dropped from `values` and skipped once it reaches the top.
+    """
+
+    def __init__(self):
+        self.values = {}   # handle -> (day, slot ids, value)
+        self.trail = []
+        self._next = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, day, seq, value):
+        handle = self._next
+        self._next += 1
+        self.values[handle] = (day, list(seq), value)
+        self.trail.append(handle)
+        return handle
+
+    def get(self, handle):
+        return self.values[handle][2]
+
+    def view(self, cell):
+        """Values of the handles in `cell`, oldest first."""
+        return [self.values[h][2] for h in cell if h in self.values]
+
+    def find(self, cell, value):
+        """Handle in `cell` whose value equals `value`, or None."""
+        for h in cell:
+            entry = self.values.get(h)
+            if entry is not None and entry[2] == value:
+                return h
+        return None
+
+    def pop(self, handle=None):
+        """Remove `handle` (default: the latest) and return (handle, day, slot ids, value)."""
+        if handle is None:
+            handle = self.trail.pop()
+        elif self.trail and self.trail[-1] == handle:
+            self.trail.pop()
+        day, seq, value = self.values.pop(handle)
+        # keep the top of `trail` live; compact it when popped handles pile up below
+        while self.trail and self.trail[-1] not in self.values:
+            self.trail.pop()
+        if len(self.trail) > 2 * len(self.values) + 64:
+            self.trail = [h for h in self.trail if h in self.values]
+        return handle, day, seq, value
+
+    def drop(self, handle, slot):
+        """
+        Take slot id `slot` out of `handle`'s slots (a single cell cleared under it)
+        and return its value; a handle left without slots is popped.
+        """
+        day, seq, value = self.values[handle]
+        seq.remove(slot)
+        if not seq:
+            self.pop(handle)
+        return value
+
+    def clear(self):
+        self.values.clear()
+        self.trail.clear()
@@ -0,0 +1,291 @@
+"""
+Timetable pipeline shared by the CLI (main.py) and the scheduler service (service.py).
+
+- load_data_dir() reads the five input JSON files of a data folder
+- request_data() takes the same datasets from a request body
+- run() (run_request() for a request body) builds the models and solver, solves, runs the optional local search
+  and returns the ranked, normalized solutions as plain JSON-ready dicts
+- write_outputs() writes them as timetable_top_N.json, streams them as flat rows (JSONL, Parquet/CSV)
+  and exports them to Excel
+- given a previous timetable_top_N.json, run() repairs it for the new data instead of
+  solving from scratch (scheduler/resolve.py)
+
+Model and solver modules are imported once per process (loader.py), so a
+long-lived process pays the importlib cost only on its first run.
+"""
+
+import os, json, time
+
+import loader
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+FILES = ["subjects.json", "classrooms.json", "faculty.json", "batches.json", "timetable_constraints.json"]
+# input file -> (models/ module, class)
+MODELS = {"classrooms.json": ("classroom", "Classroom"), "faculty.json": ("faculty", "Faculty"),
+          "subjects.json": ("subject", "Subject"), "batches.json": ("batch", "Batch")}
+
+
+def import_module(relpath, name):
+    """Import BASE/relpath once per process (loader.py)."""
+    return loader.load(relpath, name)
+
+
+def warm():
+    """Import every module run() needs (worker-pool initializer)."""
+    for m in ["classroom", "faculty", "subject", "batch", "timetable"]:
+        import_module(os.path.join("models", m + ".py"), m)
+    import_module(os.path.join("scheduler", "timetable_solver.py"), "timetable_solver_pkg")
+    import_module(os.path.join("scheduler", "local_search.py"), "local_search_pkg")
+    import_module(os.path.join("scheduler", "resolve.py"), "resolve_pkg")
+
+
+def default_data_dir():
+    """./data or ./Data next to this file, whichever exists (data if neither does)."""
+    for name in ("data", "Data"):
+        path = os.path.join(BASE, name)
+        if os.path.isdir(path):
+            return path
+    return os.path.join(BASE, "data")
+
+
+def load_data_dir(data_dir):
+    data = {}
+    for f in FILES:
+        p = os.path.join(data_dir, f)
+        if not os.path.exists(p):
+            raise FileNotFoundError(p)
+        with open(p) as fp:
+            data[f] = json.load(fp)
+    return data
+
+
+def request_data(body):
+    """
+    The datasets of a request body, keyed like load_data_dir(). Each may be
+    given under its file name ("batches.json") or bare name ("batches");
+    constraints may also come as "constraints" and default to {}.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("request body must be a JSON object")
+    data = {}
+    for f in FILES:
+        name = f[:-len(".json")]
+        keys = [f, name] + (["constraints"] if name == "timetable_constraints" else [])
+        value = next((body[k] for k in keys if k in body), None)
+        if value is None:
+            if name == "timetable_constraints":
+                value = {}
+            else:
+                raise ValueError(f"missing dataset {name!r}")
+        data[f] = value
+    return data
+
+
+def build_models(data, reuse=None):
+    """
+    {file name: {id: model}} of the classrooms, faculty, subjects and batches in `data`.
+    `reuse` maps id(record) -> model for records built before (the what-if scenarios
+    share the base dataset's models for every record a patch left alone).
+    """
+    reuse = reuse or {}
+    built = {}
+    for f, (module, cls) in MODELS.items():
+        model = getattr(import_module(os.path.join("models", module + ".py"), module), cls)
+        built[f] = {r['id']: reuse.get(id(r)) or model(**r) for r in data[f]}
+    return built
+
+
+def build_solver(data, models=None):
+    """
+    (solver, sessions, settings) for loaded data; settings are the pipeline options of
+    timetable_constraints.json. `models` (from build_models) skips building them again.
+    """
+    solver_mod = import_module(os.path.join("scheduler", "timetable_solver.py"), "timetable_solver_pkg")
+    tc = data["timetable_constraints.json"]
+
+    models = models or build_models(data)
+    classrooms, faculty = models["classrooms.json"], models["faculty.json"]
+    subjects, batches = models["subjects.json"], models["batches.json"]
+
+    slots = tc.get("general_settings", {}).get("slots_per_day", 6)
+    slots = [str(i) for i in range(1, slots+1)]
+    working_days = tc.get("general_settings", {}).get("working_days", ["Mon","Tue","Wed","Thu","Fri"])
+    max_solutions = tc.get("max_solutions", 4)
+    settings = {
+        "time_limit": tc.get("time_limit", 60),
+        "resolve_time_limit": tc.get("resolve_time_limit", 10),
+        "max_solutions": max_solutions,
+        "top_k": tc.get("top_k", min(4, max_solutions)),
+        "local_search": tc.get("local_search"),
+        "soft_constraints": tc.get("soft_constraints"),
+        "profile": tc.get("profile"),
+    }
+    # search options (TimetableSolver.OPTIONS) are read from the top level of timetable_constraints.json
+    options = {name: tc[name] for name in solver_mod.TimetableSolver.OPTIONS if name in tc}
+    solver = solver_mod.TimetableSolver(slots=slots, working_days=working_days,
+                                       classrooms_map=classrooms, faculty_map=faculty, batches_map=batches, subjects_map=subjects,
+                                       random_seed=tc.get("random_seed", 42), time_limit=settings["time_limit"],
+                                       fixed_lab_slots=tc.get("fixed_lab_slots", tc.get("fixed_lab_slots_per_semester")),
+                                       **options)
+    return solver, solver._generate_sessions(batches), settings
+
+
+def run(data, log=print, setup=None, previous=None, models=None):
+    """
+    Solve `data` (as from load_data_dir or request_data) and return
+    {"solutions": [...], "sessions": n, "elapsed": s, "stats": solver.stats, "metrics": {...},
+     "preanalysis": {...}, "cancelled": bool}
+    with up to top_k solutions ranked best first, each
+    {score, score_norm, signature, soft_score, soft_score_norm, metadata, schedule}; `score` is
+    the solver's score, `soft_score` the local search's (None without it). `metrics` holds the
+    solver's phase timers, per-depth domain sizes and per-seed attempts, and the
+    cProfile/tracemalloc report when timetable_constraints.json sets "profile"
+    (scheduler/metrics.py). `preanalysis` is the solver's infeasibility pre-analysis
+    (scheduler/preanalysis.py): when a bound is violated it lists the findings and
+    the search was skipped.
+    `setup(solver)` is called before solving (progress hooks, cancellation); `models` are
+    prebuilt build_models() results.
+    With `previous` (a timetable_top_N.json document) the previous timetable is
+    repaired within resolve_time_limit instead, least changed first, and the
+    local search is skipped so unaffected sessions stay where they were.
+    """
+    solver, sessions, settings = build_solver(data, models)
+    if setup is not None:
+        setup(solver)
+    time_limit, max_solutions, top_k = settings["time_limit"], settings["max_solutions"], settings["top_k"]
+    log("Total sessions to schedule:", len(sessions))
+
+    # cProfile / tracemalloc over solving and local search, when "profile" asks for them
+    profiler = solver.metrics_module.Profiler(settings["profile"])
+    profiler.start()
+    start = time.time()
+    if previous is not None:
+        resolve_mod = import_module(os.path.join("scheduler", "resolve.py"), "resolve_pkg")
+        solver.time_limit = settings["resolve_time_limit"]
+        resolver = resolve_mod.Resolver(solver, sessions, previous)
+        log("Re-solving from the previous timetable: {} sessions pinned, {} invalidated (time_limit={}s)...".format(
+            len(resolver.pinned), len(resolver.invalid), solver.time_limit))
+        results = resolver.solve(max_solutions=max_solutions)
+    else:
+        log("Running solver (time_limit={}s, max_solutions={})...".format(time_limit, max_solutions))
+        results = solver.solve(sessions, max_solutions=max_solutions)
+    elapsed = time.time() - start
+    log("Solver finished in {:.1f}s, found {} solutions".format(elapsed, len(results)))
+    report = solver.preanalysis_report
+    if report is not None:
+        log("Pre-analysis ({:.1f} ms): {}".format(report["seconds"] * 1000, "infeasible" if report["infeasible"] else "no bound violated"))
+        for finding in report["findings"]:
+            log("  {}: {}".format(finding["check"], finding["message"]))
+    log("Search stats:", json.dumps(solver.stats))
+    metrics = solver.metrics.to_dict()
+    log("Search phases:", ", ".join("{} {:.3f}s".format(p, v["seconds"]) for p, v in metrics["phases"].items() if v["calls"]))
+    if results and results[0].get('partial'):
+        log("No complete timetable; best partial places {placed} of {total} sessions".format(**results[0]['timetable'].metadata))
+
+    # optional post-solve local search over the weighted soft constraints; the
+    # stage's time_limit is shared by the top_k solutions it improves (complete
+    # timetables only: an anytime partial one is returned as the search left it)
+    local_search = settings["local_search"]
+    if local_search and results and not solver.cancelled and previous is None and not results[0].get('partial'):
+        ls_mod = import_module(os.path.join("scheduler", "local_search.py"), "local_search_pkg")
+        ls_settings = dict(local_search) if isinstance(local_search, dict) else {}
+        improve = results[:top_k]
+        ls_settings["time_limit"] = float(ls_settings.get("time_limit", 10)) / len(improve)
+        optimizer = ls_mod.LocalSearch(solver, soft_constraints=settings["soft_constraints"], **ls_settings)
+        for sol in improve:
+            tt, info = optimizer.optimize(sol['timetable'])
+            tt.metadata['local_search'] = info
+            sol.update(timetable=tt, score=solver.score(tt), soft_score=info['final'], signature=tt.signature())
+            log("Local search ({method}): soft score {initial} -> {final} in {iterations} iterations".format(**info))
+        results[:top_k] = sorted(improve, key=lambda r: r['soft_score'], reverse=True)
+    profiler.stop()
+    metrics["profile"] = profiler.report()
+
+    # --- Normalize scores into 1..100 ---
+    # `score` (the solver's) over every solution found; after local search the
+    # solutions are ranked by soft score, normalized on its own over the top_k
+    def normalizer(raw_scores):
+        lo, hi = (min(raw_scores), max(raw_scores)) if raw_scores else (0, 0)
+
+        def normalize(score):
+            # Map lo..hi -> 1..100 ; if all equal give 100
+            if score is None:
+                return None
+            if hi == lo:
+                return 100
+            return int(round(1 + (score - lo) / (hi - lo) * 99))
+        return normalize
+
+    normalize = normalizer([r['score'] for r in results])
+    normalize_soft = normalizer([r['soft_score'] for r in results[:top_k] if r.get('soft_score') is not None])
+
+    solutions = []
+    for sol in results[:top_k]:
+        solutions.append({
+            "score": sol['score'],
+            "score_norm": normalize(sol['score']),
+            "signature": sol.get('signature'),
+            "soft_score": sol.get('soft_score'),
+            "soft_score_norm": normalize_soft(sol.get('soft_score')),
+            "metadata": sol['timetable'].metadata,
+            "schedule": sol['timetable'].schedule
+        })
+    return {"solutions": solutions, "sessions": len(sessions), "elapsed": round(elapsed, 3), "stats": dict(solver.stats),
+            "metrics": metrics, "preanalysis": report, "cancelled": solver.cancelled}
+
+
+def run_request(body):
+    """run() on a request body, quietly (the service's worker job); a "previous" timetable makes it a re-solve."""
+    return run(request_data(body), log=lambda *a: None, previous=body.get("previous"))
+
+
+def write_outputs(result, output_dir, log=print, formats=("json",), compact=False):
+    """
+    Files of a run() result, per output format:
+      - "json": timetable_top_N.json per solution (nested schedule, indented)
+      - "jsonl" / "columnar": every solution streamed as flat rows, one per session
+        placement (io/output_writer.py), to timetables.jsonl / timetables.parquet
+        (timetables.csv without pyarrow), with the scores and metadata in solutions.json;
+        compact interns the ids into a timetables.<ext>.dict.json table
+      - "xlsx": timetables.xlsx with batch, faculty, room and semester views of every
+        solution (io/excel_writer.py), skipped with a message when openpyxl is missing
+    and, for every format, metrics.json: the run's sessions, elapsed time, search stats,
+    pre-analysis and metrics (phase timers, per-depth domain sizes, per-seed attempts, profile).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        if fmt == "json":
+            for i, out in enumerate(result["solutions"]):
+                fname = os.path.join(output_dir, f"timetable_top_{i+1}.json")
+                with open(fname, "w") as f:
+                    json.dump(out, f, indent=2)
+                log("Wrote", fname, "score (raw,norm)=({}, {})".format(out["score"], out["score_norm"]))
+                paths.append(fname)
+            continue
+        if fmt == "xlsx":
+            excel_mod = import_module(os.path.join("io", "excel_writer.py"), "excel_writer")
+            try:
+                fname = excel_mod.write_workbook(os.path.join(output_dir, "timetables.xlsx"), result["solutions"])
+            except ImportError as e:
+                log("Excel export skipped:", e)
+                continue
+            log("Wrote Excel at", fname, "({} solutions)".format(len(result["solutions"])))
+            paths.append(fname)
+            continue
+        writer_mod = import_module(os.path.join("io", "output_writer.py"), "output_writer")
+        fname = writer_mod.OutputWriter(output_dir).save_rows(result["solutions"], fmt=fmt, compact=compact)
+        log("Wrote", fname, "({} solutions{})".format(len(result["solutions"]), ", compact" if compact else ""))
+        paths.append(fname)
+    if any(fmt in ("jsonl", "columnar") for fmt in formats):
+        fname = os.path.join(output_dir, "solutions.json")
+        with open(fname, "w") as f:
+            json.dump([{k: v for k, v in out.items() if k != "schedule"} for out in result["solutions"]], f, indent=2)
+        paths.append(fname)
+    if "metrics" in result:
+        fname = os.path.join(output_dir, "metrics.json")
+        with open(fname, "w") as f:
+            json.dump(dict({k: result.get(k) for k in ("sessions", "elapsed", "cancelled", "stats", "preanalysis")}, **result["metrics"]), f, indent=2)
+        log("Wrote metrics at", fname)
+        paths.append(fname)
+    return paths
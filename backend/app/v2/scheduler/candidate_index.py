@@ -0,0 +1,139 @@
+# timetable_scheduler/scheduler/candidate_index.py
+"""
+Static candidate index for TimetableSolver.
+
+Everything about a session's candidates that does not depend on what is
+booked is looked up here instead of being recomputed at every search node:
+  - subject -> faculty teaching it (inverted index over Faculty.subjects)
+  - room type -> rooms sorted by capacity, so "type t, capacity >= n" is a bisect
+  - duration -> valid (start slot, window mask) pairs
+  - batch -> its working days
+and, per kind of session (batch, subject, lab, size, duration, semester), the
+resulting plan: eligible rooms and faculty (department rules applied), days
+and starts (fixed lab slots applied). Rooms and faculty keep the models'
+order, which the seeded candidate shuffles depend on.
+
+The index belongs to one solver and survives attempts and solve() calls;
+TimetableSolver rebuilds it when fingerprint() changes, i.e. when rooms,
+faculty, batches, slots or fixed lab slots were edited in between. A solver on
+slightly different data (a what-if scenario) can start from another solver's
+index: the lookups whose part of the fingerprint is unchanged are taken over,
+re-pointed at this solver's room and faculty models by id. Availability is
+left out of the fingerprint on purpose: no lookup filters by it (the
+SolverState loads it from the models at every solve()), and the re-pointed
+lists hand out the models that carry the current one.
+"""
+
+from bisect import bisect_left
+
+
+def fingerprint(solver):
+    """What the index is built from, as a comparable value."""
+    return (tuple((r.id, r.type, r.capacity, getattr(r, 'department', None)) for r in solver.classrooms.values()),
+            tuple((f.id, tuple(getattr(f, 'subjects', [])), getattr(f, 'department', None)) for f in solver.faculty.values()),
+            tuple((b.id, tuple(getattr(b, 'available_days', None) or ()), getattr(b, 'department', None))
+                  for b in solver.batches.values()),
+            tuple(solver.slots), tuple(solver.working_days), tuple(sorted(solver.fixed_lab_slots.items())))
+
+
+# which fingerprint() parts (rooms, faculty, batches, slots, days, fixed lab slots) each lookup depends on
+_DEPENDS = {"_rooms": (0,), "_faculty": (1,), "_starts": (3,), "_days": (2, 4), "_plans": (0, 1, 2, 3, 4, 5)}
+
+
+class CandidateIndex:
+    def __init__(self, solver, base=None):
+        """
+        Args:
+            solver (TimetableSolver): its classrooms, faculty, batches, slots and fixed lab slots are indexed.
+            base (CandidateIndex): optional index of another solver whose still-valid lookups are reused.
+        """
+        self.solver = solver
+        self.key = fingerprint(solver)
+        self.window = solver.state_module.window_mask
+        self.position = {}
+        self.by_subject = {}
+        for f in solver.faculty.values():
+            for subject_id in getattr(f, 'subjects', []):
+                self.by_subject.setdefault(subject_id, []).append(f)
+        self.by_type = {}
+        for pos, r in enumerate(solver.classrooms.values()):
+            self.position[r.id] = pos
+            self.by_type.setdefault(r.type, []).append(r)
+        self.capacities = {}
+        for room_type, rooms in self.by_type.items():
+            rooms.sort(key=lambda r: r.capacity)
+            self.capacities[room_type] = [r.capacity for r in rooms]
+        self._rooms, self._faculty, self._starts, self._days, self._plans = {}, {}, {}, {}, {}
+        self.reused = []
+        if base is not None:
+            rooms, faculty = solver.classrooms, solver.faculty
+            own = {"_rooms": lambda found: [rooms[r.id] for r in found],
+                   "_faculty": lambda found: [faculty[f.id] for f in found],
+                   "_plans": lambda found: ([rooms[r.id] for r in found[0]], [faculty[f.id] for f in found[1]]) + found[2:]}
+            for table, parts in _DEPENDS.items():
+                if all(base.key[p] == self.key[p] for p in parts):
+                    mapped = own.get(table)
+                    setattr(self, table, {key: mapped(found) if mapped else found
+                                          for key, found in getattr(base, table).items()})
+                    self.reused.append(table)
+
+    def rooms(self, room_type, size, dept=None):
+        """Rooms of `room_type` holding `size`, usable by department `dept`, in model order."""
+        key = (room_type, size, dept)
+        found = self._rooms.get(key)
+        if found is None:
+            rooms = self.by_type.get(room_type, [])
+            fit = rooms[bisect_left(self.capacities.get(room_type, []), size):]
+            found = sorted((r for r in fit if dept is None or getattr(r, 'department', None) in (None, dept)),
+                           key=lambda r: self.position[r.id])
+            self._rooms[key] = found
+        return found
+
+    def faculty(self, subject_id, dept=None):
+        """Faculty teaching `subject_id`, usable by department `dept`, in model order."""
+        key = (subject_id, dept)
+        found = self._faculty.get(key)
+        if found is None:
+            found = [f for f in self.by_subject.get(subject_id, [])
+                     if dept is None or getattr(f, 'department', None) in (None, dept)]
+            self._faculty[key] = found
+        return found
+
+    def starts(self, duration, fixed=None):
+        """(start slot, window mask) pairs where a `duration`-slot session fits, only `fixed` if given."""
+        key = (duration, fixed)
+        found = self._starts.get(key)
+        if found is None:
+            solver = self.solver
+            found = [(start, self.window(start, duration)) for start in solver.slots if solver._slot_seq(start, duration)]
+            if fixed is not None:
+                found = [(start, w) for start, w in found if start == fixed]
+            self._starts[key] = found
+        return found
+
+    def days(self, batch_id):
+        found = self._days.get(batch_id)
+        if found is None:
+            solver = self.solver
+            batch = solver.batches[batch_id]
+            available = getattr(batch, 'available_days', None)
+            found = [d for d in available if d in solver.working_days] if available else list(solver.working_days)
+            self._days[batch_id] = found
+        return found
+
+    def plan(self, session):
+        """(rooms, faculty, days, starts) of a session."""
+        key = (session['batch'], session['subject'], session['is_lab'], session['batch_size'], session['duration'],
+               session['semester'])
+        found = self._plans.get(key)
+        if found is None:
+            solver = self.solver
+            dept = getattr(solver.batches.get(session['batch']), 'department', None)
+            is_lab = bool(session['is_lab'])
+            fixed = solver.fixed_lab_slots.get(str(session['semester'])) if is_lab else None
+            found = (self.rooms("lab" if is_lab else "lecture", session['batch_size'], dept),
+                     self.faculty(session['subject'], dept),
+                     self.days(session['batch']),
+                     self.starts(int(session['duration']), fixed))
+            self._plans[key] = found
+        return found
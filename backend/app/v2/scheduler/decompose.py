@@ -0,0 +1,176 @@
+# timetable_scheduler/scheduler/decompose.py
+"""
+Independent components of a timetabling problem, for TimetableSolver(decompose=True).
+
+Two sessions interact only through a resource both may take: their batch, a
+faculty eligible for both (including that faculty's hour caps), or a room
+eligible for both (type, capacity and department, TimetableSolver._eligible).
+components() joins sessions over those resources with a union-find. Sessions
+in different components never compete for anything, e.g. departments whose
+rooms and faculty carry a `department`. So each component is solved on its
+own and the timetables are merged.
+
+solve_components() gives every component a share of the time limit
+proportional to its sessions. With workers > 1 the components are dealt,
+largest first, to forked worker processes. A component without a timetable
+ends the solve, and the k-th merged result combines the k-th best timetable
+of every component.
+"""
+
+import time, queue, multiprocessing
+
+
+def components(solver, sessions):
+    """Session index lists of the connected components, largest first."""
+    parent = list(range(len(sessions)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner, shared = {}, {}
+    for si, sess in enumerate(sessions):
+        key = (sess['batch'], sess['subject'], sess['is_lab'], sess['batch_size'])
+        if key not in shared:
+            rooms, facs = solver._eligible(sess)
+            shared[key] = [('f', f.id) for f in facs] + [('r', r.id) for r in rooms]
+        for resource in [('b', sess['batch'])] + shared[key]:
+            a, b = find(owner.setdefault(resource, si)), find(si)
+            if a != b:
+                parent[b] = a
+    groups = {}
+    for si in range(len(sessions)):
+        groups.setdefault(find(si), []).append(si)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def _solve_groups(solver, sessions, groups, max_solutions, deadline):
+    """
+    Solve (group index, session indexes) pairs one after another, each with a share of the
+    time left to `deadline` proportional to its sessions. Yields (group index, results, (stats, raw metrics)).
+    """
+    left = sum(len(group) for _, group in groups)
+    for gi, group in groups:
+        if solver.cancelled:
+            return
+        solver.time_limit = max(0.0, (deadline - time.time()) * len(group) / left)
+        left -= len(group)
+        results = solver.solve([sessions[si] for si in group], max_solutions=max_solutions)
+        yield gi, results, (dict(solver.stats), solver.metrics.raw())
+        if not results:
+            # nothing to merge it with any more
+            return
+
+
+def _worker(solver, sessions, groups, max_solutions, deadline, out):
+    """Forked child of solve_components: its groups' results as picklable payloads."""
+    # a cancel reaches the parent only, which stops reading and terminates the workers
+    solver.workers, solver.progress, solver.cancelled = 1, None, False
+    for gi, results, stats in _solve_groups(solver, sessions, groups, max_solutions, deadline):
+        payload = [{"schedule": r['timetable'].schedule, "metadata": r['timetable'].metadata, "score": r['score'],
+                    "partial": bool(r.get('partial'))} for r in results]
+        out.put((gi, payload, stats))
+
+
+def solve_components(solver, sessions, groups, max_solutions):
+    """solve() over the components `groups` of `sessions`; same result format, merged."""
+    start, budget = solver.start_time, solver.time_limit
+    deadline = start + budget
+    progress, solver.progress = solver.progress, None
+    solved, stats = {}, []
+    indexed = list(enumerate(groups))
+    workers = min(solver.workers, len(groups))
+    solver._component = True
+    try:
+        if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            # largest first onto the least loaded worker
+            shares = [[] for _ in range(workers)]
+            for gi, group in indexed:
+                min(shares, key=lambda s: sum(len(g) for _, g in s)).append((gi, group))
+            ctx = multiprocessing.get_context("fork")
+            out = ctx.Queue()
+            procs = [ctx.Process(target=_worker, args=(solver, sessions, share, max_solutions, deadline, out), daemon=True)
+                     for share in shares]
+            for p in procs:
+                p.start()
+            semesters = sorted(list(set([s['semester'] for s in sessions])))
+            try:
+                # a second past the deadline for workers finishing their last attempt
+                while len(solved) < len(groups) and time.time() < deadline + 1.0 and not solver.cancelled:
+                    try:
+                        gi, payload, group_stats = out.get(timeout=0.1)
+                    except queue.Empty:
+                        if not any(p.is_alive() for p in procs):
+                            break
+                        continue
+                    results = []
+                    for r in payload:
+                        tt = solver.timetable_module.Timetable(semesters=semesters, working_days=solver.working_days,
+                                                               slots=solver.slots)
+                        tt.schedule, tt.metadata = r['schedule'], r['metadata']
+                        results.append({"timetable": tt, "score": r['score'], "partial": r['partial']})
+                    solved[gi] = results
+                    stats.append(group_stats)
+                    if not results:
+                        break
+            finally:
+                for p in procs:
+                    if p.is_alive():
+                        p.terminate()
+                for p in procs:
+                    p.join()
+                out.close()
+        else:
+            for gi, results, group_stats in _solve_groups(solver, sessions, indexed, max_solutions, deadline):
+                solved[gi] = results
+                stats.append(group_stats)
+    finally:
+        solver._component = False
+        solver.progress = progress
+        solver.start_time = start
+        solver.time_limit = budget
+
+    solver.stats = solver._new_stats()
+    solver.metrics = solver.metrics_module.SolveMetrics()
+    for group_stats, group_metrics in stats:
+        solver.metrics.merge(group_metrics)
+        for key, value in group_stats.items():
+            if key == "proven_infeasible":
+                solver.stats[key] = solver.stats[key] or value
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                solver.stats[key] = solver.stats.get(key, 0) + value
+    solver.stats["components"] = len(groups)
+    if len(solved) < len(groups) or not all(solved.values()):
+        return []
+    merged = []
+    for k in range(max(len(r) for r in solved.values())):
+        if len(merged) >= max_solutions:
+            break
+        merged.append(_merge(solver, sessions, groups, [solved[gi][min(k, len(solved[gi]) - 1)] for gi in range(len(groups))]))
+        solver._report_solution(merged[-1])
+    merged.sort(key=lambda x: x['score'], reverse=True)
+    return merged
+
+
+def _merge(solver, sessions, groups, parts):
+    """One Timetable of every component's chosen result."""
+    tt = solver.timetable_module.Timetable(semesters=sorted(list(set([s['semester'] for s in sessions]))),
+                                           working_days=solver.working_days, slots=solver.slots)
+    for res in parts:
+        for sem, days in res['timetable'].schedule.items():
+            for day, cells in days.items():
+                for slot, assigns in cells.items():
+                    tt.schedule[sem][day][slot].extend(assigns)
+    tt.metadata = dict(parts[0]['timetable'].metadata)
+    tt.metadata['components'] = [len(g) for g in groups]
+    out = {"timetable": tt, "score": solver.score(tt), "signature": tt.signature()}
+    if any(res.get('partial') for res in parts):
+        # anytime: components without a complete timetable bring their partial one
+        metas = [res['timetable'].metadata for res in parts]
+        tt.metadata.update(partial=True, total=len(sessions),
+                           placed=sum(m.get('placed', len(g)) for m, g in zip(metas, groups)),
+                           unplaced=[u for m in metas for u in m.get('unplaced', [])])
+        out.update(partial=True, unplaced=tt.metadata['unplaced'])
+    return out
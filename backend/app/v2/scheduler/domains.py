@@ -0,0 +1,114 @@
+# timetable_scheduler/scheduler/domains.py
+"""
+Incremental domain store used by TimetableSolver(domain_mode="incremental").
+
+Each session's static domain (room type, capacity, faculty eligibility and
+batch days already applied) is computed once. Placing a session prunes the
+candidates of every other unplaced session that would need one of the room,
+faculty or batch cells it occupies; pruning is recorded on a trail so undoing
+a placement restores exactly what it removed (forward checking with a trail).
+"""
+
+
+def candidate_cells(batch_id, room_id, fac_id, day, start_slot, duration):
+    start = int(start_slot)
+    cells = []
+    for slot in range(start, start + int(duration)):
+        cells.append(('r', room_id, day, slot))
+        cells.append(('f', fac_id, day, slot))
+        cells.append(('b', batch_id, day, slot))
+    return cells
+
+
+class DomainStore:
+    def __init__(self, sessions, static_domains):
+        """
+        Args:
+            sessions (list[dict]): sessions as produced by TimetableSolver._generate_sessions.
+            static_domains (list[list[tuple]]): per session, (room_id, fac_id, day, start) candidates.
+        """
+        self.sessions = sessions
+        self.cands = static_domains
+        # cell -> [(session index, [candidate indexes])] of candidates needing that
+        # cell, grouped per session so placed sessions are skipped wholesale
+        index = {}
+        for si, (sess, cands) in enumerate(zip(sessions, static_domains)):
+            dur = int(sess['duration'])
+            per_cell = {}
+            for k, (room_id, fac_id, day, start) in enumerate(cands):
+                for cell in candidate_cells(sess['batch'], room_id, fac_id, day, start, dur):
+                    per_cell.setdefault(cell, []).append(k)
+            for cell, ks in per_cell.items():
+                index.setdefault(cell, []).append((si, ks))
+        self.index = index
+        self.reset()
+
+    def reset(self):
+        self.killed = [[0] * len(c) for c in self.cands]
+        self.live = [len(c) for c in self.cands]
+        self.assigned = [False] * len(self.cands)
+        self.trail = []
+
+    def values(self, si):
+        """Candidates of session `si` not pruned by the current placements."""
+        return [c for c, k in zip(self.cands[si], self.killed[si]) if not k]
+
+    def iter_values(self, si, rng):
+        """
+        Live candidates of `si` in random order, shuffled lazily so a node that
+        succeeds on its first values does not pay for shuffling the whole domain.
+        Liveness is read at yield time, which is the node's state as long as the
+        caller undoes each placement before asking for the next value.
+        """
+        cands, killed = self.cands[si], self.killed[si]
+        perm = list(range(len(cands)))
+        rand = rng.random
+        for i in range(len(perm) - 1, -1, -1):
+            j = int(rand() * (i + 1))
+            perm[i], perm[j] = perm[j], perm[i]
+            k = perm[i]
+            if not killed[k]:
+                yield cands[k]
+
+    def place(self, si, cand):
+        """
+        Mark session `si` as placed on `cand` and prune conflicting candidates.
+        Always pushes one trail frame (pop it with `undo`); returns False when
+        an unplaced session is left with an empty domain.
+        """
+        room_id, fac_id, day, start = cand
+        sess = self.sessions[si]
+        killed, live, assigned = self.killed, self.live, self.assigned
+        assigned[si] = True
+        pruned = []
+        wiped = False
+        for cell in candidate_cells(sess['batch'], room_id, fac_id, day, start, sess['duration']):
+            for s2, ks in self.index.get(cell, ()):
+                if assigned[s2]:
+                    continue
+                row = killed[s2]
+                lost = 0
+                for k in ks:
+                    if not row[k]:
+                        lost += 1
+                    row[k] += 1
+                if lost:
+                    live[s2] -= lost
+                    if not live[s2]:
+                        wiped = True
+                pruned.append((s2, ks))
+        self.trail.append((si, pruned))
+        return not wiped
+
+    def undo(self):
+        si, pruned = self.trail.pop()
+        killed, live = self.killed, self.live
+        for s2, ks in pruned:
+            row = killed[s2]
+            back = 0
+            for k in ks:
+                row[k] -= 1
+                if not row[k]:
+                    back += 1
+            live[s2] += back
+        self.assigned[si] = False
@@ -0,0 +1,265 @@
+# timetable_scheduler/scheduler/exact_solver.py
+"""
+Exact engine for TimetableSolver(engine="cpsat" | "milp").
+
+The problem is written as a 0/1 model with one boolean per (session,
+candidate), the candidates being the session's static domain (room type,
+capacity, faculty eligibility, batch days, availability and fixed lab slots
+already applied):
+  - every session takes exactly one candidate
+  - every room, faculty and batch cell (resource, day, slot) is used at most once
+  - per faculty, the weekly, lab and lecture hours stay within the caps left
+    by what the models already hold
+and the objective maximizes TimetableSolver.score (preferred faculty slots and
+room utilisation per slot), so the first solution returned is an optimal one
+when the solver proves it in time. Further solutions come from re-solving
+with the previous placements cut off, best first: some session has to move to
+another room, day or start, as a faculty swap alone leaves the timetable's
+signature unchanged. Identical sessions (same batch, subject and domain) take
+candidates in increasing order, so a timetable has a single assignment and the
+cut removes every permutation of it.
+
+The model has as many booleans as the static domains have candidates, which
+is fine for a department and grows quickly with the room and faculty pools.
+
+OR-Tools CP-SAT ("cpsat") and PuLP with its bundled CBC ("milp") are optional;
+only the one an engine needs is imported, when it is used.
+"""
+
+import time
+
+
+class ExactModel:
+    """The solver-independent 0/1 model of a sessions list."""
+
+    def __init__(self, solver, sessions):
+        """
+        Args:
+            solver (TimetableSolver): supplies static domains, models and the hour caps.
+            sessions (list[dict]): sessions as produced by TimetableSolver._generate_sessions.
+        """
+        cells_of = solver.domains_module.candidate_cells
+        state = solver._state if solver._state is not None else solver._solver_state()
+        state.reset()
+        domains = solver._static_domains(sessions)
+        self.vars = []          # variable index -> (session index, candidate)
+        self.weights = []       # objective coefficient per variable
+        self.choices = []       # per session, its variable indexes (exactly one)
+        self.placements = []    # variable index -> its session's variables with the same room, day and start
+        cells, hours = {}, {}
+        for si, (sess, cands) in enumerate(zip(sessions, domains)):
+            dur, is_lab = int(sess['duration']), bool(sess['is_lab'])
+            mine, same = [], {}
+            for cand in cands:
+                j = len(self.vars)
+                room_id, fac_id, day, start = cand
+                self.vars.append((si, cand))
+                self.weights.append(self.candidate_score(solver, sess, cand))
+                mine.append(j)
+                group = same.setdefault((room_id, day, start), [])
+                group.append(j)
+                self.placements.append(group)
+                for cell in cells_of(sess['batch'], room_id, fac_id, day, start, dur):
+                    cells.setdefault(cell, []).append(j)
+                for kind in ("total", "lab" if is_lab else "lecture"):
+                    hours.setdefault((fac_id, kind), []).append(j)
+            self.choices.append(mine)
+        # (variables of a session, variables of the next identical one): their
+        # candidate positions must increase; identical sessions share a batch, so
+        # they never take the same candidate
+        self.orders = []
+        last = {}
+        for si, (sess, cands) in enumerate(zip(sessions, domains)):
+            key = (sess['batch'], sess['subject'], sess['is_lab'], int(sess['duration']), sess['batch_size'], tuple(cands))
+            if key in last:
+                self.orders.append((self.choices[last[key]], self.choices[si]))
+            last[key] = si
+        self.at_most_one = [js for js in cells.values() if len(js) > 1]
+        # (variable indexes, coefficients, bound) for every cap that can be exceeded
+        self.caps = []
+        for (fac_id, kind), js in hours.items():
+            fi = state.fac_no[fac_id]
+            if kind == "total":
+                bound = state.max_hours[fi] - state.hours[fi]
+            elif kind == "lab":
+                bound = state.max_lab[fi] - state.lab_hours[fi]
+            else:
+                bound = state.max_lecture[fi] - state.lecture_hours[fi]
+            coefs = [int(sessions[self.vars[j][0]]['duration']) for j in js]
+            # a session counts once whichever candidate it takes
+            worst = sum(int(sessions[si]['duration']) for si in {self.vars[j][0] for j in js})
+            if worst > bound:
+                self.caps.append((js, coefs, bound))
+
+    def cut(self, chosen):
+        """Variables whose sum is the number of sessions keeping their room, day and start from `chosen`."""
+        return [k for j in chosen for k in self.placements[j]]
+
+    @staticmethod
+    def candidate_score(solver, sess, cand):
+        """The candidate's share of TimetableSolver.score: summed over the slots it covers."""
+        room_id, fac_id, day, start = cand
+        fac = solver.faculty.get(fac_id)
+        room = solver.classrooms.get(room_id)
+        per_slot = 0
+        if room and sess.get('batch_size', 0):
+            if sess['batch_size'] / (room.capacity if room.capacity else 1) >= 0.7:
+                per_slot += 1
+        sc = 0
+        for slot in range(int(start), int(start) + int(sess['duration'])):
+            sc += per_slot
+            if fac and str(slot) in getattr(fac, 'preferred_slots', []) and day in getattr(fac, 'preferred_days', []):
+                sc += 2
+        return sc
+
+
+class ExactSolver:
+    ENGINES = ("cpsat", "milp")
+
+    def __init__(self, solver, engine="cpsat"):
+        """
+        Args:
+            solver (TimetableSolver): the solver whose models, time limit, seed and stats are used.
+            engine (str): "cpsat" (OR-Tools) or "milp" (PuLP/CBC).
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"unknown exact engine {engine!r}; expected one of {self.ENGINES}")
+        self.solver = solver
+        self.engine = engine
+
+    def _remaining(self):
+        if self.solver.cancelled:
+            return 0
+        return self.solver.time_limit - (time.time() - self.solver.start_time)
+
+    def solve(self, sessions, max_solutions=5):
+        """Up to `max_solutions` distinct timetables, best score first, as TimetableSolver.solve returns them."""
+        backend = self._cpsat_backend() if self.engine == "cpsat" else self._milp_backend()
+        solver = self.solver
+        stats = solver.stats
+        model = ExactModel(solver, sessions)
+        stats["variables"] = len(model.vars)
+        if any(not c for c in model.choices):
+            stats["proven_infeasible"] = True
+            return []
+        backend.build(model)
+        results, seen_sigs = [], set()
+        while len(results) < max_solutions and self._remaining() > 0:
+            stats["attempts"] += 1
+            status, chosen = backend.run(self._remaining(), solver.random_seed + stats["attempts"] - 1)
+            if chosen is None:
+                stats["proven_infeasible"] = stats["proven_infeasible"] or (status == "infeasible" and not results)
+                break
+            tt = self._timetable(sessions, model, chosen)
+            tt.metadata['engine'] = self.engine
+            tt.metadata['optimal'] = status == "optimal"
+            sig = tt.signature()
+            if sig not in seen_sigs:
+                seen_sigs.add(sig)
+                results.append({"timetable": tt, "score": solver.score(tt), "signature": sig})
+                solver._report_solution(results[-1])
+            # the next solve has to move at least one session
+            backend.exclude(model.cut(chosen))
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results
+
+    def _timetable(self, sessions, model, chosen):
+        solver = self.solver
+        tt = solver.timetable_module.Timetable(semesters=sorted(list(set([s['semester'] for s in sessions]))),
+                                               working_days=solver.working_days, slots=solver.slots)
+        for j in chosen:
+            si, (room_id, fac_id, day, start) = model.vars[j]
+            sess = sessions[si]
+            tt.assign(sess['semester'], day, start, {"batch": sess['batch'], "subject": sess['subject'], "faculty": fac_id,
+                                                     "room": room_id, "batch_size": sess['batch_size'],
+                                                     "duration": sess['duration'], "is_lab": sess['is_lab']})
+        return tt
+
+    def _cpsat_backend(self):
+        try:
+            from ortools.sat.python import cp_model
+        except ImportError:
+            raise ImportError("engine 'cpsat' needs OR-Tools: pip install ortools")
+        return _CpSat(cp_model, self.solver.workers)
+
+    def _milp_backend(self):
+        try:
+            import pulp
+        except ImportError:
+            raise ImportError("engine 'milp' needs PuLP (bundles the CBC solver): pip install pulp")
+        return _Milp(pulp)
+
+
+class _CpSat:
+    def __init__(self, cp_model, workers=1):
+        self.cp_model = cp_model
+        # more than one search worker makes CP-SAT non-deterministic
+        self.workers = max(1, int(workers))
+
+    def build(self, m):
+        cp = self.cp_model
+        model = cp.CpModel()
+        x = [model.NewBoolVar(f"x{j}") for j in range(len(m.vars))]
+        for js in m.choices:
+            model.Add(cp.LinearExpr.Sum([x[j] for j in js]) == 1)
+        for js in m.at_most_one:
+            model.Add(cp.LinearExpr.Sum([x[j] for j in js]) <= 1)
+        for js, coefs, bound in m.caps:
+            model.Add(cp.LinearExpr.WeightedSum([x[j] for j in js], coefs) <= bound)
+        for a, b in m.orders:
+            model.Add(cp.LinearExpr.WeightedSum([x[j] for j in a], list(range(len(a)))) + 1
+                      <= cp.LinearExpr.WeightedSum([x[j] for j in b], list(range(len(b)))))
+        model.Maximize(cp.LinearExpr.WeightedSum(x, m.weights))
+        self.model, self.x, self.n = model, x, len(m.choices)
+
+    def run(self, time_limit, seed):
+        """(status, chosen variable indexes or None); status is "optimal", "feasible", "infeasible" or "unknown"."""
+        cp = self.cp_model
+        solver = cp.CpSolver()
+        solver.parameters.max_time_in_seconds = max(float(time_limit), 0.01)
+        solver.parameters.random_seed = int(seed)
+        solver.parameters.num_search_workers = self.workers
+        status = solver.Solve(self.model)
+        if status in (cp.OPTIMAL, cp.FEASIBLE):
+            chosen = [j for j, v in enumerate(self.x) if solver.Value(v)]
+            return ("optimal" if status == cp.OPTIMAL else "feasible"), chosen
+        return ("infeasible" if status == cp.INFEASIBLE else "unknown"), None
+
+    def exclude(self, js):
+        self.model.Add(self.cp_model.LinearExpr.Sum([self.x[j] for j in js]) <= self.n - 1)
+
+
+class _Milp:
+    def __init__(self, pulp):
+        self.pulp = pulp
+
+    def build(self, m):
+        pulp = self.pulp
+        prob = pulp.LpProblem("timetable", pulp.LpMaximize)
+        x = [pulp.LpVariable(f"x{j}", cat="Binary") for j in range(len(m.vars))]
+        prob += pulp.lpSum(w * x[j] for j, w in enumerate(m.weights) if w)
+        for js in m.choices:
+            prob += pulp.lpSum(x[j] for j in js) == 1
+        for js in m.at_most_one:
+            prob += pulp.lpSum(x[j] for j in js) <= 1
+        for js, coefs, bound in m.caps:
+            prob += pulp.lpSum(c * x[j] for j, c in zip(js, coefs)) <= bound
+        for a, b in m.orders:
+            prob += pulp.lpSum(k * x[j] for k, j in enumerate(a)) + 1 <= pulp.lpSum(k * x[j] for k, j in enumerate(b))
+        self.prob, self.x, self.n = prob, x, len(m.choices)
+
+    def run(self, time_limit, seed):
+        # CBC is deterministic on its own; `seed` is accepted for the common interface
+        pulp = self.pulp
+        self.prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=max(float(time_limit), 1.0)))
+        # sol_status tells an optimum from a time-limited incumbent (PuLP >= 2.1)
+        sol = getattr(self.prob, "sol_status", None)
+        if sol is None:
+            sol = 1 if self.prob.status == pulp.LpStatusOptimal else 0
+        if sol in (1, 2):
+            chosen = [j for j, v in enumerate(self.x) if (v.varValue or 0) > 0.5]
+            return ("optimal" if sol == 1 else "feasible"), chosen
+        return ("infeasible" if self.prob.status == pulp.LpStatusInfeasible else "unknown"), None
+
+    def exclude(self, js):
+        self.prob += self.pulp.lpSum(self.x[j] for j in js) <= self.n - 1
@@ -0,0 +1,100 @@
+# timetable_scheduler/scheduler/feasibility.py
+"""
+NumPy feasibility tensor for TimetableSolver(domain_backend="numpy").
+
+A session's candidates are the (room, faculty, day, start) where the batch, the
+room and the faculty are all free for `duration` slots from `start`. Here each
+resource's free slots become a boolean [days, slots] array (unpacked from the
+SolverState bitmasks, which stay the source of truth for place/release), the
+duration window is checked for every start at once with a cumulative sum
+along the slots, and the candidate set is one broadcast AND over
+[days, starts, rooms, faculty]. Its nonzero cells come out in the same order
+as the pure-Python loop.
+
+Listing the candidates is bound by building their tuples, which the bitmask
+loop of _generate_domain already does faster (benchmarks/bench_feasibility.py),
+so the solver uses the tensor where nothing needs listing: count() sizes the
+domains the MRV orderings compare at every step, in one sum over
+[days, starts] of (batch free) x (free rooms) x (free faculty). Only the chosen
+session's domain is then listed, and seeded results do not depend on the backend.
+
+NumPy is optional and only imported when this backend is chosen.
+"""
+
+
+def load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("domain_backend 'numpy' needs NumPy: pip install numpy")
+    return numpy
+
+
+class FeasibilityTensor:
+    def __init__(self, solver):
+        """
+        Args:
+            solver (TimetableSolver): its slots fix the bit layout; candidates come from its candidate index.
+        """
+        np = self.np = load_numpy()
+        self.solver = solver
+        width = max([int(s) for s in solver.slots if str(s).isdigit()], default=0) + 1
+        if width > 62:
+            raise ValueError("domain_backend 'numpy' supports slot ids up to 61")
+        self.shifts = np.arange(width, dtype=np.int64)
+
+    def _windows(self, free, first, dur):
+        """free: int bitmasks [..., days] -> bool [..., days, starts], window of `dur` slots from each `first` bit free."""
+        np = self.np
+        bits = (free[..., None] >> self.shifts) & 1
+        csum = np.concatenate([np.zeros(bits.shape[:-1] + (1,), dtype=np.int64), np.cumsum(bits, axis=-1)], axis=-1)
+        return (csum[..., first + dur] - csum[..., first]) == dur
+
+    def _free(self, session, state):
+        """
+        (batch [days, starts], rooms [rooms, days, starts], faculty [faculty, days, starts]) free windows
+        with the rooms, faculty, days and start ids they stand for, or None without any candidate.
+        """
+        np = self.np
+        rooms, facs, days, starts = self.solver._candidate_index().plan(session)
+        starts = [start for start, w in starts if w is not None]
+        if not rooms or not facs or not days or not starts:
+            return None
+        dur = int(session['duration'])
+        di = [state.day_index[d] for d in days]
+        first = np.array([int(start) for start in starts], dtype=np.int64)
+        batch_at = state.batch_at[session['batch']]
+        batch_ok = self._windows(np.array([state.batch_free[batch_at + d] for d in di], dtype=np.int64), first, dur)
+        if not batch_ok.any():
+            return None
+        room_free, fac_free = state.room_free, state.fac_free
+        room_ok = self._windows(np.array([[room_free[state.room_at[r.id] + d] for d in di] for r in rooms], dtype=np.int64),
+                                first, dur)
+        fac_ok = self._windows(np.array([[fac_free[state.fac_at[f.id] + d] for d in di] for f in facs], dtype=np.int64),
+                               first, dur)
+        return batch_ok, room_ok, fac_ok, rooms, facs, days, starts
+
+    def count(self, session, state):
+        """Number of candidates of `session` against `state`, without listing them (MRV sizes)."""
+        found = self._free(session, state)
+        if found is None:
+            return 0
+        batch_ok, room_ok, fac_ok = found[:3]
+        return int((batch_ok * room_ok.sum(axis=0) * fac_ok.sum(axis=0)).sum())
+
+    def domain(self, session, state):
+        """Unshuffled candidates of `session` against `state`, as TimetableSolver._generate_domain lists them."""
+        found = self._free(session, state)
+        if found is None:
+            return []
+        batch_ok, room_ok, fac_ok, rooms, facs, days, starts = found
+        np = self.np
+        # [days, starts, rooms, faculty]: day-major like the Python loop
+        feasible = (batch_ok[:, :, None, None] & room_ok.transpose(1, 2, 0)[:, :, :, None]
+                    & fac_ok.transpose(1, 2, 0)[:, :, None, :])
+        d, t, r, f = np.nonzero(feasible)
+        # ids picked by fancy indexing and zipped in C: building the tuples one
+        # by one in Python would cost more than the whole tensor
+        ids = lambda values, at: np.array(values, dtype=object)[at].tolist()
+        return list(zip(ids([x.id for x in rooms], r), ids([x.id for x in facs], f), ids(days, d),
+                        ids(starts, t)))
@@ -0,0 +1,247 @@
+# timetable_scheduler/scheduler/local_search.py
+"""
+Post-solve local search over the weighted soft-constraint objective
+(scheduler/soft_constraints.py).
+
+Starting from a feasible timetable, LocalSearch tries small moves:
+  shift    move one session to another day/start, same room and faculty
+  swap     exchange the day/start of two sessions of a batch with equal duration
+  room     give a session another suitable room, or swap rooms with a session
+           holding the same window
+  faculty  give a session another eligible faculty
+Every move is applied to a SolverState of the solver's models, which enforces
+the same hard rules as the search (room/faculty/batch overlap, availability,
+faculty hour caps); room type/capacity and faculty eligibility are kept by
+construction. Moves are accepted by simulated annealing ("anneal") or tabu
+search ("tabu") until the stage's own time limit or iteration budget is spent,
+and the best timetable seen is returned.
+"""
+
+import math, time, random
+
+
+class LocalSearch:
+    METHODS = ("anneal", "tabu")
+    MOVES = ("shift", "swap", "room", "faculty")
+    SCORINGS = ("delta", "full")
+
+    def __init__(self, solver, soft_constraints=None, method="anneal", time_limit=10, max_iterations=None, seed=None,
+                 tabu_tenure=20, tabu_candidates=20, start_temperature=None, end_temperature=0.05,
+                 scoring="delta"):
+        """
+        Args:
+            solver (TimetableSolver): models, days and slots of the timetables to improve.
+            soft_constraints (dict): `soft_constraints` block of timetable_constraints.json.
+            method (str): "anneal" or "tabu".
+            time_limit (float): seconds per optimize() call.
+            max_iterations (int): optional cap on iterations (moves tried for "anneal",
+                neighbourhood samples for "tabu"); with it the run is reproducible.
+            seed (int): random seed; defaults to the solver's.
+            scoring (str): "delta" prices each move from the aggregates it touches
+                (soft_constraints.ScoreState); "full" re-evaluates the whole
+                timetable per move, for checking.
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"unknown local search method {method!r}; expected one of {self.METHODS}")
+        if scoring not in self.SCORINGS:
+            raise ValueError(f"unknown scoring {scoring!r}; expected one of {self.SCORINGS}")
+        self.scoring = scoring
+        self.solver = solver
+        self.objective = solver.soft_module.SoftObjective(solver, soft_constraints)
+        self.method = method
+        self.time_limit = float(time_limit)
+        self.max_iterations = int(max_iterations) if max_iterations else None
+        self.seed = solver.random_seed if seed is None else int(seed)
+        self.tabu_tenure = int(tabu_tenure)
+        self.tabu_candidates = int(tabu_candidates)
+        # annealing temperature falls geometrically from start to end over the budget;
+        # by default it starts at the largest weight so single violations are often undone
+        self.start_temperature = float(start_temperature) if start_temperature else max(list(self.objective.weights.values()) + [1.0])
+        self.end_temperature = float(end_temperature)
+
+    # ----------------------------
+    # Candidate positions
+    # ----------------------------
+    def _options(self, item):
+        """Rooms, faculty and (day, start) windows a session may use (a lab only at its semester's fixed slot)."""
+        rooms, facs, days, starts = self.solver._candidate_index().plan(item)
+        return [r.id for r in rooms], [f.id for f in facs], [(d, s) for d in days for s, _ in starts]
+
+    # ----------------------------
+    # Moves: lists of (item index, (room, faculty, day, start))
+    # ----------------------------
+    def _apply(self, items, state, changes):
+        """Apply `changes`; returns the undo list, or None (and nothing changed) when a hard rule fails."""
+        old = [(i, (items[i]['room'], items[i]['faculty'], items[i]['day'], items[i]['start'])) for i, _ in changes]
+        for i, pos in old:
+            self._release(items[i], state, pos)
+        done = []
+        for i, pos in changes:
+            if self._place(items[i], state, pos) is not None:
+                for j, p in reversed(done):
+                    self._release(items[j], state, p)
+                for j, p in old:
+                    self._place(items[j], state, p)
+                return None
+            done.append((i, pos))
+        for i, pos in changes:
+            items[i]['room'], items[i]['faculty'], items[i]['day'], items[i]['start'] = pos
+        return old
+
+    def _revert(self, items, state, undo):
+        self._apply(items, state, undo)
+
+    @staticmethod
+    def _place(item, state, pos):
+        room, fac, day, start = pos
+        return state.place(item['batch'], room, fac, day, start, int(item['duration']), bool(item['is_lab']))
+
+    @staticmethod
+    def _release(item, state, pos):
+        room, fac, day, start = pos
+        state.release(item['batch'], room, fac, day, start, int(item['duration']), bool(item['is_lab']))
+
+    def _random_move(self, items, options, by_batch, rng):
+        i = rng.randrange(len(items))
+        it = items[i]
+        rooms, facs, windows = options[i]
+        kind = rng.choice(self.MOVES)
+        if kind == "shift":
+            day, start = rng.choice(windows)
+            if (day, start) == (it['day'], it['start']):
+                return None
+            return [(i, (it['room'], it['faculty'], day, start))]
+        if kind == "swap":
+            j = rng.choice(by_batch[it['batch']])
+            other = items[j]
+            if j == i or other['duration'] != it['duration'] or (other['day'], other['start']) == (it['day'], it['start']):
+                return None
+            if (other['day'], other['start']) not in windows or (it['day'], it['start']) not in options[j][2]:
+                return None
+            return [(i, (it['room'], it['faculty'], other['day'], other['start'])),
+                    (j, (other['room'], other['faculty'], it['day'], it['start']))]
+        if kind == "room":
+            room = rng.choice(rooms)
+            if room == it['room']:
+                return None
+            for j, other in enumerate(items):
+                if (other['room'] == room and other['day'] == it['day'] and other['start'] == it['start']
+                        and other['duration'] == it['duration'] and it['room'] in options[j][0]):
+                    return [(i, (room, it['faculty'], it['day'], it['start'])),
+                            (j, (it['room'], other['faculty'], other['day'], other['start']))]
+            return [(i, (room, it['faculty'], it['day'], it['start']))]
+        fac = rng.choice(facs)
+        if fac == it['faculty']:
+            return None
+        return [(i, (it['room'], fac, it['day'], it['start']))]
+
+    # ----------------------------
+    # Search
+    # ----------------------------
+    def optimize(self, timetable):
+        """
+        Improve `timetable` (left unchanged) and return (new Timetable, info),
+        info holding the method, iterations, accepted moves and the soft
+        objective before and after.
+        """
+        t0 = time.time()
+        rng = random.Random(self.seed)
+        items = self.solver.soft_module.timetable_items(timetable)
+        state = self.solver.state_module.SolverState(self.solver.classrooms, self.solver.faculty, self.solver.batches, self.solver.working_days)
+        for it in items:
+            if self._place(it, state, (it['room'], it['faculty'], it['day'], it['start'])) is not None:
+                raise ValueError(f"timetable breaks a hard constraint at {it['batch']}/{it['subject']} {it['day']} {it['start']}")
+        options = [self._options(it) for it in items]
+        by_batch = {}
+        for i, it in enumerate(items):
+            by_batch.setdefault(it['batch'], []).append(i)
+
+        score = self.solver.soft_module.ScoreState(self.objective, items) if self.scoring == "delta" else None
+        current = initial = score.value if score is not None else self.objective.evaluate(items)
+        best, best_pos = current, self._positions(items)
+        info = {"method": self.method, "iterations": 0, "accepted": 0, "initial": initial}
+        tabu = {}
+
+        def out_of_budget():
+            if self.max_iterations is not None:
+                return info["iterations"] >= self.max_iterations
+            return time.time() - t0 >= self.time_limit
+
+        while items and not out_of_budget():
+            info["iterations"] += 1
+            if self.method == "anneal":
+                changes = self._random_move(items, options, by_batch, rng)
+                undo = self._apply(items, state, changes) if changes else None
+                if undo is None:
+                    continue
+                moves = self._moves(items, undo, changes)
+                value = current + score.delta(moves) if score is not None else self.objective.evaluate(items)
+                delta = value - current
+                if delta >= 0 or rng.random() < math.exp(delta / self._temperature(info["iterations"], t0)):
+                    if score is not None:
+                        score.apply(moves)
+                    current = value
+                    info["accepted"] += 1
+                else:
+                    self._revert(items, state, undo)
+            else:
+                # tabu: best sampled move whose items do not return to a recently left position
+                chosen = None
+                for _ in range(self.tabu_candidates):
+                    changes = self._random_move(items, options, by_batch, rng)
+                    undo = self._apply(items, state, changes) if changes else None
+                    if undo is None:
+                        continue
+                    if score is not None:
+                        value = current + score.delta(self._moves(items, undo, changes))
+                    else:
+                        value = self.objective.evaluate(items)
+                    self._revert(items, state, undo)
+                    banned = any(tabu.get((i, pos), 0) >= info["iterations"] for i, pos in changes)
+                    if banned and value <= best:
+                        continue
+                    if chosen is None or value > chosen[0]:
+                        chosen = (value, changes)
+                if chosen is None:
+                    continue
+                undo = self._apply(items, state, chosen[1])
+                if score is not None:
+                    score.apply(self._moves(items, undo, chosen[1]))
+                for i, pos in undo:
+                    tabu[(i, pos)] = info["iterations"] + self.tabu_tenure
+                current = chosen[0]
+                info["accepted"] += 1
+            if current > best:
+                best, best_pos = current, self._positions(items)
+
+        for it, pos in zip(items, best_pos):
+            it['room'], it['faculty'], it['day'], it['start'] = pos
+        # one full evaluation of the result, whichever scoring priced the moves
+        info["final"] = self.objective.evaluate(items)
+        info["seconds"] = round(time.time() - t0, 3)
+        return self._timetable(timetable, items), info
+
+    def _temperature(self, iteration, t0):
+        if self.max_iterations is not None:
+            frac = iteration / float(self.max_iterations)
+        else:
+            frac = (time.time() - t0) / self.time_limit if self.time_limit > 0 else 1.0
+        frac = min(max(frac, 0.0), 1.0)
+        return self.start_temperature * (self.end_temperature / self.start_temperature) ** frac
+
+    @staticmethod
+    def _moves(items, undo, changes):
+        """ScoreState moves for `changes`, given the undo list (old positions) _apply returned."""
+        return [(items[i], old, new) for (i, old), (_, new) in zip(undo, changes)]
+
+    @staticmethod
+    def _positions(items):
+        return [(it['room'], it['faculty'], it['day'], it['start']) for it in items]
+
+    def _timetable(self, original, items):
+        tt = original.__class__(semesters=original.semesters, working_days=original.working_days, slots=original.slots)
+        tt.metadata = dict(original.metadata)
+        fields = ("batch", "subject", "faculty", "room", "batch_size", "duration", "is_lab")
+        for it in items:
+            tt.assign(it['semester'], it['day'], it['start'], {k: it[k] for k in fields if k in it})
+        return tt
@@ -0,0 +1,132 @@
+# timetable_scheduler/scheduler/metrics.py
+"""
+Search metrics of TimetableSolver and optional profiling of a pipeline run.
+
+SolveMetrics is what one solve() measures besides the `stats` counters:
+
+  - phases: calls and seconds of domain generation (per node), assign and
+    unassign (occupancy, forward checking and bookkeeping of one candidate),
+    signature, score and write (building the Timetable of a solution)
+  - depths: per search depth (sessions placed), the nodes expanded there and
+    the smallest, mean and largest domain they had
+  - attempts: per seed, its nodes, backtracks, seconds and outcome
+    ("solution", "failed", "timeout")
+
+Timers are perf_counter pairs around work that already costs several times
+more, and everything is plain lists and dicts so forked workers and
+decomposed components merge by adding up their raw() counters.
+
+Profiler wraps a run in cProfile and/or tracemalloc when timetable_constraints.json
+asks for it ("profile": true, or {"cprofile": true, "tracemalloc": true, "top": 30}),
+and reports the top functions and allocation sites as JSON. It sees the
+calling process only, so profile with workers 1.
+"""
+
+import time
+
+PHASES = ("domain", "assign", "unassign", "signature", "score", "write")
+
+clock = time.perf_counter
+
+
+class SolveMetrics:
+    def __init__(self):
+        # phase -> [calls, seconds]
+        self.phases = {p: [0, 0.0] for p in PHASES}
+        # per depth: [nodes, domain size sum, min, max]
+        self.depths = []
+        self.attempts = []
+
+    def node(self, depth, size):
+        depths = self.depths
+        while len(depths) <= depth:
+            depths.append([0, 0, None, 0])
+        d = depths[depth]
+        d[0] += 1
+        d[1] += size
+        if d[2] is None or size < d[2]:
+            d[2] = size
+        if size > d[3]:
+            d[3] = size
+
+    def attempt(self, seed, nodes, backtracks, seconds, outcome):
+        self.attempts.append({"seed": seed, "nodes": nodes, "backtracks": backtracks, "seconds": round(seconds, 6),
+                              "outcome": outcome})
+
+    def to_dict(self):
+        return {"phases": {p: {"calls": c, "seconds": round(s, 6)} for p, (c, s) in self.phases.items()},
+                "depths": [{"depth": i, "nodes": n, "min_domain": lo, "mean_domain": round(total / n, 2), "max_domain": hi}
+                           for i, (n, total, lo, hi) in enumerate(self.depths) if n],
+                "attempts": list(self.attempts)}
+
+    def raw(self):
+        """The picklable counters merge() adds up (what forked workers send back)."""
+        return {"phases": self.phases, "depths": self.depths, "attempts": self.attempts}
+
+    def merge(self, raw):
+        """Add the raw() of another solve (a worker's attempt, a component) into this one."""
+        for p, (calls, seconds) in raw["phases"].items():
+            acc = self.phases.setdefault(p, [0, 0.0])
+            acc[0] += calls
+            acc[1] += seconds
+        for depth, (n, total, lo, hi) in enumerate(raw["depths"]):
+            if not n:
+                continue
+            while len(self.depths) <= depth:
+                self.depths.append([0, 0, None, 0])
+            acc = self.depths[depth]
+            acc[0] += n
+            acc[1] += total
+            acc[2] = lo if acc[2] is None else min(acc[2], lo)
+            acc[3] = max(acc[3], hi)
+        self.attempts.extend(raw["attempts"])
+
+
+class Profiler:
+    """start() ... stop() (or `with Profiler(setting):`) profiles as configured; report() is None when nothing was asked for."""
+    def __init__(self, setting=None):
+        setting = {"cprofile": True, "tracemalloc": True} if setting is True else dict(setting or {})
+        self.cprofile = bool(setting.get("cprofile"))
+        self.tracemalloc = bool(setting.get("tracemalloc"))
+        self.top = int(setting.get("top", 30))
+        self._profile = self._snapshot = None
+        self._peak = 0
+
+    def start(self):
+        if self.tracemalloc:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+        if self.tracemalloc:
+            import tracemalloc
+            self._peak = tracemalloc.get_traced_memory()[1]
+            self._snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def report(self):
+        out = {}
+        if self._profile is not None:
+            import pstats
+            stats = pstats.Stats(self._profile).stats
+            rows = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)[:self.top]
+            out["cprofile"] = [{"function": f"{file}:{line}({name})", "calls": nc, "tottime": round(tt, 6),
+                                "cumtime": round(ct, 6)} for (file, line, name), (_, nc, tt, ct, _) in rows]
+        if self._snapshot is not None:
+            out["tracemalloc"] = {"peak_mb": round(self._peak / 1e6, 3), "top": [
+                {"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size_kb": round(s.size / 1024, 1),
+                 "count": s.count} for s in self._snapshot.statistics("lineno")[:self.top]]}
+        return out or None
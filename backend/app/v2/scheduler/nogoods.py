@@ -0,0 +1,63 @@
+# timetable_scheduler/scheduler/nogoods.py
+"""
+Bounded cache of learned nogoods for TimetableSolver(backjumping=True).
+
+A nogood is a set of placements (session index, candidate) that no complete
+timetable can contain together; conflict-directed backjumping produces one each
+time a session runs out of values. The cache keeps the most recently useful
+`limit` nogoods with at most `max_size` placements and lives across the
+restarts of one `solve()` call.
+"""
+
+from collections import OrderedDict
+
+
+class NogoodCache:
+    def __init__(self, limit=2000, max_size=8):
+        self.limit = int(limit)
+        self.max_size = int(max_size)
+        self.nogoods = OrderedDict()   # frozenset of (si, cand) -> None, LRU order
+        self.watch = {}                # (si, cand) -> set of nogoods containing it
+        self.learned = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self.nogoods)
+
+    def learn(self, placements):
+        """Record `placements` (iterable of (si, cand)); returns True if it was stored."""
+        ng = frozenset(placements)
+        if not ng or len(ng) > self.max_size or self.limit <= 0:
+            return False
+        if ng in self.nogoods:
+            self.nogoods.move_to_end(ng)
+            return False
+        self.nogoods[ng] = None
+        for lit in ng:
+            self.watch.setdefault(lit, set()).add(ng)
+        self.learned += 1
+        while len(self.nogoods) > self.limit:
+            old, _ = self.nogoods.popitem(last=False)
+            for lit in old:
+                bucket = self.watch.get(lit)
+                if bucket is not None:
+                    bucket.discard(old)
+                    if not bucket:
+                        del self.watch[lit]
+        return True
+
+    def blocking(self, si, cand, placement):
+        """
+        If placing session `si` on `cand` would complete a nogood given the
+        current `placement` (si -> cand), return the other sessions of that
+        nogood (the culprits); otherwise None.
+        """
+        bucket = self.watch.get((si, cand))
+        if not bucket:
+            return None
+        for ng in bucket:
+            if all(s == si or placement.get(s) == c for s, c in ng):
+                self.nogoods.move_to_end(ng)
+                self.hits += 1
+                return {s for s, _ in ng if s != si}
+        return None
@@ -0,0 +1,264 @@
+# timetable_scheduler/scheduler/preanalysis.py
+"""
+Infeasibility pre-analysis for TimetableSolver: demand against supply bounds
+checked before any search, in milliseconds.
+
+Every check is a relaxation of the timetable problem (with the models'
+current occupancy and any pinned placements), so a violated bound proves that
+no complete timetable exists:
+  no_candidates          a session has no static (room, faculty, day, start)
+                         candidate, or none of its faculty has the hours left
+  batch_slots            a batch needs more slots than it has free on its days
+  batch_fixed_lab_days   a batch has more lab sessions than days its semester's
+                         fixed lab window is free
+  faculty_hours          sessions need more hours than their eligible faculty can
+  faculty_lab_hours      give (free slots, minus hours already assigned, within
+  faculty_lecture_hours  the weekly, lab and lecture caps)
+  room_slots             sessions need more slots than their suitable rooms have free
+  fixed_lab_rooms        fixed-slot lab sessions outnumber the (room, day) or
+  fixed_lab_faculty      (faculty, day) pairs where their window is free
+
+The faculty and room bounds are bipartite matchings: sessions are grouped by
+their set of eligible resources and a max flow sends each group's demand to
+the capacity of its resources. A shortage spread over several subjects that
+share faculty (or several batches that share rooms) is caught as well as a
+single one's, and explained by the groups left on the source side of the
+minimum cut: what they need and the most their resources can serve.
+"""
+
+import time
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def max_flow(groups, capacity):
+    """
+    Max flow from demand groups to resources (Dinic's algorithm; paths are source, group, resource, sink).
+
+    Args:
+        groups (list[tuple[int, list]]): (demand, ids of the resources it may use).
+        capacity (dict): resource id -> units it can serve.
+    Returns (flow, indexes of the groups on the source side of a minimum cut).
+    """
+    at = {rid: len(groups) + 1 + i for i, rid in enumerate(capacity)}
+    sink = len(groups) + len(capacity) + 1
+    graph = [[] for _ in range(sink + 1)]
+    to, cap = [], []
+
+    def edge(u, v, c):
+        graph[u].append(len(to))
+        to.append(v)
+        cap.append(c)
+        graph[v].append(len(to))
+        to.append(u)
+        cap.append(0)
+
+    for gi, (demand, rids) in enumerate(groups):
+        edge(0, gi + 1, demand)
+        for rid in rids:
+            edge(gi + 1, at[rid], demand)
+    for rid, units in capacity.items():
+        edge(at[rid], sink, units)
+
+    def levels():
+        level = [-1] * (sink + 1)
+        level[0] = 0
+        frontier = [0]
+        while frontier:
+            nxt = []
+            for u in frontier:
+                for e in graph[u]:
+                    if cap[e] > 0 and level[to[e]] < 0:
+                        level[to[e]] = level[u] + 1
+                        nxt.append(to[e])
+            frontier = nxt
+        return level
+
+    def push(u, limit, level, it):
+        if u == sink:
+            return limit
+        edges = graph[u]
+        while it[u] < len(edges):
+            e = edges[it[u]]
+            v = to[e]
+            if cap[e] > 0 and level[v] == level[u] + 1:
+                sent = push(v, min(limit, cap[e]), level, it)
+                if sent:
+                    cap[e] -= sent
+                    cap[e ^ 1] += sent
+                    return sent
+            it[u] += 1
+        return 0
+
+    flow = 0
+    while True:
+        level = levels()
+        if level[sink] < 0:
+            return flow, [gi for gi in range(len(groups)) if level[gi + 1] >= 0]
+        it = [0] * (sink + 1)
+        sent = push(0, float("inf"), level, it)
+        while sent:
+            flow += sent
+            sent = push(0, float("inf"), level, it)
+
+
+def _bipartite(code, what, unit, sessions, members, capacity):
+    """
+    A finding when the sessions `members` (session index -> eligible resource ids,
+    demand) cannot all be served by `capacity`, else None.
+    """
+    grouped = {}
+    for si, (rids, demand) in members.items():
+        group = grouped.setdefault(tuple(rids), [0, []])
+        group[0] += demand
+        group[1].append(si)
+    keys = list(grouped)
+    flow, side = max_flow([(grouped[k][0], k) for k in keys], capacity)
+    total = sum(g[0] for g in grouped.values())
+    if flow >= total:
+        return None
+    need = sum(grouped[keys[gi]][0] for gi in side)
+    short = [si for gi in side for si in grouped[keys[gi]][1]]
+    resources = sorted({rid for gi in side for rid in keys[gi]})
+    subjects = sorted({sessions[si]['subject'] for si in short})
+    supply = need - (total - flow)
+    return {"check": code, "demand": need, "supply": supply, "sessions": len(short), "subjects": subjects,
+            "batches": sorted({sessions[si]['batch'] for si in short}), "resources": resources,
+            "message": f"{', '.join(subjects)} need {need} {unit}; {what} "
+                       f"{', '.join(map(str, resources)) or '(none)'} can give at most {supply}"}
+
+
+def analyze(solver, sessions):
+    """
+    Run every bound on `sessions` against the solver's current state.
+
+    Returns {"infeasible": bool, "findings": [...], "seconds": s}; each finding has
+    "check", "demand", "supply", "message" and the batches/subjects/resources involved.
+    """
+    t0 = time.perf_counter()
+    state = solver._state if solver._state is not None else solver._solver_state()
+    index = solver._candidate_index()
+    window = solver.state_module.window_mask
+    n_days = len(state.days)
+    findings = []
+
+    fac_free = {fid: [state.fac_free[at + di] for di in range(n_days)] for fid, at in state.fac_at.items()}
+    room_free = {rid: [state.room_free[at + di] for di in range(n_days)] for rid, at in state.room_at.items()}
+    hours_left, lab_left, lecture_left = {}, {}, {}
+    for fid, fi in state.fac_no.items():
+        free = sum(popcount(m) for m in fac_free[fid])
+        hours_left[fid] = max(0, min(free, state.max_hours[fi] - state.hours[fi]))
+        lab_left[fid] = max(0, min(hours_left[fid], state.max_lab[fi] - state.lab_hours[fi]))
+        lecture_left[fid] = max(0, min(hours_left[fid], state.max_lecture[fi] - state.lecture_hours[fi]))
+
+    # kind of session -> its no_candidates finding, or None when it has a candidate
+    kinds, live = {}, []
+    for si, sess in enumerate(sessions):
+        key = (sess['batch'], sess['subject'], sess['is_lab'], sess['batch_size'], sess['duration'], sess['semester'])
+        if key not in kinds:
+            reason = _no_candidate(solver, state, index, sess, lab_left if sess['is_lab'] else lecture_left)
+            kinds[key] = None if reason is None else {
+                "check": "no_candidates", "demand": 0, "supply": 0, "sessions": 0, "subjects": [sess['subject']],
+                "batches": [sess['batch']], "resources": [], "message": f"{sess['batch']}/{sess['subject']}: {reason}"}
+            if kinds[key] is not None:
+                findings.append(kinds[key])
+        if kinds[key] is None:
+            live.append(si)
+        else:
+            kinds[key]["sessions"] += 1
+
+    # per batch: slots needed against free slots on its days, and fixed-slot labs against days
+    by_batch, fixed_by_batch = {}, {}
+    for si in live:
+        sess = sessions[si]
+        need = by_batch.setdefault(sess['batch'], [0, 0])
+        need[0] += int(sess['duration'])
+        need[1] += 1
+        fixed = solver.fixed_lab_slots.get(str(sess['semester'])) if sess['is_lab'] else None
+        if fixed is not None:
+            key = (sess['batch'], fixed, int(sess['duration']))
+            fixed_by_batch[key] = fixed_by_batch.get(key, 0) + 1
+    for bid, (need, count) in by_batch.items():
+        at = state.batch_at[bid]
+        supply = sum(popcount(state.batch_free[at + state.day_index[d]]) for d in index.days(bid))
+        if need > supply:
+            findings.append({"check": "batch_slots", "demand": need, "supply": supply, "sessions": count, "subjects": [],
+                             "batches": [bid], "resources": [],
+                             "message": f"batch {bid} needs {need} slots; it has {supply} free on its days"})
+    for (bid, fixed, dur), need in fixed_by_batch.items():
+        at, w = state.batch_at[bid], window(fixed, dur)
+        supply = sum(1 for d in index.days(bid) if w and state.batch_free[at + state.day_index[d]] & w == w)
+        if need > supply:
+            findings.append({"check": "batch_fixed_lab_days", "demand": need, "supply": supply, "sessions": need,
+                             "subjects": [], "batches": [bid], "resources": [],
+                             "message": f"batch {bid} has {need} lab sessions at fixed slot {fixed}; "
+                                        f"that window is free on {supply} of its days"})
+
+    # faculty: hours of every session, of the lab and of the lecture sessions
+    facs = {si: [f.id for f in index.plan(sessions[si])[1]] for si in live}
+    for code, keep, left in (("faculty_hours", None, hours_left), ("faculty_lab_hours", True, lab_left),
+                             ("faculty_lecture_hours", False, lecture_left)):
+        members = {si: (facs[si], int(sessions[si]['duration'])) for si in live
+                   if keep is None or bool(sessions[si]['is_lab']) == keep}
+        found = _bipartite(code, "their faculty", "faculty hours", sessions, members, left) if members else None
+        # the lab or lecture bound of a shortage the hours bound already reported adds nothing
+        if found and not any(f["check"] == "faculty_hours" and f["message"] == found["message"] for f in findings):
+            findings.append(found)
+
+    # rooms: slots of every session against the suitable rooms' free slots
+    room_slots = {rid: sum(popcount(m) for m in masks) for rid, masks in room_free.items()}
+    members = {si: ([r.id for r in index.plan(sessions[si])[0]], int(sessions[si]['duration'])) for si in live}
+    found = _bipartite("room_slots", "their rooms", "room slots", sessions, members, room_slots) if members else None
+    if found:
+        findings.append(found)
+
+    # fixed lab windows: one lab session per (room, day) and (faculty, day) where the window is free
+    windows = {}
+    for si in live:
+        sess = sessions[si]
+        fixed = solver.fixed_lab_slots.get(str(sess['semester'])) if sess['is_lab'] else None
+        if fixed is not None:
+            windows.setdefault((fixed, int(sess['duration'])), []).append(si)
+    for (fixed, dur), group in sorted(windows.items()):
+        w = window(fixed, dur)
+        if not w:
+            continue
+        rooms = {rid: sum(1 for m in masks if m & w == w) for rid, masks in room_free.items()}
+        found = _bipartite("fixed_lab_rooms", f"their lab rooms free at slot {fixed}", "lab sessions at fixed slots",
+                           sessions, {si: ([r.id for r in index.plan(sessions[si])[0]], 1) for si in group}, rooms)
+        if found:
+            findings.append(found)
+        teach = {fid: min(sum(1 for m in masks if m & w == w), lab_left[fid] // dur) for fid, masks in fac_free.items()}
+        found = _bipartite("fixed_lab_faculty", f"their faculty free at slot {fixed}", "lab sessions at fixed slots",
+                           sessions, {si: (facs[si], 1) for si in group}, teach)
+        if found:
+            findings.append(found)
+
+    return {"infeasible": bool(findings), "findings": findings, "seconds": round(time.perf_counter() - t0, 6)}
+
+
+def _no_candidate(solver, state, index, sess, type_left):
+    """Why `sess` has no static candidate (None when it has one)."""
+    rooms, facs, days, starts = index.plan(sess)
+    if not rooms or not facs:
+        return solver.unplaced_module.static_reason(solver, sess)
+    dur = int(sess['duration'])
+    facs = [f for f in facs if type_left[f.id] >= dur]
+    if not facs:
+        kind = "lab" if sess['is_lab'] else "lecture"
+        return f"every faculty teaching {sess['subject']} has used up its weekly or {kind} hours"
+    batch_at = state.batch_at[sess['batch']]
+    room_at = [state.room_at[r.id] for r in rooms]
+    fac_at = [state.fac_at[f.id] for f in facs]
+    for day in days:
+        di = state.day_index[day]
+        batch_free = state.batch_free[batch_at + di]
+        for start, w in starts:
+            if w is None or batch_free & w != w:
+                continue
+            if any(state.room_free[at + di] & w == w for at in room_at) and \
+                    any(state.fac_free[at + di] & w == w for at in fac_at):
+                return None
+    return solver.unplaced_module.static_reason(solver, sess)
@@ -0,0 +1,187 @@
+# timetable_scheduler/scheduler/resolve.py
+"""
+Incremental re-solve: repair a previous timetable after small data changes
+instead of solving from scratch.
+
+Resolver matches the sessions of the previous timetable (a timetable_top_N.json
+"schedule") to the sessions of the new data by batch and subject, in day/slot
+order, and keeps every one that is still valid as a pin:
+  - its (room, faculty, day, start) is still one of the session's static
+    candidates (room type and capacity, faculty eligibility and availability,
+    batch days, fixed lab slots)
+  - it does not collide with the pins before it or push a faculty over an hour cap
+The remaining sessions (invalidated, or new) are searched with the pins booked
+in the solver's state, candidates nearest to each session's previous placement
+first (TimetableSolver.perturbation), and the solutions are ranked by total
+perturbation, then score. When the pins leave no room for them, the sessions
+sharing a batch or an eligible faculty with them are released too, and as a
+last round every session (each still anchored at its previous placement),
+unless one of them has no candidate at all.
+
+The search runs in "regenerate" domain mode without backjumping (static
+domains and learned nogoods would not know about the pins), and with MRV
+ordering so a session the pins leave no candidate fails at once.
+"""
+
+import time
+
+
+def previous_placements(solver, schedule):
+    """Sessions of a previous `schedule` as dicts with batch, subject, room, faculty, day, start, duration, in day/slot order."""
+    tt = solver.timetable_module.Timetable(working_days=solver.working_days, slots=solver.slots)
+    tt.schedule = schedule
+    days = {d: i for i, d in enumerate(solver.working_days)}
+    items = solver.soft_module.timetable_items(tt)
+    items.sort(key=lambda it: (days.get(it['day'], len(days)), int(it['start']) if str(it['start']).isdigit() else 0))
+    return items
+
+
+class Resolver:
+    def __init__(self, solver, sessions, previous):
+        """
+        Args:
+            solver (TimetableSolver): built on the new data; its time_limit is the re-solve budget.
+            sessions (list[dict]): the new data's sessions (TimetableSolver._generate_sessions).
+            previous (dict): a timetable_top_N.json document, or just its "schedule".
+        """
+        self.solver = solver
+        self.sessions = sessions
+        schedule = previous.get("schedule", previous) if isinstance(previous, dict) else None
+        if not isinstance(schedule, dict):
+            raise ValueError("previous timetable must be a timetable_top_N.json object or its schedule")
+        self.previous = previous_placements(solver, schedule)
+        self.anchors, self.dropped = self._match()
+        self.pinned, self.invalid = self._validate()
+
+    def _match(self):
+        """{session index: previous (room, faculty, day, start)} and the previous sessions no new session took."""
+        queues = {}
+        for it in self.previous:
+            queues.setdefault((it['batch'], it['subject']), []).append(it)
+        anchors = {}
+        for si, sess in enumerate(self.sessions):
+            queue = queues.get((sess['batch'], sess['subject']))
+            if queue:
+                it = queue.pop(0)
+                anchors[si] = (it['room'], it['faculty'], it['day'], str(it['start']), int(it.get('duration', 1)))
+        dropped = [{k: it.get(k) for k in ("batch", "subject", "day", "start")} for queue in queues.values() for it in queue]
+        return anchors, dropped
+
+    def _validate(self):
+        """(pins {session index: candidate}, {invalidated session index: reason})."""
+        solver = self.solver
+        statics = self.statics = solver._static_domains(self.sessions)
+        state = solver.state_module.SolverState(solver.classrooms, solver.faculty, solver.batches, solver.working_days)
+        pinned, invalid = {}, {}
+        for si, sess in enumerate(self.sessions):
+            anchor = self.anchors.get(si)
+            if anchor is None:
+                invalid[si] = "new"
+                continue
+            cand, dur = anchor[:4], anchor[4]
+            if dur != int(sess['duration']):
+                invalid[si] = "duration changed"
+            elif cand not in statics[si]:
+                invalid[si] = "no longer a valid placement"
+            else:
+                failed = state.place(sess['batch'], *cand, dur, bool(sess['is_lab']))
+                if failed is None:
+                    pinned[si] = cand
+                else:
+                    invalid[si] = "faculty hours" if failed == "hours" else f"{failed} clash"
+        return pinned, invalid
+
+    def solve(self, max_solutions=4):
+        """
+        Timetables of every session, least perturbation first, as TimetableSolver.solve
+        returns them; each metadata gets "resolve": pinned/resolved/moved counts, the
+        rounds used, the invalidated sessions with their reason and the dropped ones.
+        """
+        solver = self.solver
+        budget, start = solver.time_limit, time.time()
+        # the rounds need pinned placements and previous-candidate hints, which only the
+        # regenerating backtracking search reads; the caller's options come back after
+        options = {name: getattr(solver, name) for name in ("domain_mode", "backjumping", "engine", "ordering")}
+        solver.domain_mode, solver.backjumping, solver.engine = "regenerate", False, "backtracking"
+        if solver.ordering == "static":
+            solver.ordering = "mrv"
+        neighbors = solver._session_neighbors(self.sessions)
+        free = set(self.invalid)
+        results, rounds = [], 0
+        try:
+            while True:
+                rounds += 1
+                last = len(free) == len(self.sessions)
+                remaining = budget - (time.time() - start)
+                if remaining <= 0:
+                    break
+                # an infeasible round keeps half of what is left for the wider ones
+                solver.time_limit = remaining if last else remaining / 2
+                order = sorted(free)
+                solver.pinned = [(self.sessions[si], cand) for si, cand in self.pinned.items() if si not in free]
+                sub = [dict(self.sessions[si], previous=self.anchors[si][:4]) if si in self.anchors else self.sessions[si]
+                       for si in order]
+                found = solver.solve(sub, max_solutions=max_solutions) if sub else [self._merge([], [], {})]
+                found = [r for r in found if not r.get('partial')] or (found if last else [])
+                if found:
+                    results = [self._merge(order, sub, r) if sub else r for r in found]
+                    break
+                if last or solver.cancelled or any(not self.statics[si] for si in free):
+                    # releasing more sessions cannot give a candidate-less session a place
+                    break
+                wider = free | {n for si in free for n in neighbors[si]}
+                free = wider if len(wider) > len(free) else set(range(len(self.sessions)))
+        finally:
+            solver.pinned = None
+            solver.time_limit = budget
+            for name, value in options.items():
+                setattr(solver, name, value)
+        for res in results:
+            res['timetable'].metadata['resolve'] = dict(res['timetable'].metadata.get('resolve', {}), rounds=rounds)
+        results.sort(key=lambda r: (r['perturbation'], -r['score']))
+        return results
+
+    def _merge(self, order, sub, res):
+        """A result for every session: the pins plus a sub-solve result `res` over sessions[order]."""
+        solver = self.solver
+        tt = solver.timetable_module.Timetable(semesters=sorted(list(set([s['semester'] for s in self.sessions]))),
+                                               working_days=solver.working_days, slots=solver.slots)
+        solved = set(order)
+        placed = [(si, cand) for si, cand in self.pinned.items() if si not in solved]
+        sub_tt = res.get('timetable')
+        if sub_tt is not None:
+            tt.metadata = dict(sub_tt.metadata)
+            position = {si: i for i, si in enumerate(order)}
+            by_key = {}
+            for it in solver.soft_module.timetable_items(sub_tt):
+                by_key.setdefault((it['batch'], it['subject']), []).append((it['room'], it['faculty'], it['day'], str(it['start'])))
+            for si in order:
+                queue = by_key.get((sub[position[si]]['batch'], sub[position[si]]['subject']))
+                if queue:
+                    # sessions of one batch and subject are interchangeable: give each the
+                    # new position nearest its anchor
+                    anchor = self.anchors.get(si)
+                    best = min(queue, key=lambda c: solver.perturbation(anchor[:4], c)) if anchor else queue[0]
+                    queue.remove(best)
+                    placed.append((si, best))
+        solver._write_sessions(tt, self.sessions, sorted(placed))
+        final = dict(placed)
+        moved = [si for si, anchor in self.anchors.items() if si in final and final[si] != anchor[:4]]
+        perturbation = sum(solver.perturbation(self.anchors[si][:4], final[si]) for si in moved)
+        unplaced = [si for si in range(len(self.sessions)) if si not in final]
+        describe = solver.unplaced_module.describe
+        tt.metadata['resolve'] = {
+            "pinned": len(self.pinned) - len(solved & set(self.pinned)),
+            "resolved": len(order),
+            "moved": len(moved),
+            "new": sum(1 for r in self.invalid.values() if r == "new"),
+            "perturbation": perturbation,
+            "invalidated": [dict(describe(self.sessions[si]), reason=reason) for si, reason in sorted(self.invalid.items())],
+            "dropped": self.dropped,
+        }
+        if unplaced:
+            tt.metadata.update(placed=len(final), total=len(self.sessions))
+        out = {"timetable": tt, "score": solver.score(tt), "signature": tt.signature(), "perturbation": perturbation}
+        if res.get('partial'):
+            out['partial'] = True
+        return out
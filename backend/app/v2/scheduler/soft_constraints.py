@@ -0,0 +1,286 @@
+# timetable_scheduler/scheduler/soft_constraints.py
+"""
+Weighted soft-constraint objective for finished timetables.
+
+Weights come from the `soft_constraints` block of timetable_constraints.json
+(`{"name": {"weight": w, ...}}`, as in the v1 data, or `{"name": w}`); names
+that are not declared keep the defaults below, a weight of 0 switches one off.
+The objective is higher-is-better: preferred faculty slots add their weight,
+every other constraint subtracts weight x violations, with violations counted
+per resource-day on slot bitmasks:
+
+  faculty_preferred_slots  session slots on a faculty's preferred day and slot (reward)
+  balanced_distribution    per batch-day, slots above ceil(weekly slots / days), plus
+                           repeat sessions of one subject on the same day
+  minimize_gaps            per batch-day, idle slots between the first and last class
+  avoid_faculty_overload   per faculty-day, slots beyond `max_consecutive` (default 3)
+                           in one back-to-back run
+  core_subjects_morning    theory sessions starting after the morning half of the day,
+                           electives (subject type "elective") starting inside it
+  minimize_free_periods    per faculty-day, idle slots between the first and last class
+
+SoftObjective.components() recomputes everything from a list of sessions;
+ScoreState keeps the per batch-day / faculty-day / subject-day aggregates and
+prices a move or placement from the cells it touches only.
+"""
+
+import math
+
+DEFAULT_WEIGHTS = {
+    "faculty_preferred_slots": 5,
+    "balanced_distribution": 4,
+    "minimize_gaps": 3,
+    "avoid_faculty_overload": 4,
+    "core_subjects_morning": 3,
+    "minimize_free_periods": 2,
+}
+REWARDS = ("faculty_preferred_slots",)
+
+
+def load_weights(soft_constraints=None):
+    """(weights, options) from a `soft_constraints` block; options keep the extra keys of each entry."""
+    weights = dict(DEFAULT_WEIGHTS)
+    options = {}
+    for name, entry in (soft_constraints or {}).items():
+        if name not in DEFAULT_WEIGHTS:
+            continue
+        if isinstance(entry, dict):
+            weights[name] = float(entry.get("weight", DEFAULT_WEIGHTS[name]))
+            options[name] = {k: v for k, v in entry.items() if k not in ("weight", "description")}
+        else:
+            weights[name] = float(entry)
+    return weights, options
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def span_gaps(mask):
+    """Unused slots between the lowest and highest set bit."""
+    if not mask:
+        return 0
+    lo = (mask & -mask).bit_length() - 1
+    return mask.bit_length() - lo - popcount(mask)
+
+
+def overload(mask, limit):
+    """Slots beyond `limit` in every run of consecutive set bits."""
+    excess = 0
+    while mask:
+        low = mask & -mask
+        run = 0
+        while mask & low:
+            run += 1
+            mask &= ~low
+            low <<= 1
+        excess += max(0, run - limit)
+    return excess
+
+
+def timetable_items(timetable):
+    """
+    One dict per placed session of `timetable` (the assignment fields plus
+    semester, day and start slot), in timetable order. Consecutive slots holding
+    an equal assignment are one session until its duration is used up.
+    """
+    items = []
+    for sem, days in timetable.schedule.items():
+        for day, cells in days.items():
+            open_runs = []   # [item, slots still to see]
+            for slot in sorted(cells, key=lambda x: int(x) if str(x).isdigit() else x):
+                still_open = []
+                assigns = list(cells[slot])
+                for run in open_runs:
+                    a = run[0]['assignment']
+                    if a in assigns:
+                        assigns.remove(a)
+                        run[1] -= 1
+                        if run[1] > 0:
+                            still_open.append(run)
+                for a in assigns:
+                    item = dict(a)
+                    item.update(semester=sem, day=day, start=str(slot), assignment=a)
+                    items.append(item)
+                    if int(a.get('duration', 1)) > 1:
+                        still_open.append([item, int(a.get('duration', 1)) - 1])
+                open_runs = still_open
+    for item in items:
+        del item['assignment']
+    return items
+
+
+class SoftObjective:
+    def __init__(self, solver, soft_constraints=None):
+        """
+        Args:
+            solver (TimetableSolver): supplies the faculty/subject/batch models, days and slots.
+            soft_constraints (dict): the `soft_constraints` block of timetable_constraints.json.
+        """
+        self.solver = solver
+        self.weights, self.options = load_weights(soft_constraints)
+        self.max_consecutive = int(self.options.get("avoid_faculty_overload", {}).get("max_consecutive", 3))
+        slot_ids = [int(s) for s in solver.slots]
+        self.morning = set(slot_ids[:int(math.ceil(len(slot_ids) / 2.0))])
+        self.preferred = {fid: (set(f.preferred_days), set(f.preferred_slots)) for fid, f in solver.faculty.items()}
+        self.days_of = {}
+        for bid, b in solver.batches.items():
+            days = [d for d in b.available_days if d in solver.working_days] if getattr(b, 'available_days', None) else []
+            self.days_of[bid] = len(days or solver.working_days)
+
+    def subject_kind(self, subject_id):
+        """'lab', 'elective' or 'core'."""
+        subj = self.solver.subjects.get(subject_id)
+        if subj is None:
+            return "core"
+        if subj.is_lab():
+            return "lab"
+        return "elective" if getattr(subj, 'type', '') == "elective" else "core"
+
+    def preferred_hits(self, fac_id, day, start, duration):
+        days, slots = self.preferred.get(fac_id, ((), ()))
+        if day not in days:
+            return 0
+        return sum(1 for s in range(start, start + duration) if str(s) in slots)
+
+    def misplaced(self, subject_id, start):
+        """1 if a session of the subject starting at `start` breaks core_subjects_morning."""
+        kind = self.subject_kind(subject_id)
+        return int((kind == "core" and start not in self.morning) or (kind == "elective" and start in self.morning))
+
+    def target(self, batch_id, total_slots):
+        """Slots per day above which a batch-day counts against balanced_distribution."""
+        return int(math.ceil(total_slots / float(self.days_of.get(batch_id) or 1)))
+
+    def components(self, items):
+        """Raw count per soft constraint (hits for rewards, violations otherwise), recomputed from scratch."""
+        counts = dict.fromkeys(DEFAULT_WEIGHTS, 0)
+        batch_day, fac_day, batch_total, subj_day = {}, {}, {}, {}
+        for it in items:
+            start, dur, day = int(it['start']), int(it['duration']), it['day']
+            window = ((1 << dur) - 1) << start
+            counts["faculty_preferred_slots"] += self.preferred_hits(it['faculty'], day, start, dur)
+            key = (it['batch'], day)
+            batch_day[key] = batch_day.get(key, 0) | window
+            key = (it['faculty'], day)
+            fac_day[key] = fac_day.get(key, 0) | window
+            batch_total[it['batch']] = batch_total.get(it['batch'], 0) + dur
+            key = (it['batch'], day, it['subject'])
+            subj_day[key] = subj_day.get(key, 0) + 1
+            counts["core_subjects_morning"] += self.misplaced(it['subject'], start)
+        for (bid, day), mask in batch_day.items():
+            counts["balanced_distribution"] += max(0, popcount(mask) - self.target(bid, batch_total[bid]))
+            counts["minimize_gaps"] += span_gaps(mask)
+        counts["balanced_distribution"] += sum(n - 1 for n in subj_day.values() if n > 1)
+        for mask in fac_day.values():
+            counts["avoid_faculty_overload"] += overload(mask, self.max_consecutive)
+            counts["minimize_free_periods"] += span_gaps(mask)
+        return counts
+
+    def total(self, counts):
+        return sum((1 if name in REWARDS else -1) * self.weights[name] * n for name, n in counts.items())
+
+    def evaluate(self, items):
+        return self.total(self.components(items))
+
+    def score_timetable(self, timetable):
+        return self.evaluate(timetable_items(timetable))
+
+
+class ScoreState:
+    """
+    The soft objective of a changing set of sessions, kept as aggregates:
+    slot bitmasks per batch-day and faculty-day, session counts per
+    batch-day-subject and weekly slots per batch.
+
+    A move is a list of (item, old position, new position) with positions
+    (room, faculty, day, start); None as old position places a new session,
+    None as new position removes one. `delta()` prices a move from the
+    aggregates it touches, `apply()` commits it, and `recompute()` is the
+    full-evaluation path for checking the two agree. Sessions of one batch or
+    one faculty are assumed not to overlap (a hard constraint).
+    """
+
+    def __init__(self, objective, items=()):
+        self.objective = objective
+        self.batch_day, self.fac_day, self.subj_day, self.batch_total = {}, {}, {}, {}
+        self.counts = dict.fromkeys(DEFAULT_WEIGHTS, 0)
+        self.value = 0
+        self.apply([(it, None, position(it)) for it in items])
+
+    def _diff(self, moves):
+        obj = self.objective
+        batch_day, fac_day, subj_day, batch_total = self.batch_day, self.fac_day, self.subj_day, self.batch_total
+        b, f, s, tot = {}, {}, {}, {}
+        dc = dict.fromkeys(DEFAULT_WEIGHTS, 0)
+        # every old position is taken out before any new one goes in, so moves
+        # that trade cells (swaps) never clear a bit another move just set
+        steps = [(it, old, -1) for it, old, _ in moves] + [(it, new, 1) for it, _, new in moves]
+        for it, pos, sign in steps:
+            if pos is None:
+                continue
+            dur, bid, sid = int(it['duration']), it['batch'], it['subject']
+            _, fac, day, start = pos
+            start = int(start)
+            w = ((1 << dur) - 1) << start
+            dc["faculty_preferred_slots"] += sign * obj.preferred_hits(fac, day, start, dur)
+            dc["core_subjects_morning"] += sign * obj.misplaced(sid, start)
+            k = (bid, day)
+            m = b[k] if k in b else batch_day.get(k, 0)
+            b[k] = m | w if sign > 0 else m & ~w
+            k = (fac, day)
+            m = f[k] if k in f else fac_day.get(k, 0)
+            f[k] = m | w if sign > 0 else m & ~w
+            k = (bid, day, sid)
+            s[k] = (s[k] if k in s else subj_day.get(k, 0)) + sign
+        for it, old, new in moves:
+            bid, dur = it['batch'], int(it['duration'])
+            if old is None or new is None:
+                tot[bid] = (tot[bid] if bid in tot else batch_total.get(bid, 0)) + (dur if new is not None else -dur)
+        # a batch whose weekly total changed has a new daily target on every day
+        for bid in tot:
+            for day in obj.solver.working_days:
+                if (bid, day) not in b and (bid, day) in batch_day:
+                    b[(bid, day)] = batch_day[(bid, day)]
+        for (bid, day), mask in b.items():
+            before = batch_day.get((bid, day), 0)
+            t_old = obj.target(bid, batch_total.get(bid, 0))
+            t_new = obj.target(bid, tot[bid]) if bid in tot else t_old
+            dc["balanced_distribution"] += max(0, popcount(mask) - t_new) - max(0, popcount(before) - t_old)
+            dc["minimize_gaps"] += span_gaps(mask) - span_gaps(before)
+        for k, n in s.items():
+            dc["balanced_distribution"] += max(0, n - 1) - max(0, subj_day.get(k, 0) - 1)
+        limit = obj.max_consecutive
+        for k, mask in f.items():
+            before = fac_day.get(k, 0)
+            dc["avoid_faculty_overload"] += overload(mask, limit) - overload(before, limit)
+            dc["minimize_free_periods"] += span_gaps(mask) - span_gaps(before)
+        return dc, b, f, s, tot
+
+    def delta(self, moves):
+        """Change of the objective if `moves` were applied; nothing is modified."""
+        return self.objective.total(self._diff(moves)[0])
+
+    def apply(self, moves):
+        """Commit `moves` and return the objective change."""
+        dc, b, f, s, tot = self._diff(moves)
+        for table, updates in ((self.batch_day, b), (self.fac_day, f), (self.subj_day, s), (self.batch_total, tot)):
+            for k, v in updates.items():
+                if v:
+                    table[k] = v
+                else:
+                    table.pop(k, None)
+        for name, n in dc.items():
+            self.counts[name] += n
+        d = self.objective.total(dc)
+        self.value += d
+        return d
+
+    def recompute(self, items):
+        """Full evaluation of `items` (the sessions this state should describe): (value, counts)."""
+        counts = self.objective.components(items)
+        return self.objective.total(counts), counts
+
+
+def position(item):
+    return (item.get('room'), item['faculty'], item['day'], item['start'])
@@ -0,0 +1,131 @@
+# timetable_scheduler/scheduler/state.py
+"""
+Resettable search state for TimetableSolver.
+
+An attempt used to start from deep copies of every Classroom, Faculty and Batch
+so it could assign into them freely. SolverState instead keeps what the search
+reads and writes in flat lists: one free-slot bitmask per (resource, day)
+(same bit layout as models/occupancy.py) plus the faculty hour counters. It is
+built once per solver, `load()` snapshots the models' current occupancy and
+`reset()` restores that snapshot with a few slice copies. The models are never
+written to.
+"""
+
+import loader
+
+window_mask = loader.load("models/occupancy.py", "timetable_occupancy").window_mask
+
+
+class SolverState:
+    def __init__(self, classrooms, faculty, batches, days):
+        """
+        Args:
+            classrooms, faculty, batches (dict): id -> model, as given to TimetableSolver.
+            days (list[str]): working days; other days are never searched.
+        """
+        self.classrooms = classrooms
+        self.faculty = faculty
+        self.batches = batches
+        self.days = list(days)
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        n = len(self.days)
+        # id -> offset of the resource's first day in the flat lists
+        self.room_at = {rid: i * n for i, rid in enumerate(classrooms)}
+        self.fac_at = {fid: i * n for i, fid in enumerate(faculty)}
+        self.batch_at = {bid: i * n for i, bid in enumerate(batches)}
+        self.fac_no = {fid: i for i, fid in enumerate(faculty)}
+        self.max_hours = [f.max_hours_per_week for f in faculty.values()]
+        self.max_lab = [f.max_lab_hours for f in faculty.values()]
+        self.max_lecture = [f.max_lecture_hours for f in faculty.values()]
+        self.load()
+
+    def _snapshot(self, models):
+        free = []
+        for obj in models.values():
+            for d in self.days:
+                free.append(obj.occupancy.free.get(d, 0))
+        return free
+
+    def load(self):
+        """Take the models' current occupancy and hours as the state every reset returns to."""
+        self._room_base = self._snapshot(self.classrooms)
+        self._fac_base = self._snapshot(self.faculty)
+        self._batch_base = self._snapshot(self.batches)
+        self._hours_base = [f.assigned_hours for f in self.faculty.values()]
+        self._lab_base = [f.assigned_lab_hours for f in self.faculty.values()]
+        self._lecture_base = [f.assigned_lecture_hours for f in self.faculty.values()]
+        self.room_free = list(self._room_base)
+        self.fac_free = list(self._fac_base)
+        self.batch_free = list(self._batch_base)
+        self.hours = list(self._hours_base)
+        self.lab_hours = list(self._lab_base)
+        self.lecture_hours = list(self._lecture_base)
+
+    def commit(self):
+        """Make the current state (e.g. pinned placements on top of load()) the one reset() returns to."""
+        self._room_base = list(self.room_free)
+        self._fac_base = list(self.fac_free)
+        self._batch_base = list(self.batch_free)
+        self._hours_base = list(self.hours)
+        self._lab_base = list(self.lab_hours)
+        self._lecture_base = list(self.lecture_hours)
+
+    def reset(self):
+        """Back to the loaded snapshot, in place (one slice copy per list)."""
+        self.room_free[:] = self._room_base
+        self.fac_free[:] = self._fac_base
+        self.batch_free[:] = self._batch_base
+        self.hours[:] = self._hours_base
+        self.lab_hours[:] = self._lab_base
+        self.lecture_hours[:] = self._lecture_base
+
+    def place(self, batch_id, room_id, fac_id, day, start_slot, duration, is_lab):
+        """
+        Occupy the window for the room, faculty and batch, checking the same
+        rules as their assign() methods. Returns None on success, otherwise
+        which check failed: "room", "faculty", "hours" or "batch" (nothing is
+        changed then).
+        """
+        w = window_mask(start_slot, duration)
+        di = self.day_index.get(day)
+        if not w or di is None:
+            return "room"
+        r = self.room_at[room_id] + di
+        if self.room_free[r] & w != w:
+            return "room"
+        f = self.fac_at[fac_id] + di
+        if self.fac_free[f] & w != w:
+            return "faculty"
+        fi = self.fac_no[fac_id]
+        if self.hours[fi] + duration > self.max_hours[fi]:
+            return "hours"
+        if is_lab and self.lab_hours[fi] + duration > self.max_lab[fi]:
+            return "hours"
+        if not is_lab and self.lecture_hours[fi] + duration > self.max_lecture[fi]:
+            return "hours"
+        b = self.batch_at[batch_id] + di
+        if self.batch_free[b] & w != w:
+            return "batch"
+        self.room_free[r] &= ~w
+        self.fac_free[f] &= ~w
+        self.batch_free[b] &= ~w
+        self.hours[fi] += duration
+        if is_lab:
+            self.lab_hours[fi] += duration
+        else:
+            self.lecture_hours[fi] += duration
+        return None
+
+    def release(self, batch_id, room_id, fac_id, day, start_slot, duration, is_lab):
+        """Undo a successful place() with the same arguments."""
+        w = window_mask(start_slot, duration)
+        di = self.day_index[day]
+        self.room_free[self.room_at[room_id] + di] |= w
+        self.fac_free[self.fac_at[fac_id] + di] |= w
+        self.batch_free[self.batch_at[batch_id] + di] |= w
+        fi = self.fac_no[fac_id]
+        self.hours[fi] -= duration
+        if is_lab:
+            self.lab_hours[fi] -= duration
+        else:
+            self.lecture_hours[fi] -= duration
@@ -1,8 +1,88 @@
 
-import copy, random, time, os, importlib.util
+import random, time, os, multiprocessing, queue
+
+import loader
+
+
+def _module(filename, name):
+    """scheduler/<filename>, loaded once per process through loader.py."""
+    return loader.load(os.path.join("scheduler", filename), name)
+
+
+def _workers(value):
+    # 0/None: one per CPU
+    return int(value) if value else (os.cpu_count() or 1)
+
 
 class TimetableSolver:
-    def __init__(self, slots, working_days, classrooms_map, faculty_map, batches_map, subjects_map, random_seed=42, time_limit=120):
+    DOMAIN_MODES = ("regenerate", "incremental")
+    ORDERINGS = ("static", "mrv", "mrv_degree")
+    ENGINES = ("backtracking", "cpsat", "milp")
+    DOMAIN_BACKENDS = ("python", "numpy")
+    # search options, the keyword arguments after time_limit:
+    # name -> (default, the values it may take, or a converter)
+    OPTIONS = {
+        # "regenerate": rebuild each session's domain at every search node
+        # "incremental": static domains built once, pruned/restored via scheduler/domains.py
+        "domain_mode": ("regenerate", DOMAIN_MODES),
+        # "static": labs first then larger batches (the _generate_sessions order)
+        # "mrv": next session is the unplaced one with the fewest remaining candidates
+        # "mrv_degree": MRV, ties broken by most unplaced sessions sharing a batch or faculty
+        "ordering": ("static", ORDERINGS),
+        # conflict-directed backjumping: failures carry the set of earlier sessions
+        # responsible, the search jumps back to the deepest of them and the sets
+        # are kept as nogoods (bounded by nogood_limit) across restarts
+        "backjumping": (False, bool),
+        "nogood_limit": (2000, int),
+        # attempts are independent, so workers > 1 spreads seeds over forked
+        # processes (0/None: one per CPU)
+        "workers": (1, _workers),
+        # "backtracking": the randomized restarts below; "cpsat" / "milp": an exact
+        # 0/1 model solved by OR-Tools or PuLP (scheduler/exact_solver.py)
+        "engine": ("backtracking", ENGINES),
+        # anytime: when no attempt places every session, solve() returns the attempt
+        # that covered the most session slots as a partial result, with a report of
+        # what blocks each unplaced session (scheduler/unplaced.py)
+        "anytime": (False, bool),
+        # decompose: split the sessions into groups that share no batch, eligible
+        # faculty or suitable room, solve each on its own and merge (scheduler/decompose.py)
+        "decompose": (False, bool),
+        # "numpy": the MRV orderings size domains by a broadcast over boolean
+        # [days, slots] occupancy arrays instead of listing every candidate
+        # (scheduler/feasibility.py, needs NumPy; regenerate domain mode only)
+        "domain_backend": ("python", DOMAIN_BACKENDS),
+        # demand/supply bounds (per session, batch, faculty and room, bipartite
+        # max flows for shared faculty and rooms) checked before the search; a
+        # violated one proves infeasibility and solve() returns [] at once
+        # without searching (anytime still searches for its best partial)
+        # (scheduler/preanalysis.py)
+        "preanalysis": (True, bool),
+    }
+
+    @classmethod
+    def check_options(cls, options):
+        """
+        `options` (name -> value) with every search option filled in and converted;
+        TypeError for an unknown name, ValueError for a value outside its choices.
+        """
+        unknown = sorted(set(options) - set(cls.OPTIONS))
+        if unknown:
+            raise TypeError(f"unknown solver option(s) {unknown}; expected some of {list(cls.OPTIONS)}")
+        checked = {}
+        for name, (default, allowed) in cls.OPTIONS.items():
+            value = options.get(name, default)
+            if isinstance(allowed, tuple):
+                if value not in allowed:
+                    raise ValueError(f"unknown {name} {value!r}; expected one of {allowed}")
+            else:
+                value = allowed(value)
+            checked[name] = value
+        if checked["domain_backend"] == "numpy" and (checked["ordering"] == "static" or checked["domain_mode"] != "regenerate"):
+            # only the MRV orderings size domains, and an incremental store counts them itself
+            raise ValueError("domain_backend 'numpy' needs ordering 'mrv' or 'mrv_degree' with domain_mode 'regenerate'")
+        return checked
+
+    def __init__(self, slots, working_days, classrooms_map, faculty_map, batches_map, subjects_map, random_seed=42, time_limit=120, fixed_lab_slots=None, **options):
         self.slots = list(slots)
         self.working_days = list(working_days)
         self.classrooms = classrooms_map
@@ -12,14 +92,87 @@ class TimetableSolver:
         self.random_seed = int(random_seed) if random_seed is not None else int(time.time())
         self.time_limit = time_limit
         self.start_time = None
-        # load timetable module once
-        timetable_path = os.path.join(os.path.dirname(__file__), "timetable.py")
-        spec = importlib.util.spec_from_file_location("timetable_module", timetable_path)
-        self.timetable_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(self.timetable_module)
+        # domain_mode, ordering, backjumping, ... (OPTIONS) as attributes
+        self.__dict__.update(self.check_options(options))
+        # semester -> start slot every lab session of that semester must use
+        # (v1 fixed_lab_slots_per_semester entries {"start_slot": s, ...} or plain slots)
+        self.fixed_lab_slots = {str(sem): str(v.get('start_slot') if isinstance(v, dict) else v)
+                                for sem, v in (fixed_lab_slots or {}).items()}
+        self.timetable_module = _module("timetable.py", "timetable_module")
+        self.domains_module = _module("domains.py", "domains_module")
+        self.nogoods_module = _module("nogoods.py", "nogoods_module")
+        self.state_module = _module("state.py", "state_module")
+        self.unplaced_module = _module("unplaced.py", "unplaced_module")
+        self.index_module = _module("candidate_index.py", "candidate_index_module")
+        self.zobrist_module = _module("zobrist.py", "zobrist_module")
+        self.metrics_module = _module("metrics.py", "metrics_module")
+        self.preanalysis_module = _module("preanalysis.py", "preanalysis_module")
+        self.soft_module = _module("soft_constraints.py", "soft_constraints_module")
+        self.stats = self._new_stats()
+        self._domains = None
+        self._neighbors = None
+        self._static = None
+        self._nogoods = self.nogoods_module.NogoodCache(limit=self.nogood_limit)
+        # attempts search on this flat, resettable copy of the models' occupancy
+        # instead of deep copies of the models themselves
+        self._state = None
+        # optional progress(kind, payload) callback: "start", "progress" (every
+        # PROGRESS_NODES search nodes), "attempt" and "solution" (each new unique
+        # timetable, as it is accepted)
+        self.progress = None
+        self.cancelled = False
+        self._attempt_partial = None
+        self._best_partial = None
+        self._component = False
+        # (session, (room, faculty, day, start)) placements held fixed under every
+        # attempt, as if the models had them booked (re-solves, scheduler/resolve.py)
+        self.pinned = None
+        # static candidates (eligible rooms and faculty, days, valid starts) per kind of
+        # session, built once and kept across attempts and solve() calls (scheduler/candidate_index.py)
+        self._index = None
+        # incremental hashes of the partial timetable: complete timetables already
+        # found and exhausted placement sets are pruned during the search, for the
+        # attempts of one solve() call (scheduler/zobrist.py)
+        self._zobrist = self.zobrist_module.Zobrist()
+        self._seen_hashes = set()
+        self._dead = None
+        # phase timers, per-depth domain sizes and per-seed attempts of the last
+        # solve(), next to the `stats` counters (scheduler/metrics.py)
+        self.metrics = self.metrics_module.SolveMetrics()
+        self._tensor = None
+        if self.domain_backend == "numpy":
+            self._tensor = _module("feasibility.py", "feasibility_module").FeasibilityTensor(self)
+        self.preanalysis_report = None
+
+    PROGRESS_NODES = 1024
+
+    def cancel(self):
+        """
+        Stop a running solve() (e.g. from another thread): it returns the
+        solutions found so far. The search polls `cancelled` next to the time
+        limit at every node and candidate; time_limit itself is left alone and
+        the next solve() clears the flag.
+        """
+        self.cancelled = True
+
+    def _report(self, kind, **payload):
+        if self.progress is not None:
+            payload.update(attempts=self.stats["attempts"], nodes=self.stats["nodes"])
+            self.progress(kind, payload)
+
+    def _report_solution(self, res):
+        if self.progress is not None:
+            tt = res['timetable']
+            self._report("solution", score=res['score'], signature=res['signature'], schedule=tt.schedule, metadata=tt.metadata)
+
+    @staticmethod
+    def _new_stats():
+        return {"attempts": 0, "nodes": 0, "backtracks": 0, "backjumps": 0, "levels_jumped": 0,
+                "nogoods_learned": 0, "nogood_hits": 0, "duplicates_pruned": 0, "dead_prefix_hits": 0,
+                "proven_infeasible": False}
 
     def _time_left(self):
-        return (time.time() - self.start_time) < self.time_limit
+        return not self.cancelled and (time.time() - self.start_time) < self.time_limit
 
     def _slot_seq(self, start_slot, duration):
         try:
@@ -59,44 +212,135 @@ class TimetableSolver:
         sessions.sort(key=lambda x: (0 if x['is_lab'] else 1, -x['batch_size']))
         return sessions
 
-    def _generate_domain(self, session, rooms, facs, batches):
+    def _candidate_index(self, refresh=False):
+        """The static candidate index; with refresh, rebuilt if the models it was built from changed."""
+        if self._index is None or (refresh and self._index.key != self.index_module.fingerprint(self)):
+            self._index = self.index_module.CandidateIndex(self)
+        return self._index
+
+    def _eligible(self, session):
+        """
+        Rooms and faculty a session may use: rooms of its type and size, faculty
+        teaching its subject, and of those with a department only the ones of
+        the batch's department.
+        """
+        return self._candidate_index().plan(session)[:2]
+
+    def _generate_domain(self, session, state, shuffle=True):
         candidates = []
-        dur = int(session['duration'])
-        batch_obj = batches[session['batch']]
-        subj = self.subjects.get(session['subject'])
-        needed_type = "lab" if session['is_lab'] else "lecture"
-        possible_rooms = [r for r in rooms.values() if r.type == needed_type and r.capacity >= session['batch_size']]
-        possible_facs = [f for f in facs.values() if session['subject'] in getattr(f, 'subjects', [])]
+        possible_rooms, possible_facs, days, starts = self._candidate_index().plan(session)
         if not possible_rooms or not possible_facs:
             return []
-        days = [d for d in batch_obj.available_days if d in self.working_days] if getattr(batch_obj, 'available_days', None) else list(self.working_days)
-        slot_ids = self.slots
+        # windows are checked against the per-day free-slot bitmasks of each
+        # resource in `state`: one AND + compare per (resource, day, start)
+        room_free, fac_free = state.room_free, state.fac_free
+        room_at = [(room.id, state.room_at[room.id]) for room in possible_rooms]
+        fac_at = [(fac.id, state.fac_at[fac.id]) for fac in possible_facs]
+        batch_at = state.batch_at[session['batch']]
         for day in days:
-            for start in slot_ids:
-                seq = self._slot_seq(start, dur)
-                if not seq:
+            di = state.day_index[day]
+            batch_free = state.batch_free[batch_at + di]
+            if not batch_free:
+                continue
+            rooms_day = [(rid, room_free[at + di]) for rid, at in room_at]
+            facs_day = [(fid, fac_free[at + di]) for fid, at in fac_at]
+            for start, w in starts:
+                if w is None or batch_free & w != w:
                     continue
-                for room in possible_rooms:
-                    try:
-                        if not room.is_available(day, start, dur):
-                            continue
-                    except Exception:
+                facs_ok = [fid for fid, free in facs_day if free & w == w]
+                if not facs_ok:
+                    continue
+                for rid, free in rooms_day:
+                    if free & w != w:
                         continue
-                    for fac in possible_facs:
-                        try:
-                            if not fac.is_available(day, start, dur):
-                                continue
-                        except Exception:
-                            continue
-                        try:
-                            if not batch_obj.is_available(day, start, dur):
-                                continue
-                        except Exception:
-                            continue
-                        candidates.append((room.id, fac.id, day, start))
-        random.shuffle(candidates)
+                    for fac_id in facs_ok:
+                        candidates.append((rid, fac_id, day, start))
+        if shuffle:
+            self._shuffle(session, candidates)
         return candidates
 
+    @staticmethod
+    def perturbation(previous, cand):
+        """How far candidate (room, faculty, day, start) moves a session from its `previous` one: time 4, faculty 2, room 1."""
+        room_id, fac_id, day, start = cand
+        return ((day, start) != (previous[2], previous[3])) * 4 + (fac_id != previous[1]) * 2 + (room_id != previous[0])
+
+    def _shuffle(self, session, candidates):
+        random.shuffle(candidates)
+        previous = session.get('previous')
+        if previous is not None:
+            # re-solve: candidates closest to the session's previous placement first
+            candidates.sort(key=lambda cand: self.perturbation(previous, cand))
+
+    def _solver_state(self):
+        """The solver's SolverState, built on first use and re-synced with the models (and pins) on later calls."""
+        if self._state is None:
+            self._state = self.state_module.SolverState(self.classrooms, self.faculty, self.batches, self.working_days)
+        else:
+            self._state.load()
+        if self.pinned:
+            for sess, (room_id, fac_id, day, start) in self.pinned:
+                failed = self._state.place(sess['batch'], room_id, fac_id, day, start, int(sess['duration']), bool(sess['is_lab']))
+                if failed is not None:
+                    raise ValueError(f"pinned {sess['batch']}/{sess['subject']} at {day} {start} conflicts ({failed})")
+            self._state.commit()
+        return self._state
+
+    def _domain_store(self, sessions):
+        """Static domains against the solver's untouched models, built once per sessions list."""
+        if self._domains is None or self._domains.sessions is not sessions:
+            self._domains = self.domains_module.DomainStore(sessions, self._static_domains(sessions))
+        return self._domains
+
+    def _session_neighbors(self, sessions):
+        """Per session, the other sessions sharing its batch or an eligible faculty."""
+        if self._neighbors is None or self._neighbors[0] is not sessions:
+            by_key = {}
+            for si, sess in enumerate(sessions):
+                by_key.setdefault(('b', sess['batch']), []).append(si)
+                for f in self._eligible(sess)[1]:
+                    by_key.setdefault(('f', f.id), []).append(si)
+            neighbors = [set() for _ in sessions]
+            for group in by_key.values():
+                for si in group:
+                    neighbors[si].update(group)
+            for si in range(len(sessions)):
+                neighbors[si].discard(si)
+            self._neighbors = (sessions, [sorted(n) for n in neighbors])
+        return self._neighbors[1]
+
+    def _select_session(self, sessions, placed, store, state):
+        """
+        Pick the next unplaced session for the MRV orderings.
+        Returns (session index, its current domain or None when `store` tracks it).
+        """
+        best, best_size, best_domain, tied = None, None, None, []
+        for si, sess in enumerate(sessions):
+            if placed[si]:
+                continue
+            if store is not None:
+                size, domain = store.live[si], None
+            elif self._tensor is not None:
+                # counted without listing; only the chosen session's domain is built
+                size, domain = self._tensor.count(sess, state), None
+            else:
+                domain = self._generate_domain(sess, state, shuffle=False)
+                size = len(domain)
+            if best is None or size < best_size:
+                best, best_size, best_domain, tied = si, size, domain, [(si, domain)]
+            elif size == best_size:
+                tied.append((si, domain))
+            if size == 0:
+                break
+        if self.ordering == "mrv_degree" and len(tied) > 1 and best_size:
+            neighbors = self._session_neighbors(sessions)
+            best, best_domain = max(tied, key=lambda t: (sum(1 for n in neighbors[t[0]] if not placed[n]), -t[0]))
+        if store is None and self._tensor is not None and best is not None:
+            best_domain = self._generate_domain(sessions[best], state, shuffle=False)
+        if best_domain is not None:
+            self._shuffle(sessions[best], best_domain)
+        return best, best_domain
+
     def score(self, timetable):
         sc = 0
         for sem in timetable.schedule:
@@ -116,74 +360,457 @@ class TimetableSolver:
 
     def solve(self, sessions, max_solutions=5):
         self.start_time = time.time()
+        if not self._component:
+            # the components of a decomposed solve keep a cancel of the whole call
+            self.cancelled = False
+        self.stats = self._new_stats()
+        self.metrics = self.metrics_module.SolveMetrics()
+        if self.backjumping:
+            # learned nogoods refer to session indexes, so they are kept across the
+            # restarts of this call only
+            self._nogoods = self.nogoods_module.NogoodCache(limit=self.nogood_limit)
+        index = self._index
+        if index is not None and self._candidate_index(refresh=True) is not index:
+            # rooms, faculty or batches changed since the last solve: rebuild what was derived from them
+            self._state = self._domains = self._neighbors = None
+        self._solver_state()
+        self._best_partial = (0, []) if self.anytime else None
+        self._seen_hashes = set()
+        self._dead = self.zobrist_module.DeadPrefixes()
+        self._report("start", sessions=len(sessions))
+        if not self._component:
+            self.preanalysis_report = self.preanalysis_module.analyze(self, sessions) if self.preanalysis else None
+            if self.preanalysis_report and self.preanalysis_report["infeasible"] and not self.anytime:
+                self.stats["proven_infeasible"] = True
+                return []
+        if self.decompose and not self._component:
+            decompose_module = _module("decompose.py", "decompose_module")
+            groups = decompose_module.components(self, sessions)
+            if len(groups) > 1:
+                return decompose_module.solve_components(self, sessions, groups, max_solutions)
+        if self.engine != "backtracking":
+            return self._solve_exact(sessions, max_solutions)
+        max_attempts = max(1, max_solutions * 20)
+        if self.workers > 1 and max_attempts > 1 and "fork" in multiprocessing.get_all_start_methods():
+            return self._solve_parallel(sessions, max_solutions, max_attempts)
         results = []
         seen_sigs = set()
         attempts = 0
-        max_attempts = max(1, max_solutions * 20)
         base_seed = self.random_seed
-        while len(results) < max_solutions and (time.time() - self.start_time) < self.time_limit and attempts < max_attempts:
+        while len(results) < max_solutions and self._time_left() and attempts < max_attempts:
             seed = base_seed + attempts
             random.seed(seed)
             res = self._solve_single_attempt(sessions, seed)
             attempts += 1
+            self.stats["attempts"] = attempts
+            if res is None:
+                self._keep_partial(self._attempt_partial)
             if res:
-                sig = res['timetable'].signature()
+                sig = self._signature(res['timetable'])
                 if sig not in seen_sigs:
                     seen_sigs.add(sig)
                     res['signature'] = sig
                     results.append(res)
+                    self._report_solution(res)
+            self._report("attempt", solutions=len(results), best_score=max([r['score'] for r in results], default=None))
+            if 0 in self._dead.dead:
+                # the empty prefix is dead: every timetable there is has been found
+                self.stats["proven_infeasible"] = self.stats["proven_infeasible"] or not results
+                break
+            if self.stats["proven_infeasible"]:
+                break
+        if results:
+            # exhausted (backjumping past every timetable found), not infeasible
+            self.stats["proven_infeasible"] = False
+        if self.backjumping:
+            self.stats["nogoods_learned"] = self._nogoods.learned
+            self.stats["nogood_hits"] = self._nogoods.hits
+        if not results and self.anytime:
+            results.append(self._partial_result(sessions))
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results
+
+    def _signature(self, tt):
+        t0 = self.metrics_module.clock()
+        sig = tt.signature()
+        phase = self.metrics.phases["signature"]
+        phase[0] += 1
+        phase[1] += self.metrics_module.clock() - t0
+        return sig
+
+    def _keep_partial(self, partial):
+        # strictly better only, so ties go to the earliest seed in every mode
+        if partial is not None and self._best_partial is not None and partial[0] > self._best_partial[0]:
+            self._best_partial = partial
+
+    def _partial_result(self, sessions):
+        """The best partial assignment of this solve(): a Timetable of the placed sessions plus the unplaced-session report."""
+        covered, placed = self._best_partial
+        placement = dict(placed)
+        tt = self.timetable_module.Timetable(semesters=sorted(list(set([s['semester'] for s in sessions]))),
+                                             working_days=self.working_days, slots=self.slots)
+        self._write_sessions(tt, sessions, placed)
+        report = self.unplaced_module.unplaced_report(self, sessions, placement)
+        tt.metadata.update(ordering=self.ordering, domain_mode=self.domain_mode, backjumping=self.backjumping, partial=True,
+                           placed=len(placement), total=len(sessions), unplaced=report)
+        return {"timetable": tt, "score": self.score(tt), "signature": tt.signature(), "partial": True, "unplaced": report}
+
+    def _write_sessions(self, tt, sessions, placed):
+        """Assign (session index, (room, faculty, day, start)) pairs into `tt`."""
+        for si, (room_id, fac_id, day, start) in placed:
+            sess = sessions[si]
+            tt.assign(sess['semester'], day, start, {"batch": sess['batch'], "subject": sess['subject'], "faculty": fac_id,
+                                                     "room": room_id, "batch_size": sess['batch_size'],
+                                                     "duration": sess['duration'], "is_lab": sess['is_lab']})
+
+    def _solve_exact(self, sessions, max_solutions):
+        """solve() through scheduler/exact_solver.py; same result format, `attempts` counts model solves."""
+        return _module("exact_solver.py", "exact_solver_module").ExactSolver(self, self.engine).solve(sessions, max_solutions)
+
+    def _solve_parallel(self, sessions, max_solutions, max_attempts):
+        """
+        Run the seeds of solve() on `self.workers` forked processes.
+
+        Worker k takes seeds base+k, base+k+W, ... and sends back plain
+        (schedule, score, signature) payloads. The parent consumes them in seed
+        order, so the accepted solutions do not depend on the order workers finish
+        in, and terminates the workers once max_solutions unique timetables are in
+        or time runs out. They are those of the sequential loop for the same seed
+        set until timetables repeat: a worker only prunes the duplicates and dead
+        prefixes of its own attempts.
+        """
+        seeds = [self.random_seed + i for i in range(max_attempts)]
+        workers = min(self.workers, len(seeds))
+        # shared, read-only after this point: built once and inherited by fork
+        self._static_domains(sessions)
+        if self.domain_mode == "incremental":
+            self._domain_store(sessions)
+        ctx = multiprocessing.get_context("fork")
+        out = ctx.Queue()
+        procs = [ctx.Process(target=self._parallel_worker, args=(sessions, seeds[k::workers], out), daemon=True)
+                 for k in range(workers)]
+        for p in procs:
+            p.start()
+        semesters = sorted(list(set([s['semester'] for s in sessions])))
+        results, seen_sigs, pending = [], set(), {}
+
+        def accept(payload):
+            self.stats["attempts"] += 1
+            if payload['schedule'] is None:
+                self._keep_partial(payload['partial'])
+            for key, value in payload['stats'].items():
+                if key == "proven_infeasible":
+                    self.stats[key] = self.stats[key] or value
+                else:
+                    self.stats[key] += value
+            self.metrics.merge(payload['metrics'])
+            if payload['schedule'] is not None and payload['signature'] not in seen_sigs:
+                seen_sigs.add(payload['signature'])
+                tt = self.timetable_module.Timetable(semesters=semesters, working_days=self.working_days, slots=self.slots)
+                tt.schedule = payload['schedule']
+                tt.metadata = payload['metadata']
+                results.append({"timetable": tt, "score": payload['score'], "signature": payload['signature']})
+                self._report_solution(results[-1])
+            self._report("attempt", solutions=len(results), best_score=max([r['score'] for r in results], default=None))
+
+        next_seed = 0
+        try:
+            while next_seed < len(seeds) and len(results) < max_solutions and not self.stats["proven_infeasible"]:
+                remaining = self.time_limit - (time.time() - self.start_time)
+                if remaining <= 0 or self.cancelled:
+                    break
+                try:
+                    seed, payload = out.get(timeout=min(remaining, 0.5))
+                except queue.Empty:
+                    if not any(p.is_alive() for p in procs):
+                        break
+                    continue
+                pending[seed] = payload
+                while next_seed < len(seeds) and seeds[next_seed] in pending and len(results) < max_solutions:
+                    accept(pending.pop(seeds[next_seed]))
+                    next_seed += 1
+                    if self.stats["proven_infeasible"] or self.cancelled:
+                        break
+            if self.anytime and not results:
+                # attempts cut by the deadline report their partial assignment as
+                # they stop; give the workers a moment to send them
+                grace = time.time() + 2.0
+                while any(p.is_alive() for p in procs) and time.time() < grace:
+                    try:
+                        seed, payload = out.get(timeout=0.1)
+                        pending[seed] = payload
+                    except queue.Empty:
+                        pass
+            # out of time with a slow seed still running: keep what later seeds
+            # already found rather than dropping it (still in seed order)
+            for seed in sorted(pending):
+                if len(results) >= max_solutions or self.stats["proven_infeasible"] or self.cancelled:
+                    break
+                accept(pending[seed])
+        finally:
+            for p in procs:
+                if p.is_alive():
+                    p.terminate()
+            for p in procs:
+                p.join()
+            out.close()
+        if not results and self.anytime:
+            results.append(self._partial_result(sessions))
         results.sort(key=lambda x: x['score'], reverse=True)
         return results
 
+    def _parallel_worker(self, sessions, seeds, out):
+        """Forked child of _solve_parallel: one attempt per seed, results as picklable payloads."""
+        # a cancel reaches the parent only, which stops reading and terminates the workers
+        self.cancelled = False
+        for seed in seeds:
+            before = dict(self.stats)
+            self.metrics = self.metrics_module.SolveMetrics()
+            random.seed(seed)
+            res = self._solve_single_attempt(sessions, seed)
+            if 0 in self._dead.dead and not self._seen_hashes:
+                self.stats["proven_infeasible"] = True
+            if self.backjumping:
+                self.stats["nogoods_learned"] = self._nogoods.learned
+                self.stats["nogood_hits"] = self._nogoods.hits
+            delta = {k: v - before[k] for k, v in self.stats.items() if k not in ("attempts", "proven_infeasible")}
+            # a search exhausted after finding timetables has found them all, it is not infeasible
+            delta["proven_infeasible"] = self.stats["proven_infeasible"] and not self._seen_hashes
+            payload = {"schedule": None, "score": None, "signature": None, "metadata": None, "stats": delta,
+                       "partial": self._attempt_partial if not res else None}
+            if res:
+                tt = res['timetable']
+                payload.update(schedule=tt.schedule, score=res['score'], signature=self._signature(tt), metadata=tt.metadata)
+            payload['metrics'] = self.metrics.raw()
+            out.put((seed, payload))
+            if self.stats["proven_infeasible"] or 0 in self._dead.dead:
+                break
+
+    def _static_domains(self, sessions):
+        """Per session candidates against the solver's untouched models (computed once per sessions list)."""
+        if self._static is None or self._static[0] is not sessions:
+            # a state of its own: the first call may come from inside a search
+            # (backjumping explanations), which must not see its state reset
+            state = self.state_module.SolverState(self.classrooms, self.faculty, self.batches, self.working_days)
+            shared = {}
+            static = []
+            for sess in sessions:
+                key = (sess['batch'], sess['subject'], sess['duration'], sess['is_lab'], sess['batch_size'])
+                if key not in shared:
+                    shared[key] = self._generate_domain(sess, state, shuffle=False)
+                static.append(shared[key])
+            self._static = (sessions, static)
+        return self._static[1]
+
+    def _explain(self, si, sessions, owner, depth_of, skip=None):
+        """
+        Conflict set for session `si`: for every static candidate blocked by a
+        placed session, the shallowest session occupying one of its room,
+        faculty or batch cells.
+        """
+        sess = sessions[si]
+        culprits = set()
+        cells = self.domains_module.candidate_cells
+        for room_id, fac_id, day, start in self._static_domains(sessions)[si]:
+            best = None
+            for cell in cells(sess['batch'], room_id, fac_id, day, start, sess['duration']):
+                o = owner.get(cell)
+                if o is not None and o != skip and (best is None or depth_of[o] < depth_of[best]):
+                    best = o
+            if best is not None:
+                culprits.add(best)
+        return culprits
+
     def _solve_single_attempt(self, sessions, seed):
         random.seed(seed)
-        rooms = {rid: copy.deepcopy(r) for rid, r in self.classrooms.items()}
-        facs = {fid: copy.deepcopy(f) for fid, f in self.faculty.items()}
-        batches = {bid: copy.deepcopy(b) for bid, b in self.batches.items()}
+        self._attempt_partial = None
+        clock, metrics = self.metrics_module.clock, self.metrics
+        attempt_start, nodes_before, backtracks_before = clock(), self.stats["nodes"], self.stats["backtracks"]
+        state = self._state if self._state is not None else self._solver_state()
+        state.reset()
         tt = self.timetable_module.Timetable(semesters=sorted(list(set([s['semester'] for s in sessions]))),
                                              working_days=self.working_days, slots=self.slots)
+        tt.metadata['ordering'] = self.ordering
+        tt.metadata['domain_mode'] = self.domain_mode
+        tt.metadata['backjumping'] = self.backjumping
         order = list(range(len(sessions)))
+        placed = [False] * len(sessions)
+        stats = self.stats
+        store = None
+        if self.domain_mode == "incremental":
+            store = self._domain_store(sessions)
+            store.reset()
+            if 0 in store.live and not self.backjumping:
+                metrics.attempt(seed, 0, 0, clock() - attempt_start, "failed")
+                return None
+
+        # backjumping bookkeeping: who holds each room/faculty/batch cell, the
+        # depth of every placed session, and per-faculty sessions; `placement`
+        # (session -> candidate) is kept for every mode
+        cbj = self.backjumping
+        nogoods = self._nogoods if cbj else None
+        cells_of = self.domains_module.candidate_cells
+        owner, depth_of, placement, fac_sessions = {}, {}, {}, {}
+        # sessions in placement order; undo is a pop and the timetable is only
+        # written once the search has succeeded
+        trail = []
+        timed_out = [False]
+        jumping = [None]
+        progress = self.progress
+        # anytime: slots placed so far, and the deepest trail this attempt left
+        # (snapshotted on the way back up, so descending costs nothing)
+        anytime = self.anytime
+        covered, deepest = [0], [0, []]
+        # (solution, state) Zobrist hashes of the placements on the trail; dead
+        # prefixes need chronological returns, so not with backjumping
+        zkeys, seen = self._zobrist.keys, self._seen_hashes
+        dead = None if cbj else self._dead
+        zhash = [0, 0]
+        node_metric = metrics.node
+        t_domain, t_assign, t_unassign = (metrics.phases[p] for p in ("domain", "assign", "unassign"))
 
         def backtrack(idx):
-            if (time.time() - self.start_time) >= self.time_limit:
+            """True on success; on failure False (chronological / timeout) or, with backjumping, the conflict set."""
+            if self.cancelled or (time.time() - self.start_time) >= self.time_limit:
+                timed_out[0] = True
                 return False
             if idx >= len(order):
+                if trail and zhash[0] in seen:
+                    # a timetable this solve() already has: look for another
+                    stats["duplicates_pruned"] += 1
+                    return set(trail) if cbj else False
                 return True
-            si = order[idx]
+            if dead is not None and zhash[1] in dead:
+                stats["dead_prefix_hits"] += 1
+                return False
+            stats["nodes"] += 1
+            if progress is not None and not stats["nodes"] % self.PROGRESS_NODES:
+                self._report("progress", placed=len(trail), total=len(sessions))
+            t0 = clock()
+            if self.ordering == "static":
+                si = order[idx]
+                domain = None
+            else:
+                si, domain = self._select_session(sessions, placed, store, state)
             sess = sessions[si]
-            domain = self._generate_domain(sess, rooms, facs, batches)
+            if domain is None:
+                if store is not None:
+                    domain = store.iter_values(si, random)
+                else:
+                    domain = self._generate_domain(sess, state)
+            t_domain[0] += 1
+            t_domain[1] += clock() - t0
+            node_metric(idx, len(domain) if store is None else store.live[si])
+            dur, is_lab = int(sess['duration']), bool(sess['is_lab'])
+            placed[si] = True
+            depth_of[si] = idx
+            conflicts = set()
             for room_id, fac_id, day, start in domain:
-                room = rooms[room_id]; fac = facs[fac_id]; batch = batches[sess['batch']]
-                assign = {"batch": sess['batch'], "subject": sess['subject'], "faculty": fac_id, "room": room_id,
-                          "batch_size": sess['batch_size'], "duration": sess['duration'], "is_lab": sess['is_lab']}
-                r_ok, r_err = room.assign(day, start, assign)
-                if not r_ok:
-                    continue
-                f_ok, f_err = fac.assign(day, start, assign)
-                if not f_ok:
-                    room.unassign(day, start, assign)
+                if self.cancelled or (time.time() - self.start_time) >= self.time_limit:
+                    timed_out[0] = True
+                    break
+                cand = (room_id, fac_id, day, start)
+                if nogoods is not None:
+                    culprits = nogoods.blocking(si, cand, placement)
+                    if culprits is not None:
+                        conflicts |= culprits
+                        continue
+                t0 = clock()
+                t_assign[0] += 1
+                failed = state.place(sess['batch'], room_id, fac_id, day, start, dur, is_lab)
+                if failed is not None:
+                    if cbj and failed == "hours":
+                        # hour cap: every session already given to this faculty shares the blame
+                        conflicts |= fac_sessions.get(fac_id, set())
+                    t_assign[1] += clock() - t0
                     continue
-                b_ok, b_err = batch.assign(day, start, assign)
-                if not b_ok:
-                    room.unassign(day, start, assign)
-                    fac.unassign(day, start, assign)
+                cells = cells_of(sess['batch'], room_id, fac_id, day, start, sess['duration']) if cbj else ()
+                for cell in cells:
+                    owner[cell] = si
+                if store is not None and not store.place(si, cand):
+                    # forward check: some unplaced session has no candidate left
+                    if cbj:
+                        for sj, live in enumerate(store.live):
+                            if not live and not placed[sj]:
+                                conflicts |= self._explain(sj, sessions, owner, depth_of, skip=si)
+                    store.undo()
+                    for cell in cells:
+                        del owner[cell]
+                    state.release(sess['batch'], room_id, fac_id, day, start, dur, is_lab)
+                    t_assign[1] += clock() - t0
                     continue
-                tt.assign(sess['semester'], day, start, assign)
-                ok = backtrack(idx+1)
-                if ok:
+                placement[si] = cand
+                fac_sessions.setdefault(fac_id, set()).add(si)
+                trail.append(si)
+                zsol, zstate = zkeys(sess, cand)
+                zhash[0] ^= zsol
+                zhash[1] ^= zstate
+                if anytime:
+                    covered[0] += dur
+                t_assign[1] += clock() - t0
+                res = backtrack(idx+1)
+                if res is True:
                     return True
-                for i in range(int(sess['duration'])):
-                    slot = str(int(start) + i)
-                    try:
-                        tt.schedule[sess['semester']][day][slot].remove(assign)
-                    except Exception:
-                        pass
-                room.unassign(day, start, assign)
-                fac.unassign(day, start, assign)
-                batch.unassign(day, start, assign)
-            return False
+                t0 = clock()
+                stats["backtracks"] += 1
+                if store is not None:
+                    store.undo()
+                if anytime:
+                    if covered[0] > deepest[0]:
+                        deepest[:] = [covered[0], [(s, placement[s]) for s in trail]]
+                    covered[0] -= dur
+                trail.pop()
+                zhash[0] ^= zsol
+                zhash[1] ^= zstate
+                state.release(sess['batch'], room_id, fac_id, day, start, dur, is_lab)
+                for cell in cells:
+                    del owner[cell]
+                del placement[si]
+                fac_sessions[fac_id].discard(si)
+                t_unassign[0] += 1
+                t_unassign[1] += clock() - t0
+                if cbj:
+                    if res is False:
+                        break
+                    if si not in res:
+                        # nothing this session can change fixes the failure below: jump over it
+                        placed[si] = False
+                        if jumping[0] is not res:
+                            jumping[0] = res
+                            stats["backjumps"] += 1
+                        stats["levels_jumped"] += 1
+                        return res
+                    conflicts |= res
+                    conflicts.discard(si)
+            placed[si] = False
+            if dead is not None and not timed_out[0]:
+                # every value of si was tried: no new timetable extends these placements
+                dead.add(zhash[1])
+            if not cbj or timed_out[0]:
+                return False
+            # values never tried were blocked by placed sessions
+            conflicts |= self._explain(si, sessions, owner, depth_of)
+            conflicts.discard(si)
+            if not conflicts:
+                # no placement of earlier sessions is to blame: the session cannot be placed at all
+                stats["proven_infeasible"] = True
+            nogoods.learn((s, placement[s]) for s in conflicts)
+            return conflicts
 
         success = backtrack(0)
-        if success:
-            return {"timetable": tt, "score": self.score(tt)}
+        outcome = "solution" if success is True else "timeout" if timed_out[0] else "failed"
+        metrics.attempt(seed, stats["nodes"] - nodes_before, stats["backtracks"] - backtracks_before,
+                        clock() - attempt_start, outcome)
+        if success is True:
+            seen.add(zhash[0])
+            t0 = clock()
+            self._write_sessions(tt, sessions, [(si, placement[si]) for si in trail])
+            t1 = clock()
+            score = self.score(tt)
+            for phase, seconds in (("write", t1 - t0), ("score", clock() - t1)):
+                metrics.phases[phase][0] += 1
+                metrics.phases[phase][1] += seconds
+            return {"timetable": tt, "score": score}
+        if anytime:
+            self._attempt_partial = (deepest[0], deepest[1])
         return None
@@ -0,0 +1,87 @@
+# timetable_scheduler/scheduler/unplaced.py
+"""
+Why sessions are left unplaced, for partial (anytime) results.
+
+unplaced_report() takes the placements of a partial timetable and, for every
+session missing from it, looks at the session's static candidates (rooms of
+the right type and size, eligible faculty, days and slots every resource is
+available) with the placed sessions holding their cells:
+  candidates     number of static (room, faculty, day, start) candidates
+  reason         set when there are none at all: no suitable room, no eligible
+                 faculty, or no window where they and the batch are all available
+  blocking       per resource, how many (day, start) windows of the candidates it
+                 blocks: "rooms" {id: n}, "faculty" {id: n}, "batch" n, and
+                 "faculty_hours" [ids whose weekly/lab/lecture cap is used up]
+"""
+
+
+def describe(sess):
+    return {k: sess[k] for k in ("batch", "subject", "semester", "duration", "is_lab", "batch_size")}
+
+
+def static_reason(solver, sess):
+    """Why a session has no static candidate."""
+    needed_type = "lab" if sess['is_lab'] else "lecture"
+    rooms, facs = solver._eligible(sess)
+    dept = getattr(solver.batches.get(sess['batch']), 'department', None)
+    where = f" available to department {dept}" if dept is not None else ""
+    if not rooms:
+        return f"no {needed_type} room with capacity >= {sess['batch_size']}{where}"
+    if not facs:
+        return f"no faculty{where} teaches {sess['subject']}"
+    fixed = solver.fixed_lab_slots.get(str(sess['semester'])) if sess['is_lab'] else None
+    if fixed is not None:
+        return f"no suitable room, eligible faculty and batch all available at fixed lab slot {fixed}"
+    return "no day and start where a suitable room, an eligible faculty and the batch are all available"
+
+
+def unplaced_report(solver, sessions, placement):
+    """
+    Args:
+        solver (TimetableSolver): supplies the static domains and the search state.
+        sessions (list[dict]): the solved sessions.
+        placement (dict): session index -> (room, faculty, day, start) of the placed ones.
+    Returns a list with one entry per unplaced session, in session order.
+    """
+    state = solver._state if solver._state is not None else solver._solver_state()
+    state.reset()
+    for si, (room_id, fac_id, day, start) in placement.items():
+        sess = sessions[si]
+        state.place(sess['batch'], room_id, fac_id, day, start, int(sess['duration']), bool(sess['is_lab']))
+    window = solver.state_module.window_mask
+    domains = solver._static_domains(sessions)
+    report = []
+    for si, sess in enumerate(sessions):
+        if si in placement:
+            continue
+        entry = describe(sess)
+        cands = domains[si]
+        entry["candidates"] = len(cands)
+        if not cands:
+            entry["reason"] = static_reason(solver, sess)
+            report.append(entry)
+            continue
+        dur, is_lab = int(sess['duration']), bool(sess['is_lab'])
+        rooms, facs, batch, hours = {}, {}, set(), set()
+        batch_at = state.batch_at[sess['batch']]
+        for room_id, fac_id, day, start in cands:
+            w, di = window(start, dur), state.day_index[day]
+            if state.room_free[state.room_at[room_id] + di] & w != w:
+                rooms.setdefault(room_id, set()).add((day, start))
+            if state.fac_free[state.fac_at[fac_id] + di] & w != w:
+                facs.setdefault(fac_id, set()).add((day, start))
+            if state.batch_free[batch_at + di] & w != w:
+                batch.add((day, start))
+            fi = state.fac_no[fac_id]
+            cap, used = (state.max_lab, state.lab_hours) if is_lab else (state.max_lecture, state.lecture_hours)
+            if state.hours[fi] + dur > state.max_hours[fi] or used[fi] + dur > cap[fi]:
+                hours.add(fac_id)
+        entry["blocking"] = {
+            "rooms": {rid: len(ws) for rid, ws in sorted(rooms.items())},
+            "faculty": {fid: len(ws) for fid, ws in sorted(facs.items())},
+            "batch": len(batch),
+            "faculty_hours": sorted(hours),
+        }
+        report.append(entry)
+    state.reset()
+    return report
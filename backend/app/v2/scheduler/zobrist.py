@@ -0,0 +1,66 @@
+# timetable_scheduler/scheduler/zobrist.py
+"""
+Incremental (Zobrist) hashes of partial timetables, for duplicate and
+dead-prefix pruning in TimetableSolver.
+
+Every placement is encoded as a tuple of ids and given a random 64-bit key on
+first sight; the hash of a set of placements is the XOR of their keys, so
+placing or undoing a session is one XOR and the hash does not depend on the
+order the sessions were placed in. Two hashes are kept per search:
+
+  - `solution`: (semester, day, start, duration, batch, room, subject), what
+    Timetable.signature() covers. A complete timetable whose solution hash was
+    already accepted in this solve() is a duplicate; the search treats it as a
+    failed leaf and keeps looking for a different one in the same attempt
+    instead of spending the attempt on it.
+  - `state`: (batch, subject, duration, room, faculty, day, start), what the
+    rest of the search depends on. A placement set whose whole subtree was
+    searched without a new timetable is a dead prefix: an attempt that reaches
+    the same set again (in any order) backtracks at once.
+
+The key stream comes from its own seeded generator, so it does not disturb the
+solver's seeded candidate shuffles.
+"""
+
+import random
+
+
+class Zobrist:
+    def __init__(self, seed=0x5EED):
+        self._rng = random.Random(seed)
+        self._keys = {}
+
+    def key(self, feature):
+        """The random 64-bit key of `feature` (a tuple of ids)."""
+        k = self._keys.get(feature)
+        if k is None:
+            k = self._keys[feature] = self._rng.getrandbits(64)
+        return k
+
+    def keys(self, sess, cand):
+        """(solution key, state key) of placing session `sess` on candidate (room, faculty, day, start)."""
+        room_id, fac_id, day, start = cand
+        dur = int(sess['duration'])
+        return (self.key((sess['semester'], day, start, dur, sess['batch'], room_id, sess['subject'])),
+                self.key((sess['batch'], sess['subject'], dur, room_id, fac_id, day, start)))
+
+
+class DeadPrefixes:
+    """State hashes of exhausted subtrees, kept across the attempts of one solve(); cleared when over `limit`."""
+    def __init__(self, limit=100000):
+        self.limit = int(limit)
+        self.dead = set()
+        self.hits = 0
+
+    def __contains__(self, h):
+        if h in self.dead:
+            self.hits += 1
+            return True
+        return False
+
+    def add(self, h):
+        if self.limit <= 0:
+            return
+        if len(self.dead) >= self.limit:
+            self.dead.clear()
+        self.dead.add(h)
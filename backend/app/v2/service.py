@@ -0,0 +1,217 @@
+"""
+Long-lived scheduler service: the pipeline of main.py behind a local JSON API,
+without spawning Python or touching the Data/ folder per request.
+
+    python service.py [--host 127.0.0.1 --port 8765 | --socket /tmp/scheduler.sock] [--workers 2]
+
+Endpoints:
+  GET  /health  -> {"status": "ok", "workers": n, "max_jobs": n}
+  POST /solve   -> body {"subjects": [...], "classrooms": [...], "faculty": [...],
+                   "batches": [...], "constraints": {...}} (file names such as
+                   "batches.json" work as keys too); responds with pipeline.run()'s
+                   {"solutions": [...], "sessions", "elapsed", "stats"}, best first.
+                   With "previous" (a timetable_top_N.json) it repairs that timetable
+                   for the changed data instead of solving from scratch.
+  POST /whatif  -> the /solve body plus "scenarios": [{"name", "patches": [...]}]
+                   (and optional "workers"); responds {"scenarios": [...]}, one
+                   comparison row per scenario, the base first (whatif.py)
+  Asynchronous jobs (jobs.py), for solves that take a while:
+  POST   /jobs                 same body as /solve -> 202 {"job_id", "status"}
+  GET    /jobs/<id>            status and progress (attempts, nodes, sessions placed, best score)
+  GET    /jobs/<id>/events?since=0&wait=10
+                               {"events": [...], "next": index, "status"}; waits up to
+                               `wait` seconds for something new
+  GET    /jobs/<id>/stream     the same events as newline-delimited JSON, one per line as
+                               they happen (each new timetable as it is found), until the
+                               job finishes
+  GET    /jobs/<id>/result     the /solve response once finished (409 before)
+  DELETE /jobs/<id>            cancel; a running solve keeps the timetables found so far
+Bad input answers 400, unknown jobs 404 and solver failures 500, all as {"error": message}.
+
+Solves run on a pool of worker processes that import the models and solver
+once (pipeline.warm) and are reused for every request; each request's data
+stays in memory. Processes rather than threads, because a solve seeds the
+global `random` state.
+"""
+
+import os, sys, json, signal, socket, argparse, multiprocessing
+import concurrent.futures
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import loader
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+# registered so pool jobs (pipeline and whatif functions) pickle by module name
+pipeline = loader.load("pipeline.py", "timetable_pipeline", register=True)
+jobs_module = loader.load("jobs.py", "timetable_jobs")
+whatif = loader.load("whatif.py", "timetable_whatif", register=True)
+
+
+class SchedulerService:
+    def __init__(self, workers=1, max_jobs=2, jobs_backend="memory", jobs_db=None):
+        self.workers = max(1, int(workers))
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                                           initializer=pipeline.warm)
+        self.jobs = jobs_module.JobQueue(concurrency=max_jobs, backend=jobs_backend, path=jobs_db)
+
+    def solve(self, body):
+        """Run one request on the pool; ValueError for input problems."""
+        pipeline.request_data(body)
+        return self.pool.submit(pipeline.run_request, body).result()
+
+    def whatif(self, body):
+        """Run a what-if request on the pool; ValueError for input problems."""
+        if not isinstance(body, dict) or not isinstance(body.get("scenarios"), list):
+            raise ValueError('what-if body needs a "scenarios" list')
+        pipeline.request_data(body)
+        return self.pool.submit(whatif.run_request, body).result()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.jobs.close()
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def address_string(self):
+        # unix-socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "unix"
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise ValueError(f"invalid JSON body: {e}")
+
+    def _route(self):
+        """(path parts, query) of the request, e.g. (["jobs", "<id>", "events"], {"since": "3"})."""
+        url = urlsplit(self.path)
+        return [p for p in url.path.split("/") if p], {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+    def _stream(self, job_id):
+        # HTTP/1.0 response without a length: events go out line by line and
+        # the connection closes when the job has finished
+        jobs = self.service.jobs
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        since = 0
+        while True:
+            events = jobs.events(job_id, since, timeout=15)
+            for event in events:
+                self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            since += len(events)
+            if jobs.status(job_id)["status"] in jobs_module.FINISHED and since >= jobs.status(job_id)["events"]:
+                return
+
+    def do_GET(self):
+        parts, query = self._route()
+        jobs = self.service.jobs
+        if parts == ["health"]:
+            return self._reply(200, {"status": "ok", "workers": self.service.workers, "max_jobs": jobs.concurrency})
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            status = jobs.status(parts[1])
+            if status is None:
+                return self._reply(404, {"error": f"unknown job {parts[1]}"})
+            view = parts[2] if len(parts) == 3 else None
+            if view is None:
+                return self._reply(200, status)
+            if view == "events":
+                since = int(query.get("since", 0))
+                events = jobs.events(parts[1], since, timeout=float(query.get("wait", 0)))
+                return self._reply(200, {"events": events, "next": since + len(events), "status": jobs.status(parts[1])["status"]})
+            if view == "stream":
+                return self._stream(parts[1])
+            if view == "result":
+                if status["status"] not in jobs_module.FINISHED:
+                    return self._reply(409, {"error": f"job {parts[1]} is {status['status']}"})
+                return self._reply(200, jobs.result(parts[1]) or {"error": status["error"], "status": status["status"]})
+        self._reply(404, {"error": f"no route GET {self.path}"})
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts not in (["solve"], ["jobs"], ["whatif"]):
+            return self._reply(404, {"error": f"no route POST {self.path}"})
+        try:
+            body = self._body()
+            if parts == ["jobs"]:
+                job_id = self.service.jobs.submit(body)
+                return self._reply(202, {"job_id": job_id, "status": "queued"})
+            result = self.service.whatif(body) if parts == ["whatif"] else self.service.solve(body)
+        except (ValueError, KeyError, TypeError) as e:
+            return self._reply(400, {"error": str(e)})
+        except Exception as e:
+            return self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+        self._reply(200, result)
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._reply(404, {"error": f"no route DELETE {self.path}"})
+        status = self.service.jobs.cancel(parts[1])
+        if status is None:
+            return self._reply(404, {"error": f"unknown job {parts[1]}"})
+        self._reply(200, status)
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def make_server(service, host="127.0.0.1", port=8765, unix_socket=None):
+    handler = type("BoundHandler", (Handler,), {"service": service})
+    if unix_socket:
+        return UnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve timetable generation over a local JSON API.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--socket", default=None, help="listen on this unix socket instead of TCP")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="concurrent /solve requests")
+    ap.add_argument("--max-jobs", type=int, default=2, help="concurrent asynchronous jobs")
+    ap.add_argument("--jobs-db", default=None, help="keep jobs in this SQLite file instead of in memory")
+    args = ap.parse_args(argv)
+    service = SchedulerService(workers=args.workers, max_jobs=args.max_jobs,
+                               jobs_backend="sqlite" if args.jobs_db else "memory", jobs_db=args.jobs_db)
+    server = make_server(service, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{server.server_port}"
+    print(f"Scheduler service on {where} with {service.workers} worker(s)")
+    sys.stdout.flush()
+    # a plain `kill` shuts down like Ctrl-C (pool stopped, socket removed)
+    signal.signal(signal.SIGTERM, lambda *a: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os, sys
+
+# the package's modules import loader.py from its root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
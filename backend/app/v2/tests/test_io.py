@@ -1,4 +1,114 @@
-import os, json
+import os, json, csv, importlib.util
 def test_demo_json_present():
     root = os.path.dirname(os.path.dirname(__file__))
     assert os.path.exists(os.path.join(root, 'data', 'demo_data.json'))
+
+
+def _import(relpath, name):
+    root = os.path.dirname(os.path.dirname(__file__))
+    spec = importlib.util.spec_from_file_location(name, os.path.join(root, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_flat_row_outputs_have_one_row_per_session_and_decode_back(tmp_path):
+    root = os.path.dirname(os.path.dirname(__file__))
+    pipeline = _import('pipeline.py', 'timetable_pipeline_io_test')
+    data = pipeline.load_data_dir(os.path.join(root, 'Data'))
+    data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20, max_solutions=2, top_k=2)
+    result = pipeline.run(data, log=lambda *a: None)
+    plain, compact = tmp_path / "plain", tmp_path / "compact"
+    pipeline.write_outputs(result, str(plain), log=lambda *a: None, formats=["jsonl", "columnar"])
+    pipeline.write_outputs(result, str(compact), log=lambda *a: None, formats=["jsonl", "columnar"], compact=True)
+
+    with open(plain / "timetables.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 2 * result["sessions"]
+    assert [r["solution"] for r in rows].count(1) == result["sessions"]
+    assert [s["signature"] for s in json.load(open(plain / "solutions.json"))] == [s["signature"] for s in result["solutions"]]
+    first = result["solutions"][0]["schedule"]
+    for r in rows[:result["sessions"]]:
+        for s in range(int(r["start"]), int(r["start"]) + r["duration"]):
+            assert any(a["batch"] == r["batch"] and a["subject"] == r["subject"] and a["room"] == r["room"]
+                       for a in first[r["semester"]][r["day"]][str(s)])
+
+    with open(compact / "timetables.jsonl") as f:
+        fields = json.loads(f.readline())["fields"]
+        encoded = [json.loads(line) for line in f]
+    tables = json.load(open(compact / "timetables.jsonl.dict.json"))
+    decoded = [{k: (tables[k][v] if k in tables else v) for k, v in zip(fields, row)} for row in encoded]
+    assert decoded == rows
+
+    if not os.path.exists(plain / "timetables.parquet"):
+        # no pyarrow: the columnar format is CSV
+        with open(plain / "timetables.csv") as f:
+            assert len(list(csv.DictReader(f))) == len(rows)
+
+
+def test_excel_views_cover_every_placement_once_per_view():
+    root = os.path.dirname(os.path.dirname(__file__))
+    pipeline = _import('pipeline.py', 'timetable_pipeline_io_test')
+    excel = _import('io/excel_writer.py', 'excel_writer_test')
+    data = pipeline.load_data_dir(os.path.join(root, 'Data'))
+    data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20, max_solutions=1, top_k=1)
+    schedule = pipeline.run(data, log=lambda *a: None)["solutions"][0]["schedule"]
+    days, slots = excel.grid_shape(schedule)
+    views = excel.build_views(schedule, days, slots)
+    filled = sum(len(assigns) for cells in schedule.values() for by_slot in cells.values() for assigns in by_slot.values())
+    for view, grids in views.items():
+        cells = sum(len(c.split("; ")) for grid in grids.values() for row in grid for c in row if c)
+        assert cells == filled, view
+    assert set(views["batch"]) == {b["id"] for b in data["batches.json"]}
+    assert views["batch"]["B1"][days.index("Mon")][slots.index("2")] is None or "@" in views["batch"]["B1"][days.index("Mon")][slots.index("2")]
+
+
+def test_validator_collects_every_issue_and_updates_incrementally():
+    root = os.path.dirname(os.path.dirname(__file__))
+    dv = _import('io/data_validator.py', 'data_validator_test')
+    report = dv.run_validator(os.path.join(root, 'Data'))
+    assert report["errors"] == [] and report["summary"]["entities"]["batches"] == 4
+
+    data = {f: json.load(open(os.path.join(root, 'Data', f + '.json'))) for f in dv.DATASETS}
+    batches = [dict(b) for b in data["batches"]]
+    batches[0]["subjects"] = batches[0]["subjects"] + ["S999"]
+    batches[1]["strength"] = 500
+    batches += [dict(batches[2], id="B5-L", parent_batch="B5", semester=6), dict(batches[2], id="B9-L", parent_batch="B9"),
+                dict(batches[3])]
+    subjects = [dict(s, hours_per_week=0) if s["id"] == "S104" else s for s in data["subjects"]]
+    faculty = [dict(f, subjects=f["subjects"] + ["S404"]) if f["id"] == "F01" else f for f in data["faculty"]]
+    faculty = [dict(f, subjects=[s for s in f["subjects"] if s != "S302"]) for f in faculty]
+    validator = dv.DataValidator(batches, subjects, faculty, data["classrooms"], {})
+    report = validator.report()
+    codes = {(i["code"], i["entity"], i["id"], i["ref"]) for i in report["errors"]}
+    assert ("unknown_subject", "batches", "B1", "S999") in codes and ("unknown_subject", "faculty", "F01", "S404") in codes
+    assert ("duplicate_id", "batches", batches[3]["id"], None) in codes
+    assert ("invalid_parent", "batches", "B9-L", "B9") in codes and ("parent_semester_mismatch", "batches", "B5-L", "B5") in codes
+    assert ("invalid_hours", "subjects", "S104", None) in codes
+    # one capacity error per batch, not one per subject
+    assert [i["id"] for i in report["errors"] if i["code"] == "lecture_capacity"] == ["B3"]
+    assert {(i["code"], i["id"]) for i in report["warnings"]} >= {("lab_capacity_split", "B3"), ("untaught_subject", "S302")}
+    assert report["summary"]["errors"] == len(report["errors"]) and all(i["message"] for i in report["errors"])
+
+    # the old rule methods still raise on their rule's first error
+    for rule, message in [("validate_batch_subjects", "Batch B1 references unknown subject S999"),
+                          ("validate_faculty_subjects", "Faculty F01 references unknown subject S404"),
+                          ("validate_classroom_capacity", "Lecture batch B3 exceeds available classroom capacity"),
+                          ("validate_lab_batches", "Lab batch B5-L semester mismatch with parent batch B5"),
+                          ("validate_subject_hours", "Subject S104 has invalid hours per week: 0")]:
+        try:
+            getattr(validator, rule)()
+            raise AssertionError(rule)
+        except Exception as e:
+            assert str(e) == message
+
+    # updating one dataset re-checks only the passes that read it, with the same result as starting over
+    fixed = validator.update("subjects.json", data["subjects"] + [{"id": "S404", "hours_per_week": 2}])
+    fresh = dv.DataValidator(batches, data["subjects"] + [{"id": "S404", "hours_per_week": 2}], faculty,
+                             data["classrooms"], {}).report()
+    assert fixed == fresh and not any(i["code"] in ("invalid_hours", "unknown_subject") and i["entity"] != "batches"
+                                      for i in fixed["errors"])
+    before = validator._issues["classrooms"]
+    validator.update("faculty", data["faculty"])
+    assert validator._issues["classrooms"] is before
+    assert validator.report() == dv.DataValidator(batches, validator.subjects, data["faculty"], data["classrooms"], {}).report()
@@ -0,0 +1,103 @@
+import os, importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_model(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'models', name + '.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+DAYS = ["Mon", "Tue"]
+SLOTS = ["1", "2", "3", "4"]
+
+
+def test_window_checks_follow_assign_and_unassign():
+    Classroom = import_model('classroom').Classroom
+    room = Classroom(id="R1", capacity=60, available_days=DAYS, available_slots=SLOTS)
+    assert room.is_available("Mon", "3", 2)
+    assert not room.is_available("Mon", "4", 2)      # runs past the last slot
+    assert not room.is_available("Wed", "1")         # day not available
+    assert not room.is_available("Mon", "x")         # non-numeric slot id
+    value = {"duration": 2, "batch_size": 50}
+    ok, _ = room.assign("Mon", "2", value)
+    assert ok
+    assert not room.is_available("Mon", "1", 2)
+    assert not room.is_available("Mon", "3")
+    assert room.is_available("Mon", "4") and room.is_available("Tue", "2", 2)
+    room.unassign("Mon", "2", value)
+    assert room.is_available("Mon", "1", 4)
+
+
+def test_faculty_and_batch_views_match_schedule():
+    Faculty = import_model('faculty').Faculty
+    Batch = import_model('batch').Batch
+    fac = Faculty(id="F1", subjects=["S1"], max_hours_per_week=10, max_lecture_hours=10,
+                  preferred_days=DAYS, preferred_slots=["1", "2", "4"])
+    assert fac.is_available("Mon", "1", 2)
+    assert not fac.is_available("Mon", "2", 2)       # slot 3 not offered
+    value = {"duration": 1, "is_lab": False}
+    assert fac.assign("Tue", "4", value)[0]
+    assert not fac.is_available("Tue", "4")
+    fac.unassign("Tue", "4", value)
+    assert fac.is_available("Tue", "4") and fac.assigned_hours == 0
+
+    batch = Batch(id="B1", available_days=DAYS, available_slots=SLOTS)
+    assert batch.assign("Mon", "1", {"duration": 3})[0]
+    assert not batch.is_available("Mon", "3") and batch.is_available("Mon", "4")
+    batch.unassign("Mon", "1", None)               # without a value only one cell is cleared
+    assert batch.is_available("Mon", "1") and not batch.is_available("Mon", "2")
+
+
+def test_assign_returns_handles_and_undo_pops_the_trail():
+    Faculty = import_model('faculty').Faculty
+    Classroom = import_model('classroom').Classroom
+    fac = Faculty(id="F1", subjects=["S1"], max_hours_per_week=10, max_lab_hours=10, max_lecture_hours=10,
+                  preferred_days=DAYS, preferred_slots=SLOTS)
+    lab = {"duration": 2, "is_lab": True}
+    ok, h1 = fac.assign("Mon", "1", lab)
+    ok2, h2 = fac.assign("Mon", "3", {"duration": 1, "is_lab": False})
+    assert ok and ok2 and h1 != h2
+    assert fac.schedule["Mon"]["2"] == [h1] and fac.assignments.get(h1) is lab
+    assert fac.undo() is not lab                      # most recent first
+    assert fac.is_available("Mon", "3") and not fac.is_available("Mon", "2")
+    fac.unassign("Mon", "1", {"duration": 2, "is_lab": True})   # by equal value
+    assert fac.is_available("Mon", "1", 4)
+    assert (fac.assigned_hours, fac.assigned_lab_hours, fac.assigned_lecture_hours) == (0, 0, 0)
+    assert len(fac.assignments) == 0
+
+    room = Classroom(id="R1", capacity=60, available_days=DAYS, available_slots=SLOTS)
+    _, h = room.assign("Tue", "2", {"duration": 3})
+    room.unassign("Tue", "2", h)                       # by handle
+    assert room.is_available("Tue", "1", 4) and not room.assignments.trail
+
+
+def test_clearing_a_cell_keeps_the_log_and_hours_consistent_with_undo():
+    Faculty = import_model('faculty').Faculty
+    Batch = import_model('batch').Batch
+    fac = Faculty(id="F1", subjects=["S1"], max_hours_per_week=10, max_lab_hours=10, max_lecture_hours=10,
+                  preferred_days=DAYS, preferred_slots=SLOTS)
+    lab = {"duration": 2, "is_lab": True}
+    _, h1 = fac.assign("Mon", "1", lab)
+    _, h2 = fac.assign("Mon", "3", {"duration": 1, "is_lab": False})
+    assert fac.cell("Mon", "2") == [lab] and fac.cell("Mon", "4") == []
+    fac.unassign("Mon", "2")                          # one cell of the lab
+    assert (fac.assigned_hours, fac.assigned_lab_hours, fac.assigned_lecture_hours) == (2, 1, 1)
+    assert len(fac.assignments) == 2 and fac.cell("Mon", "1") == [lab]
+    assert fac.undo(h1) is lab                        # out of order, the slot it still holds
+    assert (fac.assigned_hours, fac.assigned_lab_hours, fac.assigned_lecture_hours) == (1, 0, 1)
+    fac.unassign("Mon", "3")                          # the lecture's only cell drops its handle
+    assert (fac.assigned_hours, fac.assigned_lecture_hours, len(fac.assignments)) == (0, 0, 0)
+    assert fac.is_available("Mon", "1", 4) and not fac.assignments.trail
+
+    batch = Batch(id="B1", available_days=DAYS, available_slots=SLOTS)
+    handles = [batch.assign("Tue", s, {"duration": 1})[1] for s in SLOTS]
+    for h in handles[:2]:
+        batch.undo(h)                                 # popped below the top, skipped later
+    assert batch.assignments.trail[-1] == handles[3]
+    batch.unassign("Tue", "4")
+    batch.undo()
+    assert len(batch.assignments) == 0 and not batch.assignments.trail
+    assert batch.is_available("Tue", "1", 4)
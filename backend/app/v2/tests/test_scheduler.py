@@ -1,7 +1,734 @@
-import os, json, importlib.util, runpy
+import os, sys, json, time, importlib.util, runpy
+import pytest
 def test_solver_runs_demo():
     # run the demo runner if present
     root = os.path.dirname(os.path.dirname(__file__))
     data_dir = os.path.join(root, 'data')
     demo = os.path.join(data_dir, 'demo_data.json')
     assert os.path.exists(demo)
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_file(relpath, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def build_demo_solver(**kwargs):
+    data = {}
+    for f in ["subjects.json", "classrooms.json", "faculty.json", "batches.json"]:
+        with open(os.path.join(ROOT, 'Data', f)) as fp:
+            data[f] = json.load(fp)
+    classroom = import_file('models/classroom.py', 'classroom')
+    faculty = import_file('models/faculty.py', 'faculty')
+    subject = import_file('models/subject.py', 'subject')
+    batch = import_file('models/batch.py', 'batch')
+    solver_mod = import_file('scheduler/timetable_solver.py', 'timetable_solver_pkg')
+    batches = {b['id']: batch.Batch(**b) for b in data['batches.json']}
+    solver = solver_mod.TimetableSolver(slots=[str(i) for i in range(1, 7)], working_days=["Mon", "Tue", "Wed", "Thu", "Fri"],
+                                        classrooms_map={r['id']: classroom.Classroom(**r) for r in data['classrooms.json']},
+                                        faculty_map={f['id']: faculty.Faculty(**f) for f in data['faculty.json']},
+                                        batches_map=batches,
+                                        subjects_map={s['id']: subject.Subject(**s) for s in data['subjects.json']},
+                                        random_seed=7, time_limit=20, **kwargs)
+    return solver, solver._generate_sessions(batches)
+
+
+def assert_valid(solver, timetable, sessions):
+    # every session placed once, and no room/faculty/batch double-booked
+    seen = {}
+    placed = 0
+    for sem, days in timetable.schedule.items():
+        for day, cells in days.items():
+            for slot, assigns in cells.items():
+                for a in assigns:
+                    for key in ('room', 'faculty', 'batch'):
+                        cell = (key, a[key], day, slot)
+                        assert cell not in seen, f"double booking {cell}"
+                        seen[cell] = a
+                    assert a['faculty'] in solver.faculty and a['subject'] in solver.faculty[a['faculty']].subjects
+                    assert solver.classrooms[a['room']].capacity >= a['batch_size']
+                    placed += 1
+    assert placed == sum(int(s['duration']) for s in sessions)
+
+
+def test_incremental_domains_produce_valid_timetables():
+    solver, sessions = build_demo_solver(domain_mode="incremental")
+    results = solver.solve(sessions, max_solutions=3)
+    assert len(results) == 3
+    for res in results:
+        assert_valid(solver, res['timetable'], sessions)
+
+
+def test_solver_options_are_checked_in_one_place():
+    solver, _ = build_demo_solver(backjumping=1, workers="2", nogood_limit="50")
+    assert (solver.backjumping, solver.workers, solver.nogood_limit) == (True, 2, 50)
+    assert solver.ordering == solver.OPTIONS["ordering"][0]
+    with pytest.raises(ValueError, match="ordering"):
+        build_demo_solver(ordering="random")
+    with pytest.raises(TypeError, match="orderng"):
+        build_demo_solver(orderng="mrv")
+    for kwargs in ({}, {"ordering": "mrv", "domain_mode": "incremental"}):
+        with pytest.raises(ValueError, match="numpy"):
+            build_demo_solver(domain_backend="numpy", **kwargs)
+
+
+def test_mrv_orderings_are_recorded_in_metadata():
+    for domain_mode in ("regenerate", "incremental"):
+        for ordering in ("mrv", "mrv_degree"):
+            solver, sessions = build_demo_solver(domain_mode=domain_mode, ordering=ordering)
+            results = solver.solve(sessions, max_solutions=2)
+            assert results
+            for res in results:
+                assert res['timetable'].metadata['ordering'] == ordering
+                assert_valid(solver, res['timetable'], sessions)
+
+
+def test_backjumping_solves_demo_and_reports_stats():
+    for domain_mode in ("regenerate", "incremental"):
+        solver, sessions = build_demo_solver(domain_mode=domain_mode, backjumping=True)
+        results = solver.solve(sessions, max_solutions=2)
+        assert len(results) == 2
+        for res in results:
+            assert_valid(solver, res['timetable'], sessions)
+        assert solver.stats['nodes'] >= len(sessions)
+        assert not solver.stats['proven_infeasible']
+
+
+def test_backjumping_proves_unplaceable_session_infeasible():
+    solver, sessions = build_demo_solver(domain_mode="incremental", backjumping=True)
+    for fac in solver.faculty.values():
+        if 'S104' in fac.subjects:
+            fac.subjects.remove('S104')
+    # the search's own proof; the pre-analysis would stop it before the first attempt
+    solver.preanalysis = False
+    results = solver.solve(sessions, max_solutions=2)
+    assert results == []
+    assert solver.stats['proven_infeasible']
+    assert solver.stats['attempts'] == 1
+    solver.preanalysis = True
+    assert solver.solve(sessions, max_solutions=2) == [] and solver.stats['attempts'] == 0
+    assert solver.stats['proven_infeasible'] and solver.preanalysis_report['findings'][0]['check'] == 'no_candidates'
+
+
+def test_parallel_workers_match_sequential_solutions():
+    for kwargs in ({}, {"domain_mode": "incremental", "ordering": "mrv"}):
+        solver, sessions = build_demo_solver(**kwargs)
+        expected = [r['signature'] for r in solver.solve(sessions, max_solutions=4)]
+        solver, sessions = build_demo_solver(workers=3, **kwargs)
+        results = solver.solve(sessions, max_solutions=4)
+        assert [r['signature'] for r in results] == expected
+        for res in results:
+            assert_valid(solver, res['timetable'], sessions)
+
+
+def test_attempts_use_state_arena_and_leave_models_untouched():
+    for domain_mode in ("regenerate", "incremental"):
+        solver, sessions = build_demo_solver(domain_mode=domain_mode)
+        bid = sessions[0]['batch']
+        assert solver.batches[bid].assign("Mon", "1", {"duration": 2})[0]   # booked before solving
+        results = solver.solve(sessions, max_solutions=2)
+        assert results
+        for res in results:
+            assert_valid(solver, res['timetable'], sessions)
+            for sem, days in res['timetable'].schedule.items():
+                assert not [a for s in ("1", "2") for a in days["Mon"][s] if a['batch'] == bid]
+        assert all(not any(r.occupancy.occupied.values()) for r in solver.classrooms.values())
+        assert all(f.assigned_hours == 0 for f in solver.faculty.values())
+        assert solver.batches[bid].occupancy.occupied["Mon"] == 0b110
+
+
+def test_local_search_improves_soft_score_and_keeps_hard_constraints():
+    solver, sessions = build_demo_solver()
+    results = solver.solve(sessions, max_solutions=1)
+    ls_mod = import_file('scheduler/local_search.py', 'local_search')
+    for method in ("anneal", "tabu"):
+        opt = ls_mod.LocalSearch(solver, soft_constraints={"minimize_gaps": {"weight": 6}}, method=method, max_iterations=300)
+        assert opt.objective.weights["minimize_gaps"] == 6 and opt.objective.weights["balanced_distribution"] == 4
+        before = results[0]['timetable'].signature()
+        tt, info = opt.optimize(results[0]['timetable'])
+        assert results[0]['timetable'].signature() == before
+        assert info['final'] > info['initial']
+        assert opt.objective.score_timetable(tt) == info['final']
+        assert_valid(solver, tt, sessions)
+        again, info2 = opt.optimize(results[0]['timetable'])
+        assert again.signature() == tt.signature() and info2['final'] == info['final']
+
+
+def test_local_search_keeps_labs_on_their_fixed_slot():
+    fixed = {"1": "1", "3": "3", "5": "1", "7": "4"}
+    solver, sessions = build_demo_solver(fixed_lab_slots=fixed)
+    results = solver.solve(sessions, max_solutions=2)
+    assert results
+    ls_mod = import_file('scheduler/local_search.py', 'local_search')
+    for res in results:
+        tt, _ = ls_mod.LocalSearch(solver, method="anneal", max_iterations=5000).optimize(res['timetable'])
+        labs = [it for it in solver.soft_module.timetable_items(tt) if it['is_lab']]
+        assert labs and all(it['start'] == fixed[str(it['semester'])] for it in labs)
+        assert_valid(solver, tt, sessions)
+
+
+def test_delta_scoring_matches_full_recompute():
+    solver, sessions = build_demo_solver()
+    tt = solver.solve(sessions, max_solutions=1)[0]['timetable']
+    ls_mod = import_file('scheduler/local_search.py', 'local_search')
+    sc = solver.soft_module
+    for method in ("anneal", "tabu"):
+        runs = [ls_mod.LocalSearch(solver, method=method, max_iterations=200, scoring=scoring).optimize(tt)
+                for scoring in ("delta", "full")]
+        assert runs[0][0].signature() == runs[1][0].signature()
+        assert runs[0][1]['final'] == runs[1][1]['final']
+    # placements and removals move the per-batch daily target too
+    objective = sc.SoftObjective(solver)
+    items = sc.timetable_items(tt)
+    state = sc.ScoreState(objective, items[:-5])
+    for it in items[-5:]:
+        d = state.delta([(it, None, sc.position(it))])
+        assert state.apply([(it, None, sc.position(it))]) == d
+    assert (state.value, state.counts) == (objective.evaluate(items), objective.components(items))
+    assert state.recompute(items)[0] == state.value
+    state.apply([(items[0], sc.position(items[0]), None)])
+    assert state.value == objective.evaluate(items[1:])
+
+
+def test_exact_model_matches_score_and_engine_reports_missing_library():
+    solver, sessions = build_demo_solver(engine="cpsat", fixed_lab_slots={"3": {"start_slot": "4", "duration_slots": 2}})
+    solver._solver_state()
+    exact = import_file('scheduler/exact_solver.py', 'exact_solver_module')
+    model = exact.ExactModel(solver, sessions)
+    assert [len(c) for c in model.choices] == [len(d) for d in solver._static_domains(sessions)]
+    for si, (room_id, fac_id, day, start) in model.vars:
+        if sessions[si]['is_lab'] and str(sessions[si]['semester']) == "3":
+            assert start == "4"
+    # a candidate's weight is what it adds to solver.score once placed
+    tt = solver.timetable_module.Timetable(semesters=[sessions[0]['semester']], working_days=solver.working_days, slots=solver.slots)
+    si, (room_id, fac_id, day, start) = model.vars[0]
+    sess = sessions[si]
+    tt.assign(sess['semester'], day, start, {"batch": sess['batch'], "subject": sess['subject'], "faculty": fac_id, "room": room_id,
+                                             "batch_size": sess['batch_size'], "duration": sess['duration'], "is_lab": sess['is_lab']})
+    assert model.weights[0] == solver.score(tt)
+    try:
+        import ortools  # noqa: F401
+    except ImportError:
+        try:
+            solver.solve(sessions, max_solutions=1)
+        except ImportError as e:
+            assert "ortools" in str(e)
+        else:
+            raise AssertionError("engine='cpsat' ran without OR-Tools")
+        return
+    results = solver.solve(sessions, max_solutions=2)
+    assert results and results[0]['timetable'].metadata['engine'] == "cpsat"
+    assert_valid(solver, results[0]['timetable'], sessions)
+
+
+def _fake_cp_model():
+    """A brute-force stand-in for ortools.sat.python.cp_model, enough for tiny models."""
+    import itertools, types
+
+    class Expr:
+        def __init__(self, terms, const=0):
+            self.terms, self.const = terms, const
+
+        def __add__(self, k):
+            return Expr(self.terms, self.const + k)
+
+        def _cmp(self, other, op):
+            if isinstance(other, Expr):
+                return self.terms + [(v, -c) for v, c in other.terms], self.const - other.const, op
+            return self.terms, self.const - other, op
+
+        def __le__(self, other):
+            return self._cmp(other, "<=")
+
+        def __eq__(self, other):
+            return self._cmp(other, "==")
+
+    class LinearExpr:
+        Sum = staticmethod(lambda xs: Expr([(v, 1) for v in xs]))
+        WeightedSum = staticmethod(lambda xs, coefs: Expr(list(zip(xs, coefs))))
+
+    class CpModel:
+        def __init__(self):
+            self.n, self.constraints, self.objective = 0, [], Expr([])
+
+        def NewBoolVar(self, name):
+            self.n += 1
+            return self.n - 1
+
+        def Add(self, constraint):
+            self.constraints.append(constraint)
+
+        def Maximize(self, expr):
+            self.objective = expr
+
+    def value(terms, const, x):
+        return sum(c * x[v] for v, c in terms) + const
+
+    class CpSolver:
+        def __init__(self):
+            self.parameters, self.x = types.SimpleNamespace(), None
+
+        def Solve(self, model):
+            best = None
+            for x in itertools.product((0, 1), repeat=model.n):
+                if all(value(terms, const, x) <= 0 if op == "<=" else value(terms, const, x) == 0
+                       for terms, const, op in model.constraints):
+                    obj = value(model.objective.terms, model.objective.const, x)
+                    if best is None or obj > best[0]:
+                        best = (obj, x)
+            self.x = best and best[1]
+            return OPTIMAL if best else INFEASIBLE
+
+        def Value(self, v):
+            return self.x[v]
+
+    OPTIMAL, FEASIBLE, INFEASIBLE = 4, 2, 3
+    return types.SimpleNamespace(CpModel=CpModel, CpSolver=CpSolver, LinearExpr=LinearExpr,
+                                 OPTIMAL=OPTIMAL, FEASIBLE=FEASIBLE, INFEASIBLE=INFEASIBLE)
+
+
+def _tiny_exact_solver(monkeypatch, faculty_ids, hours):
+    """Exact engine on the fake CP-SAT: one batch and room on Mon slots 1-3, S1 taught by `faculty_ids`."""
+    import types
+    cp_model = _fake_cp_model()
+    for name, mod in (("ortools", types.ModuleType("ortools")), ("ortools.sat", types.ModuleType("ortools.sat")),
+                      ("ortools.sat.python", types.SimpleNamespace(cp_model=cp_model))):
+        monkeypatch.setitem(sys.modules, name, mod)
+    classroom = import_file('models/classroom.py', 'classroom')
+    faculty = import_file('models/faculty.py', 'faculty')
+    subject = import_file('models/subject.py', 'subject')
+    batch = import_file('models/batch.py', 'batch')
+    solver_mod = import_file('scheduler/timetable_solver.py', 'timetable_solver_pkg')
+    slots = ["1", "2", "3"]
+    batches = {"B1": batch.Batch(id="B1", semester=1, strength=50, subjects=["S1"], available_days=["Mon"], available_slots=slots)}
+    solver = solver_mod.TimetableSolver(slots=slots, working_days=["Mon"],
+                                        classrooms_map={"R1": classroom.Classroom(id="R1", capacity=60, available_days=["Mon"], available_slots=slots)},
+                                        faculty_map={fid: faculty.Faculty(id=fid, subjects=["S1"], max_hours_per_week=4, max_lecture_hours=4,
+                                                                          preferred_days=["Mon"], preferred_slots=slots)
+                                                     for fid in faculty_ids},
+                                        batches_map=batches, subjects_map={"S1": subject.Subject(id="S1", hours_per_week=hours)},
+                                        engine="cpsat")
+    return solver, solver._generate_sessions(batches)
+
+
+def test_exact_engine_returns_distinct_timetables_for_identical_sessions(monkeypatch):
+    solver, sessions = _tiny_exact_solver(monkeypatch, ["F1"], 2)
+    assert len(sessions) == 2 and sessions[0] == sessions[1]
+    results = solver.solve(sessions, max_solutions=5)
+    # three distinct pairs of slots, each found by one model solve, then the cuts make it infeasible
+    assert len({r['signature'] for r in results}) == len(results) == 3
+    assert solver.stats['attempts'] == 4
+    for res in results:
+        assert_valid(solver, res['timetable'], sessions)
+
+
+def test_exact_cut_ignores_faculty_the_signature_does_not_see(monkeypatch):
+    solver, sessions = _tiny_exact_solver(monkeypatch, ["F1", "F2"], 1)
+    exact = import_file('scheduler/exact_solver.py', 'exact_solver_module')
+    model = exact.ExactModel(solver, sessions)
+    assert len(model.vars) == 6
+    for j, (_, (room_id, _, day, start)) in enumerate(model.vars):
+        cut = [model.vars[k][1] for k in model.cut([j])]
+        assert sorted(fac_id for _, fac_id, _, _ in cut) == ["F1", "F2"]
+        assert {(r, d, s) for r, _, d, s in cut} == {(room_id, day, start)}
+    # one solve per start slot, then infeasible: no faculty-swapped repeat of a signature
+    results = solver.solve(sessions, max_solutions=5)
+    assert len({r['signature'] for r in results}) == len(results) == 3
+    assert solver.stats['attempts'] == 4
+
+
+def test_anytime_returns_partial_timetable_with_unplaced_report():
+    for kwargs in ({}, {"backjumping": True}):
+        solver, sessions = build_demo_solver(anytime=True, **kwargs)
+        solver.faculty["F10"].max_hours_per_week = 4
+        solver.time_limit = 1
+        results = solver.solve(sessions, max_solutions=2)
+        assert len(results) == 1 and results[0]['partial']
+        meta = results[0]['timetable'].metadata
+        assert meta['partial'] and meta['placed'] + len(meta['unplaced']) == meta['total'] == len(sessions)
+        assert any("F10" in u['blocking']['faculty_hours'] for u in meta['unplaced'])
+        placed = [a for days in results[0]['timetable'].schedule.values() for cells in days.values()
+                  for assigns in cells.values() for a in assigns]
+        assert len([a for a in placed if a["faculty"] == "F10"]) <= 4   # one entry per slot
+        assert all(f.assigned_hours == 0 for f in solver.faculty.values())
+
+
+def test_pipeline_local_search_keeps_solver_score_and_skips_partial_results():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    tc = data["timetable_constraints.json"]
+    data["timetable_constraints.json"] = dict(tc, time_limit=20, max_solutions=3, top_k=3,
+                                              local_search={"method": "tabu", "max_iterations": 50})
+    result = pipeline.run(data, log=lambda *a: None)
+    sols = result["solutions"]
+    assert [s["soft_score"] for s in sols] == sorted((s["soft_score"] for s in sols), reverse=True)
+    solver, _, _ = pipeline.build_solver(data)
+    for s in sols:
+        tt = solver.timetable_module.Timetable()
+        tt.schedule = s["schedule"]
+        assert s["score"] == solver.score(tt)
+    assert max(s["soft_score_norm"] for s in sols) == 100 and all(s["score_norm"] for s in sols)
+
+    data["faculty.json"] = [dict(f, max_hours_per_week=4) if f["id"] == "F10" else f for f in data["faculty.json"]]
+    data["timetable_constraints.json"].update(anytime=True, time_limit=1)
+    sols = pipeline.run(data, log=lambda *a: None)["solutions"]
+    assert len(sols) == 1 and sols[0]["metadata"]["partial"]
+    assert "local_search" not in sols[0]["metadata"] and sols[0]["soft_score"] is None
+
+
+def test_service_solves_request_body_like_the_cli():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20, max_solutions=3, top_k=2)
+    expected = pipeline.run(data, log=lambda *a: None)
+    body = {name[:-len('.json')]: value for name, value in data.items()}
+    body["constraints"] = body.pop("timetable_constraints")
+
+    service_mod = import_file('service.py', 'timetable_service')
+    service = service_mod.SchedulerService(workers=1)
+    server = service_mod.make_server(service, port=0)
+    import threading, urllib.request, urllib.error
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        req = urllib.request.Request(url + "/solve", data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+        got = json.load(urllib.request.urlopen(req))
+        assert [s['signature'] for s in got['solutions']] == [s['signature'] for s in expected['solutions']]
+        assert got['solutions'][0]['score_norm'] == 100
+        try:
+            urllib.request.urlopen(urllib.request.Request(url + "/solve", data=b'{"subjects": []}'))
+            raise AssertionError("missing datasets were accepted")
+        except urllib.error.HTTPError as e:
+            assert e.code == 400 and "classrooms" in json.load(e)['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def test_jobs_stream_solutions_and_cancel():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20, max_solutions=3, top_k=3)
+    body = {name[:-len('.json')]: value for name, value in data.items()}
+    jobs = import_file('jobs.py', 'timetable_jobs')
+    q = jobs.JobQueue(concurrency=1)
+    try:
+        first, second = q.submit(body), q.submit(body)
+        assert q.cancel(second)['status'] == "cancelled"
+        events, since = [], 0
+        while not events or events[-1]['kind'] not in jobs.FINISHED:
+            events += q.events(first, since, timeout=10)
+            since = len(events)
+        kinds = [e['kind'] for e in events]
+        assert kinds.count("solution") == 3 and kinds[-1] == "done"
+        status = q.status(first)
+        assert status['progress']['solutions'] == 3 and status['progress']['sessions'] == 40
+        streamed = [e['data']['signature'] for e in events if e['kind'] == "solution"]
+        assert sorted(s['signature'] for s in q.result(first)['solutions']) == sorted(streamed)
+    finally:
+        q.close()
+
+    # cancelling stops solve() at its next check and keeps what was found; the
+    # time limit is untouched and the next solve() runs in full
+    for kwargs in ({}, {"workers": 3}, {"decompose": True}):
+        solver, sessions = build_demo_solver(**kwargs)
+        solver.progress = lambda kind, payload: kind == "solution" and solver.cancel()
+        results = solver.solve(sessions, max_solutions=5)
+        assert len(results) == 1 and solver.cancelled and solver.time_limit == 20
+        solver.progress = None
+        results = solver.solve(sessions, max_solutions=3)
+        assert len(results) == 3 and not solver.cancelled
+
+
+def test_resolve_keeps_unaffected_sessions_after_a_room_is_removed():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20, max_solutions=2, top_k=2)
+    previous = json.loads(json.dumps(pipeline.run(data, log=lambda *a: None)['solutions'][0]))
+    same = pipeline.run(data, log=lambda *a: None, previous=previous)['solutions'][0]
+    assert same['signature'] == previous['signature'] and same['metadata']['resolve']['resolved'] == 0
+
+    data["classrooms.json"] = [r for r in data["classrooms.json"] if r['id'] != 'R2']
+    result = pipeline.run(data, log=lambda *a: None, previous=previous)
+    assert result['elapsed'] < 1
+    top = result['solutions'][0]
+    info = top['metadata']['resolve']
+    assert info['resolved'] > 0 and info['pinned'] + info['resolved'] == result['sessions'] and info['rounds'] == 1
+
+    solver, sessions, _ = pipeline.build_solver(data)
+    tt = solver.timetable_module.Timetable(semesters=list(top['schedule']), working_days=solver.working_days, slots=solver.slots)
+    tt.schedule = top['schedule']
+    assert_valid(solver, tt, sessions)
+    before = [(d, s, a['batch'], a['subject'], a['room'], a['faculty']) for sem, days in previous['schedule'].items()
+              for d, cells in days.items() for s, assigns in cells.items() for a in assigns if a['room'] != 'R2']
+    after = {(d, s, a['batch'], a['subject'], a['room'], a['faculty']) for sem, days in top['schedule'].items()
+             for d, cells in days.items() for s, assigns in cells.items() for a in assigns}
+    assert all(cell in after for cell in before)
+    assert not any(a['room'] == 'R2' for days in top['schedule'].values() for cells in days.values()
+                   for assigns in cells.values() for a in assigns)
+
+    # the search options the rounds override are the caller's again afterwards
+    data["timetable_constraints.json"].update(domain_mode="incremental", backjumping=True)
+    solver, sessions, _ = pipeline.build_solver(data)
+    resolve = import_file('scheduler/resolve.py', 'resolve_test')
+    assert resolve.Resolver(solver, sessions, previous).solve(max_solutions=1)
+    assert (solver.domain_mode, solver.backjumping, solver.engine, solver.ordering, solver.time_limit, solver.pinned) == \
+        ("incremental", True, "backtracking", "static", 20, None)
+
+
+def test_decompose_solves_departments_separately_and_merges():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    synthetic = import_file('benchmarks/synthetic.py', 'synthetic')
+    data = synthetic.generate_institute(n_batches=12, n_rooms=30, n_faculty=60, n_departments=3, seed=2)
+    decompose = import_file('scheduler/decompose.py', 'decompose_test')
+    solver, sessions, _ = pipeline.build_solver(data)
+    groups = decompose.components(solver, sessions)
+    assert len(groups) == 3 and sorted(si for g in groups for si in g) == list(range(len(sessions)))
+    assert all(len({sessions[si]['batch'][0] for si in g}) == 1 for g in groups)
+
+    signatures = None
+    for workers in (1, 2):
+        data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20, decompose=True, workers=workers)
+        solver, sessions, _ = pipeline.build_solver(data)
+        results = solver.solve(sessions, max_solutions=3)
+        assert len(results) == 3 and solver.stats['components'] == 3
+        for res in results:
+            assert_valid(solver, res['timetable'], sessions)
+            assert res['timetable'].metadata['components'] == [len(g) for g in groups]
+            for days in res['timetable'].schedule.values():
+                for cells in days.values():
+                    for assigns in cells.values():
+                        for a in assigns:
+                            dept = a['batch'][0]
+                            assert solver.classrooms[a['room']].department == dept and solver.faculty[a['faculty']].department == dept
+        assert signatures in (None, [r['signature'] for r in results])
+        signatures = [r['signature'] for r in results]
+
+
+def test_candidate_index_is_reused_across_solves_and_rebuilt_on_model_changes():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20)
+    solver, sessions, _ = pipeline.build_solver(data)
+    first = [r['signature'] for r in solver.solve(sessions, max_solutions=2)]
+    index = solver._index
+    assert [r['signature'] for r in solver.solve(sessions, max_solutions=2)] == first and solver._index is index
+    for sess in sessions:
+        rooms, facs = solver._eligible(sess)
+        assert rooms == [r for r in solver.classrooms.values() if r.type == ("lab" if sess['is_lab'] else "lecture")
+                         and r.capacity >= sess['batch_size']]
+        assert facs == [f for f in solver.faculty.values() if sess['subject'] in f.subjects]
+
+    # another solver's index is taken over with this solver's models, whose availability differs
+    other, _, _ = pipeline.build_solver(data)
+    busy = next(iter(other.faculty.values()))
+    busy.preferred_slots = busy.preferred_slots[:2]
+    reused = other.index_module.CandidateIndex(other, base=index)
+    assert reused.reused == list(other.index_module._DEPENDS)
+    for sess in sessions:
+        rooms, facs = reused.plan(sess)[:2]
+        assert all(other.classrooms[r.id] is r for r in rooms) and all(other.faculty[f.id] is f for f in facs)
+
+    removed = next(r for r in solver.classrooms.values() if r.type == "lecture")
+    del solver.classrooms[removed.id]
+    results = solver.solve(sessions, max_solutions=1)
+    assert solver._index is not index
+    assert not any(a['room'] == removed.id for days in results[0]['timetable'].schedule.values()
+                   for cells in days.values() for assigns in cells.values() for a in assigns)
+
+
+def test_numpy_domain_backend_matches_python_backend():
+    pytest.importorskip("numpy")
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    signatures = {}
+    for backend in ("python", "numpy"):
+        data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20, max_solutions=3,
+                                                  ordering="mrv", domain_backend=backend)
+        solver, sessions, _ = pipeline.build_solver(data)
+        state = solver._solver_state()
+        if solver._tensor is not None:
+            for sess in sessions:
+                domain = solver._generate_domain(sess, state, shuffle=False)
+                assert solver._tensor.domain(sess, state) == domain and solver._tensor.count(sess, state) == len(domain)
+        signatures[backend] = [r['signature'] for r in solver.solve(sessions, max_solutions=3)]
+    assert signatures["numpy"] == signatures["python"] and signatures["python"]
+
+
+def test_duplicate_and_dead_prefix_pruning_enumerate_small_instances_without_wasted_attempts():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    synthetic = import_file('benchmarks/synthetic.py', 'synthetic')
+    tight = dict(n_batches=1, n_rooms=2, n_faculty=2, subjects_per_batch=2, slots_per_day=3, working_days=["Mon", "Tue"],
+                 lab_ratio=0, seed=1)
+    data = synthetic.generate_institute(**tight)
+    data["timetable_constraints.json"]["time_limit"] = 20
+    solver, sessions, _ = pipeline.build_solver(data)
+    results = solver.solve(sessions, max_solutions=500)
+    # every distinct timetable once, then the solve stops instead of running out its 10000 attempts
+    assert len(results) == len({r['signature'] for r in results}) == 20
+    assert solver.stats['attempts'] <= 25 and not solver.stats['proven_infeasible']
+    for res in results:
+        assert_valid(solver, res['timetable'], sessions)
+
+    data = synthetic.generate_institute(**dict(tight, n_batches=2, n_rooms=3))
+    data["timetable_constraints.json"].update(time_limit=20, preanalysis=False)
+    solver, sessions, _ = pipeline.build_solver(data)
+    assert solver.solve(sessions, max_solutions=4) == [] and solver.stats['proven_infeasible']
+    assert solver.stats['attempts'] == 1 and solver.stats['dead_prefix_hits'] > 0
+    solver.preanalysis = True
+    assert solver.solve(sessions, max_solutions=4) == [] and solver.stats['attempts'] == 0
+
+
+def test_synthetic_institute_shape_options_and_scaling_harness(tmp_path):
+    synthetic = import_file('benchmarks/synthetic.py', 'synthetic')
+    bench = import_file('benchmarks/bench_scaling.py', 'bench_scaling')
+    data = synthetic.generate_institute(batches_per_semester=2, n_departments=2, n_faculty=20, room_scarcity=0.5,
+                                        faculty_overlap=5, seed=3)
+    assert len(data["batches.json"]) == 16
+    for dept in "AB":
+        sems = [b["semester"] for b in data["batches.json"] if b["department"] == dept]
+        assert sorted(sems) == [1, 1, 3, 3, 5, 5, 7, 7]
+    assert all(len(f["subjects"]) >= 5 for f in data["faculty.json"])
+    # just enough rooms of each type for the department's sessions to fill half their slots
+    slots_per_room = 5 * 6
+    for dept in "AB":
+        rooms = [r for r in data["classrooms.json"] if r["department"] == dept]
+        subjects = {s["id"]: s for s in data["subjects.json"]}
+        for is_lab, kind in ((True, "lab"), (False, "lecture")):
+            need = sum(subjects[sid]["hours_per_week"] for b in data["batches.json"] if b["department"] == dept
+                       for sid in b["subjects"] if subjects[sid]["lab"] == is_lab)
+            assert sum(1 for r in rooms if r["type"] == kind) == max(1, -(-need * 2 // slots_per_room))
+
+    synthetic.write_institute(str(tmp_path), data)
+    assert bench.load_dir(str(tmp_path)) == json.loads(json.dumps(data))
+    for engine in ("v1-greedy", "v2-backtracking"):
+        row = bench.run_child(bench.ENGINES[engine], str(tmp_path), time_limit=10, max_solutions=2)
+        assert row["status"] == "ok" and row["solutions"] >= 1 and row["placed"] <= row["required"]
+        assert row["seconds"] >= 0 and row["peak_rss_mb"] > 0
+
+
+def test_solver_metrics_add_up_to_stats_and_are_written_with_outputs(tmp_path):
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    tc = data["timetable_constraints.json"]
+    for extra in ({"profile": {"cprofile": True, "tracemalloc": True, "top": 5}}, {"workers": 2}, {"decompose": True},
+                  {"ordering": "mrv", "domain_mode": "incremental", "backjumping": True}):
+        data["timetable_constraints.json"] = dict(tc, time_limit=30, **extra)
+        result = pipeline.run(data, log=lambda *a: None)
+        stats, metrics = result["stats"], result["metrics"]
+        assert metrics["phases"]["domain"]["calls"] == stats["nodes"] == sum(d["nodes"] for d in metrics["depths"])
+        assert len(metrics["attempts"]) == stats["attempts"]
+        assert sum(a["nodes"] for a in metrics["attempts"]) == stats["nodes"]
+        assert sum(a["backtracks"] for a in metrics["attempts"]) == stats["backtracks"]
+        assert metrics["phases"]["unassign"]["calls"] == stats["backtracks"]
+        solved = sum(a["outcome"] == "solution" for a in metrics["attempts"])
+        assert metrics["phases"]["score"]["calls"] == metrics["phases"]["write"]["calls"] == solved >= len(result["solutions"])
+        assert all(d["min_domain"] <= d["mean_domain"] <= d["max_domain"] for d in metrics["depths"])
+        if "profile" in extra:
+            assert len(metrics["profile"]["cprofile"]) == 5 and metrics["profile"]["tracemalloc"]["peak_mb"] > 0
+        else:
+            assert metrics["profile"] is None
+
+    paths = pipeline.write_outputs(result, str(tmp_path), log=lambda *a: None)
+    with open(os.path.join(str(tmp_path), "metrics.json")) as f:
+        written = json.load(f)
+    assert os.path.join(str(tmp_path), "metrics.json") in paths
+    assert written["stats"] == result["stats"] and written["attempts"] == result["metrics"]["attempts"]
+
+
+def test_whatif_scenarios_share_the_base_and_match_cold_runs():
+    whatif = import_file('whatif.py', 'timetable_whatif_test')
+    pipeline = whatif.pipeline
+    data = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    data["timetable_constraints.json"] = dict(data["timetable_constraints.json"], time_limit=20)
+    scenarios = [{"name": "extra lab", "patches": [{"op": "copy", "dataset": "classrooms", "id": "L1", "new_id": "L9"}]},
+                 {"name": "F01 off Thu/Fri", "patches": [{"op": "unavailable", "dataset": "faculty", "id": "F01",
+                                                          "days": ["Thu", "Fri"]}]},
+                 {"name": "split B1", "patches": [{"op": "split", "dataset": "batches", "id": "B1", "parts": 2}]},
+                 {"name": "no labs", "patches": [{"op": "remove", "dataset": "rooms", "id": r["id"]}
+                                                 for r in data["classrooms.json"] if r["type"] == "lab"]},
+                 {"name": "typo", "patches": [{"op": "remove", "dataset": "faculty", "id": "F99"}]}]
+    wi = whatif.WhatIf(data)
+    rows = wi.run(scenarios, workers=2)
+    assert [r["scenario"] for r in rows] == ["base"] + [s["name"] for s in scenarios]
+
+    # the same answers as patching the files and solving from cold
+    for row, scenario in zip(rows, [{"patches": []}] + scenarios[:4]):
+        patched, _ = whatif.apply_patches(wi.data, scenario["patches"])
+        cold = pipeline.run(patched, log=lambda *a: None)
+        best = cold["solutions"][0]
+        assert row["feasible"] == (not best["metadata"].get("partial"))
+        assert row["best_score"] == (None if best["metadata"].get("partial") else best["score"])
+        assert row["error"] is None and row["sessions"] == cold["sessions"]
+    split = rows[3]
+    assert split["feasible"] and split["score_delta"] == split["best_score"] - rows[0]["best_score"]
+    no_labs = rows[4]
+    assert not no_labs["feasible"] and no_labs["unplaced"] > 0
+    assert any("no lab room" in u for u in no_labs["unplaced_sessions"])
+    assert "F99" in rows[5]["error"] and not rows[5]["feasible"]
+    assert data["classrooms.json"] == pipeline.load_data_dir(os.path.join(ROOT, 'Data'))["classrooms.json"]
+
+    # untouched records keep the base's models; unaffected index lookups are taken over
+    patched, touched = whatif.apply_patches(wi.data, scenarios[1]["patches"])
+    assert touched == {"faculty.json"}
+    models = pipeline.build_models(patched, reuse=wi.by_record)
+    assert models["classrooms.json"]["L1"] is wi.models["classrooms.json"]["L1"]
+    assert models["faculty.json"]["F01"] is not wi.models["faculty.json"]["F01"]
+    solver, _, _ = pipeline.build_solver(patched, models)
+    index = solver.index_module.CandidateIndex(solver, base=wi.index)
+    assert set(index.reused) == {"_rooms", "_faculty", "_starts", "_days", "_plans"}
+    patched, _ = whatif.apply_patches(wi.data, scenarios[0]["patches"])
+    solver, _, _ = pipeline.build_solver(patched)
+    assert set(solver.index_module.CandidateIndex(solver, base=wi.index).reused) == {"_faculty", "_starts", "_days"}
+    derived = whatif.validate(patched, {"classrooms.json"}, wi.validator)
+    assert derived.issues() == wi.validator.issues() == []
+    assert derived.report()["summary"]["entities"]["classrooms"] == len(wi.data["classrooms.json"]) + 1
+    # passes that do not read classrooms keep the base's issues; the base validator is left alone
+    assert derived._issues["faculty"] is wi.validator._issues["faculty"]
+    assert wi.validator.classrooms is wi.data["classrooms.json"]
+
+
+def test_preanalysis_proves_capacity_shortages_and_skips_the_search():
+    pipeline = import_file('pipeline.py', 'timetable_pipeline_test')
+    base = pipeline.load_data_dir(os.path.join(ROOT, 'Data'))
+    solver, sessions, _ = pipeline.build_solver(base)
+    solver._solver_state()
+    assert solver.preanalysis_module.analyze(solver, sessions)["findings"] == []
+
+    def patched(**datasets):
+        data = dict(base, **datasets)
+        data["timetable_constraints.json"] = dict(base["timetable_constraints.json"],
+                                                  **dict({"time_limit": 30}, **datasets.get("timetable_constraints.json", {})))
+        return data
+    only_mon = [dict(f, preferred_days=["Mon"], preferred_slots=["1", "2"]) if f["id"] == "F03" else f
+                for f in base["faculty.json"]]
+    capped = [dict(f, max_hours_per_week=4) if f["id"] == "F01" else f for f in base["faculty.json"]]
+    one_lab = [r for r in base["classrooms.json"] if r["type"] == "lecture" or r["id"] == "L1"]
+    one_day = [dict(b, available_days=["Mon"]) if b["id"] == "B1" else b for b in base["batches.json"]]
+    cases = [("faculty_hours", {"faculty.json": only_mon}, ["S103"]),
+             # F01 has time for S101 or S301 alone, not for both (a Hall violation over two subjects)
+             ("faculty_hours", {"faculty.json": capped}, ["S101", "S301"]),
+             ("fixed_lab_rooms", {"classrooms.json": one_lab, "timetable_constraints.json": {"fixed_lab_slots": {"1": 1, "3": 1, "5": 1, "7": 1}}}, None),
+             ("batch_slots", {"batches.json": one_day}, None)]
+    for check, datasets, subjects in cases:
+        t0 = time.time()
+        result = pipeline.run(patched(**datasets), log=lambda *a: None)
+        assert time.time() - t0 < 5
+        assert result["solutions"] == [] and result["stats"]["proven_infeasible"] and result["stats"]["attempts"] == 0
+        found = [f for f in result["preanalysis"]["findings"] if f["check"] == check]
+        assert found and found[0]["demand"] > found[0]["supply"] and found[0]["message"]
+        if subjects:
+            assert found[0]["subjects"] == subjects
+
+    # anytime still searches for the best partial; the findings come along
+    result = pipeline.run(patched(**{"batches.json": one_day, "timetable_constraints.json": {"anytime": True, "time_limit": 2}}),
+                          log=lambda *a: None)
+    assert result["solutions"][0]["metadata"]["partial"] and result["preanalysis"]["infeasible"]
+    off = patched(**{"batches.json": one_day, "timetable_constraints.json": {"preanalysis": False, "time_limit": 1}})
+    assert pipeline.run(off, log=lambda *a: None)["preanalysis"] is None
@@ -0,0 +1,283 @@
+"""
+What-if scenarios: one base dataset, a list of patched variants, solved side by side.
+
+    python whatif.py scenarios.json [--data-dir DIR] [--workers N] [--output FILE]
+
+scenarios.json is a list of {"name": ..., "patches": [...]} (or {"scenarios": [...]}).
+A patch is a JSON object; "dataset" is classrooms, faculty, subjects, batches or
+constraints, and "id" the record it changes:
+  {"op": "add", "dataset": "classrooms", "record": {...}}
+  {"op": "copy", "dataset": "classrooms", "id": "L1", "new_id": "L9", "set": {...}}
+  {"op": "remove", "dataset": "faculty", "id": "F07"}
+  {"op": "update", "dataset": "faculty", "id": "F07", "set": {"max_hours_per_week": 12}}
+  {"op": "update", "dataset": "constraints", "set": {"time_limit": 20}}
+  {"op": "unavailable", "dataset": "faculty", "id": "F07", "days": ["Fri"], "slots": ["1"]}
+      drops the days (and/or slots, on every day) from the record's availability
+      (faculty preferred_days/preferred_slots, rooms and batches available_days/available_slots)
+  {"op": "split", "dataset": "batches", "id": "B1", "parts": 2}
+      replaces B1 by B1-1, B1-2 with its strength shared out
+
+The base is loaded, turned into models, validated and solved once. Patches are
+copy-on-write, so every record a scenario leaves alone is the base's record
+and keeps the base's model object (pipeline.build_models); each scenario's
+solver starts from the base's candidate index, taking over the lookups its
+patches cannot affect (scheduler/candidate_index.py); and the validator
+(io/data_validator.py) only re-checks the datasets a scenario patches. Scenarios
+are then solved on forked processes, which inherit all of that from the parent.
+Unless the constraints say otherwise the solves are anytime, so an infeasible
+scenario still reports which sessions it could not place.
+
+run_whatif() returns one row per scenario, the base first:
+  scenario, feasible, best_score, score_delta (against the base), sessions,
+  unplaced (count), unplaced_sessions ("batch/subject: reason"), solutions,
+  seconds, validation (messages of the validator's errors), infeasibility
+  (the bounds the solver's pre-analysis proved violated, scheduler/preanalysis.py), error
+and format_table() lays the rows out as a text table.
+"""
+
+import os, copy, json, time, queue, argparse, multiprocessing
+
+import loader
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+pipeline = loader.load("pipeline.py", "timetable_pipeline", register=True)
+
+DATASETS = {"classrooms": "classrooms.json", "rooms": "classrooms.json", "faculty": "faculty.json",
+            "subjects": "subjects.json", "batches": "batches.json", "constraints": "timetable_constraints.json"}
+# availability fields per dataset: (days, slots)
+AVAILABILITY = {"faculty.json": ("preferred_days", "preferred_slots"),
+                "classrooms.json": ("available_days", "available_slots"),
+                "batches.json": ("available_days", "available_slots")}
+def _dataset(patch):
+    name = patch.get("dataset")
+    if name not in DATASETS and name not in DATASETS.values():
+        raise ValueError(f"patch {patch!r}: unknown dataset {name!r}; expected one of {sorted(set(DATASETS))}")
+    return DATASETS.get(name, name)
+
+
+def _find(records, rid, patch):
+    for i, r in enumerate(records):
+        if r.get("id") == rid:
+            return i
+    raise ValueError(f"patch {patch!r}: no record {rid!r} in {_dataset(patch)}")
+
+
+def apply_patches(data, patches):
+    """
+    (patched data, names of the datasets changed). `data` is not modified: changed
+    datasets are new lists holding the base's records except the ones a patch touched.
+    """
+    data = dict(data)
+    touched = set()
+    for patch in patches:
+        if not isinstance(patch, dict):
+            raise ValueError(f"patch must be an object, got {patch!r}")
+        f, op = _dataset(patch), patch.get("op")
+        if f not in touched:
+            data[f] = dict(data[f]) if f == "timetable_constraints.json" else list(data[f])
+            touched.add(f)
+        records = data[f]
+        if f == "timetable_constraints.json":
+            if op != "update":
+                raise ValueError(f"patch {patch!r}: constraints only take op 'update'")
+            records.update(patch.get("set", {}))
+        elif op == "add":
+            records.append(dict(patch["record"]))
+        elif op == "copy":
+            records.append(dict(records[_find(records, patch.get("id"), patch)], id=patch["new_id"], **patch.get("set", {})))
+        elif op == "remove":
+            del records[_find(records, patch.get("id"), patch)]
+        elif op == "update":
+            i = _find(records, patch.get("id"), patch)
+            records[i] = dict(records[i], **patch.get("set", {}))
+        elif op == "unavailable":
+            if f not in AVAILABILITY:
+                raise ValueError(f"patch {patch!r}: {f} has no availability")
+            i = _find(records, patch.get("id"), patch)
+            record = dict(records[i])
+            for field, drop in zip(AVAILABILITY[f], (patch.get("days"), patch.get("slots"))):
+                if drop:
+                    drop = {str(v) for v in drop}
+                    record[field] = [v for v in record.get(field, []) if str(v) not in drop]
+            records[i] = record
+        elif op == "split":
+            if f != "batches.json":
+                raise ValueError(f"patch {patch!r}: only batches can be split")
+            i = _find(records, patch.get("id"), patch)
+            batch, parts = records[i], int(patch.get("parts", 2))
+            if parts < 2:
+                raise ValueError(f"patch {patch!r}: parts must be at least 2")
+            strength = int(batch.get("strength", 0))
+            records[i:i + 1] = [dict(batch, id=f"{batch['id']}-{k + 1}", name=f"{batch.get('name', batch['id'])} ({k + 1}/{parts})",
+                                     strength=strength // parts + (1 if k < strength % parts else 0)) for k in range(parts)]
+        else:
+            raise ValueError(f"patch {patch!r}: unknown op {op!r}")
+    return data, touched
+
+
+def validate(data, touched=(), base=None):
+    """
+    io/data_validator.py's DataValidator of `data`; given the base dataset's validator
+    `base`, a copy of it with only the `touched` datasets re-indexed and re-checked.
+    """
+    validator_mod = pipeline.import_module(os.path.join("io", "data_validator.py"), "data_validator_pkg")
+    if base is None:
+        return validator_mod.DataValidator(data["batches.json"], data["subjects.json"], data["faculty.json"],
+                                           data["classrooms.json"], data["timetable_constraints.json"])
+    validator = copy.copy(base)
+    for f in sorted(touched):
+        if f[:-len(".json")] in validator_mod.DATASETS:
+            validator.update(f, data[f])
+    return validator
+
+
+class WhatIf:
+    def __init__(self, data):
+        """
+        Args:
+            data (dict): the base dataset, as from pipeline.load_data_dir or pipeline.request_data.
+        """
+        self.data = dict(data, **{"timetable_constraints.json": dict({"anytime": True}, **data["timetable_constraints.json"])})
+        self.models = pipeline.build_models(self.data)
+        # id(record) -> model, for the records scenarios share with the base
+        self.by_record = {}
+        for f, models in self.models.items():
+            for r in self.data[f]:
+                self.by_record[id(r)] = models[r['id']]
+        self.validator = validate(self.data)
+        self.index = None
+
+    def _setup(self, solver, workers):
+        if self.index is not None:
+            solver._index = solver.index_module.CandidateIndex(solver, base=self.index)
+        if workers > 1:
+            # scenarios are the parallel unit
+            solver.workers = 1
+
+    @staticmethod
+    def _row(name, **fields):
+        return dict({"scenario": name, "feasible": False, "best_score": None, "score_delta": None, "sessions": None,
+                     "unplaced": None, "unplaced_sessions": [], "solutions": 0, "seconds": None, "validation": [],
+                     "infeasibility": [], "error": None}, **fields)
+
+    def solve(self, name, patches=(), workers=1):
+        """One comparison row (see the module docstring); the base scenario has no patches."""
+        t0 = time.time()
+        row = self._row(name)
+        try:
+            data, touched = apply_patches(self.data, patches)
+            validator = validate(data, touched, self.validator)
+            row["validation"] = [i["message"] for i in validator.report()["errors"]]
+            models = pipeline.build_models(data, reuse=self.by_record)
+            solvers = []
+
+            def setup(solver):
+                self._setup(solver, workers)
+                solvers.append(solver)
+            result = pipeline.run(data, log=lambda *a: None, setup=setup, models=models)
+            if self.index is None and not patches:
+                self.index = solvers[0]._candidate_index()
+        except Exception as e:
+            row.update(error=f"{type(e).__name__}: {e}", seconds=round(time.time() - t0, 3))
+            return row
+        best = result["solutions"][0] if result["solutions"] else None
+        partial = bool(best and best["metadata"].get("partial"))
+        unplaced = best["metadata"].get("unplaced", []) if partial else []
+        row.update(feasible=bool(best) and not partial, sessions=result["sessions"],
+                   best_score=best["score"] if best and not partial else None,
+                   unplaced=len(unplaced) if best else result["sessions"],
+                   unplaced_sessions=[f"{u['batch']}/{u['subject']}" + (f": {u['reason']}" if u.get('reason') else "")
+                                      for u in unplaced],
+                   solutions=0 if partial else len(result["solutions"]), seconds=round(time.time() - t0, 3),
+                   infeasibility=[f["message"] for f in (result["preanalysis"] or {}).get("findings", [])])
+        return row
+
+    def run(self, scenarios, workers=0):
+        """Rows of the base and of every {"name", "patches"} scenario, in order; workers 0 means one per CPU."""
+        base = self.solve("base")
+        workers = min(int(workers) if workers else (os.cpu_count() or 1), len(scenarios))
+        named = [(s.get("name") or f"scenario {i + 1}", s.get("patches", [])) for i, s in enumerate(scenarios)]
+        rows = [None] * len(named)
+        if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("fork")
+            out = ctx.Queue()
+
+            def work(k):
+                for i in range(k, len(named), workers):
+                    out.put((i, self.solve(*named[i], workers=workers)))
+            procs = [ctx.Process(target=work, args=(k,), daemon=True) for k in range(workers)]
+            for p in procs:
+                p.start()
+            try:
+                while any(r is None for r in rows):
+                    try:
+                        i, row = out.get(timeout=0.5)
+                    except queue.Empty:
+                        if not any(p.is_alive() for p in procs):
+                            break
+                        continue
+                    rows[i] = row
+            finally:
+                for p in procs:
+                    if p.is_alive():
+                        p.terminate()
+                for p in procs:
+                    p.join()
+                out.close()
+            for i, row in enumerate(rows):
+                if row is None:
+                    rows[i] = self._row(named[i][0], error="worker exited without a result")
+        else:
+            rows = [self.solve(*s) for s in named]
+        for row in rows:
+            if row["best_score"] is not None and base["best_score"] is not None:
+                row["score_delta"] = row["best_score"] - base["best_score"]
+        return [base] + rows
+
+
+def run_whatif(data, scenarios, workers=0):
+    """WhatIf(data).run(scenarios, workers)."""
+    return WhatIf(data).run(scenarios, workers)
+
+
+def run_request(body):
+    """The service's /whatif job: base datasets as for /solve plus "scenarios" (and optional "workers")."""
+    scenarios = body.get("scenarios") if isinstance(body, dict) else None
+    if not isinstance(scenarios, list):
+        raise ValueError('what-if body needs a "scenarios" list')
+    return {"scenarios": run_whatif(pipeline.request_data(body), scenarios, body.get("workers", 0))}
+
+
+def format_table(rows):
+    columns = [("scenario", "scenario"), ("feasible", "feasible"), ("best", "best_score"), ("delta", "score_delta"),
+               ("unplaced", "unplaced"), ("solutions", "solutions"), ("seconds", "seconds")]
+    cells = [[h for h, _ in columns]] + [["-" if r[k] is None else str(r[k]) for _, k in columns] for r in rows]
+    widths = [max(len(c[i]) for c in cells) for i in range(len(columns))]
+    lines = ["  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(line, widths))) for line in cells]
+    for r in rows:
+        for note in ([r["error"]] if r["error"] else []) + r["validation"] + r["infeasibility"] + r["unplaced_sessions"][:5]:
+            lines.append(f"  {r['scenario']}: {note}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Solve what-if scenarios of a dataset and compare them.")
+    ap.add_argument("scenarios", help="JSON file: a list of {name, patches} (or {\"scenarios\": [...]})")
+    ap.add_argument("--data-dir", default=None, help="base dataset folder (default ./data or ./Data)")
+    ap.add_argument("--workers", type=int, default=0, help="scenarios solved at once (0: one per CPU)")
+    ap.add_argument("--output", default=None, help="also write the rows to this JSON file")
+    args = ap.parse_args(argv)
+    with open(args.scenarios) as f:
+        scenarios = json.load(f)
+    if isinstance(scenarios, dict):
+        scenarios = scenarios.get("scenarios", [])
+    data = pipeline.load_data_dir(os.path.abspath(args.data_dir) if args.data_dir else pipeline.default_data_dir())
+    rows = run_whatif(data, scenarios, args.workers)
+    print(format_table(rows))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
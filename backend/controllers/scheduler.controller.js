@@ -1,6 +1,7 @@
 const { spawn } = require("child_process");
 const fs = require("fs/promises");
 const path = require("path");
+const os = require("os");
 
 // Import all necessary models
 const Subject = require("../models/subject.model");
@@ -10,6 +11,25 @@ const Batch = require("../models/batch.model");
 const Timetable = require("../models/timetable.model");
 const { Script } = require("vm");
 
+// Replace the institute's timetable with the top-ranked solution and answer the request.
+const saveTimetable = async (req, res, generatedSlots) => {
+    await Timetable.deleteMany({ institute: req.user.institute });
+
+    const newTimetable = new Timetable({
+        institute: req.user.institute,
+        slots: generatedSlots,
+        generatedAt: new Date(),
+    });
+
+    await newTimetable.save();
+
+    console.log("Timetable generated and saved successfully!");
+    res.status(201).json({
+        message: "Timetable generated successfully!",
+        timetable: newTimetable,
+    });
+};
+
 const generateTimetable = async (req, res) => {
     try {
         console.log("Starting timetable generation...");
@@ -68,7 +88,31 @@ const generateTimetable = async (req, res) => {
         ];
 
         const pythonScriptDir = path.join(__dirname, "..", "app", "v2");
-        const dataDir = path.join(pythonScriptDir, "Data");
+        const constraintsPath = path.join(pythonScriptDir, "Data", "timetable_constraints.json");
+
+        // With the long-lived scheduler service (app/v2/service.py) running, send
+        // the datasets in the request body instead of spawning Python per request.
+        const serviceUrl = process.env.SCHEDULER_SERVICE_URL;
+        if (serviceUrl) {
+            const constraints = JSON.parse(await fs.readFile(constraintsPath, "utf-8"));
+            const response = await fetch(`${serviceUrl}/solve`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ subjects, faculty, classrooms: rooms, batches, constraints }),
+            });
+            const result = await response.json();
+            if (!response.ok || !result.solutions || result.solutions.length === 0) {
+                return res.status(500).json({
+                    message: "Timetable generation failed.",
+                    error: result.error || "No feasible timetable found.",
+                });
+            }
+            return saveTimetable(req, res, result.solutions[0]);
+        }
+
+        // One data folder per request, so concurrent generations never
+        // overwrite each other's inputs or outputs.
+        const dataDir = await fs.mkdtemp(path.join(os.tmpdir(), "timetable-"));
         const outputDir = path.join(dataDir, "output");
         await fs.mkdir(outputDir, { recursive: true });
 
@@ -77,18 +121,15 @@ const generateTimetable = async (req, res) => {
             fs.writeFile(path.join(dataDir, "faculty.json"), JSON.stringify(faculty, null, 4)),
             fs.writeFile(path.join(dataDir, "classrooms.json"), JSON.stringify(rooms, null, 4)),
             fs.writeFile(path.join(dataDir, "batches.json"), JSON.stringify(batches, null, 4)),
+            fs.copyFile(constraintsPath, path.join(dataDir, "timetable_constraints.json")),
         ]);
         
-        console.log("Data files created for Python script.");
+        console.log("Data files created for Python script in", dataDir);
 
         const pythonScriptPath = path.join(pythonScriptDir, "main.py");
         
-        // *** THIS IS THE KEY CHANGE ***
         // Set the current working directory for the python script
-        const pythonProcess = spawn("python", [pythonScriptPath], { cwd: pythonScriptDir });
-
-        console.log(pythonProcess);
-        
+        const pythonProcess = spawn("python", [pythonScriptPath, "--data-dir", dataDir, "--output-dir", outputDir], { cwd: pythonScriptDir });
 
         let scriptOutput = "";
         pythonProcess.stdout.on("data", (data) => {
@@ -96,9 +137,6 @@ const generateTimetable = async (req, res) => {
             scriptOutput += data.toString();
         });
 
-        console.log(scriptOutput);
-        
-
         let scriptError = "";
         pythonProcess.stderr.on("data", (data) => {
             console.error(`Python script stderr: ${data}`);
@@ -108,39 +146,26 @@ const generateTimetable = async (req, res) => {
         pythonProcess.on("close", async (code) => {
             console.log(`Python script exited with code ${code}`);
 
-            if (code !== 0) {
-                return res.status(500).json({ 
-                    message: "Timetable generation failed.",
-                    error: scriptError 
-                });
-            }
-
-            const resultPath = path.join(outputDir, "timetable_top_1.json");
             try {
+                if (code !== 0) {
+                    return res.status(500).json({ 
+                        message: "Timetable generation failed.",
+                        error: scriptError 
+                    });
+                }
+
+                const resultPath = path.join(outputDir, "timetable_top_1.json");
                 const resultData = await fs.readFile(resultPath, "utf-8");
                 const generatedSlots = JSON.parse(resultData);
-                
-                await Timetable.deleteMany({ institute: req.user.institute });
-
-                const newTimetable = new Timetable({
-                    institute: req.user.institute,
-                    slots: generatedSlots,
-                    generatedAt: new Date(),
-                });
-
-                await newTimetable.save();
-
-                console.log("Timetable generated and saved successfully!");
-                res.status(201).json({
-                    message: "Timetable generated successfully!",
-                    timetable: newTimetable,
-                });
+                await saveTimetable(req, res, generatedSlots);
             } catch (fileError) {
                 console.error("Error reading or processing output file:", fileError);
                 res.status(500).json({
                     message: "Script ran, but could not process the output file.",
                     error: scriptError,
                 });
+            } finally {
+                await fs.rm(dataDir, { recursive: true, force: true });
             }
         });
 